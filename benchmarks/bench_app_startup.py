@@ -0,0 +1,104 @@
+"""
+Cold-start and per-rerun timing for the Streamlit app.
+
+Each sample runs in a fresh interpreter. Streamlit and its test harness are
+imported first (not timed). The app script is then executed through a thin
+wrapper that times only the script body, so the harness's own polling does not
+count: the first run is the cold start (it pays for importing the app's
+modules), the following runs are reruns of the same session. Also lists which
+heavy optional modules the first render pulled in.
+
+Usage:
+    python benchmarks/bench_app_startup.py --samples 5 --reruns 20
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+HEAVY_MODULES = ["pandas", "numpy", "pyarrow", "smtplib", "email.mime.multipart", "requests", "xhtml2pdf"]
+
+# Streamlit script that runs the app and appends its own run time to a file
+WRAPPER = """
+import json, sys, time
+sys.path.insert(0, {root!r})
+before = set(sys.modules)
+code = compile(open({app!r}, encoding="utf-8").read(), {app!r}, "exec")
+start = time.perf_counter()
+try:
+    exec(code, {{"__name__": "__main__", "__file__": {app!r}}})
+finally:
+    elapsed = time.perf_counter() - start
+    loaded = [m for m in {heavy!r} if m in sys.modules and m not in before]
+    with open({timings!r}, "a") as f:
+        f.write(json.dumps({{"elapsed": elapsed, "loaded": loaded}}) + "\\n")
+"""
+
+SAMPLE = """
+import sys
+from streamlit.testing.v1 import AppTest
+at = AppTest.from_file({wrapper!r}, default_timeout=60)
+for _ in range({runs}):
+    at.run()
+    if at.exception:
+        print([str(e.value) for e in at.exception])
+        break
+"""
+
+
+def run_sample(app, reruns, workdir):
+    timings = os.path.join(workdir, "timings.jsonl")
+    wrapper = os.path.join(workdir, "wrapped_app.py")
+    if os.path.exists(timings):
+        os.unlink(timings)
+    with open(wrapper, "w", encoding="utf-8") as f:
+        f.write(WRAPPER.format(root=ROOT, app=app, heavy=HEAVY_MODULES, timings=timings))
+
+    result = subprocess.run(
+        [sys.executable, "-c", SAMPLE.format(wrapper=wrapper, runs=reruns + 1)],
+        cwd=ROOT, capture_output=True, text=True, check=True
+    )
+    if result.stdout.strip():
+        print(f"App raised: {result.stdout.strip()}")
+
+    with open(timings) as f:
+        runs = [json.loads(line) for line in f]
+    return runs[0], runs[1:]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure app cold start and rerun time")
+    parser.add_argument("--app", default=os.path.join(ROOT, "app.py"))
+    parser.add_argument("--samples", type=int, default=5, help="Fresh interpreters to start")
+    parser.add_argument("--reruns", type=int, default=20, help="Reruns timed per interpreter")
+    args = parser.parse_args(argv)
+    app = os.path.abspath(args.app)
+
+    colds = []
+    reruns = []
+    loaded = set()
+    with tempfile.TemporaryDirectory(prefix="bench_app_") as workdir:
+        for _ in range(args.samples):
+            cold, warm = run_sample(app, args.reruns, workdir)
+            colds.append(cold["elapsed"])
+            loaded.update(cold["loaded"])
+            reruns.extend(run["elapsed"] for run in warm)
+
+    reruns.sort()
+    print(app)
+    print(f"  cold start     median {statistics.median(colds) * 1000:.1f} ms "
+          f"(min {min(colds) * 1000:.1f}, max {max(colds) * 1000:.1f}) over {args.samples} interpreters")
+    if reruns:
+        print(f"  rerun          median {statistics.median(reruns) * 1000:.1f} ms, "
+              f"p90 {reruns[int(len(reruns) * 0.9)] * 1000:.1f} ms over {len(reruns)} reruns")
+    print(f"  heavy modules  {', '.join(sorted(loaded)) or 'none'} loaded by the first render")
+
+
+if __name__ == "__main__":
+    main()
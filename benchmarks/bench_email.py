@@ -0,0 +1,164 @@
+"""
+Email throughput benchmark against the local SMTP stand-in.
+
+Compares the old direct path (a new SMTP connection, login and send for every
+report, as send_email_report used to do) with the queued path (enqueue into
+the outbox, delivered by OutboxSender over pooled connections). Messages are
+offered at a configurable rate; the benchmark reports messages per second,
+connections opened (connection reuse) and the enqueue-to-delivery latency
+distribution.
+
+Usage:
+    python benchmarks/bench_email.py --messages 500 --rate 100 --pool-size 4 --latency-ms 20
+"""
+
+import argparse
+import os
+import shutil
+import smtplib
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "devtools"))
+
+from teachtalk import email_outbox
+from teachtalk import report_templates
+from smtp_standin import SMTPStandIn
+
+SENDER = "bench@example.com"
+
+
+def sample_report():
+    return report_templates.render_teacher_report(
+        "Benchmark Teacher", "Benchmark School", "teacher@example.com",
+        {"Accuracy": 4.2, "Fluency": 3.1, "Intonation": 2.8, "Vocabulary": 3.9, "Grammar": 3.4},
+        31.4, 45, 69.8, "Intermediate", ["Accuracy"], ["Intonation"]
+    )
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * fraction))]
+
+
+def print_report(label, sent, elapsed, standin_stats, latencies):
+    latencies = sorted(latencies)
+    connections = standin_stats["connections"]
+    print(f"\n{label}")
+    print(f"  delivered        {sent} messages in {elapsed:.2f}s ({sent / elapsed:.1f} msg/s)")
+    print(f"  connections      {connections} ({sent / connections if connections else 0:.1f} messages per connection)")
+    print(
+        "  latency (ms)     "
+        f"p50 {percentile(latencies, 0.50) * 1000:.1f}  "
+        f"p90 {percentile(latencies, 0.90) * 1000:.1f}  "
+        f"p99 {percentile(latencies, 0.99) * 1000:.1f}  "
+        f"max {(latencies[-1] if latencies else 0) * 1000:.1f}"
+    )
+
+
+def paced(count, rate):
+    """Yield message indexes at the given rate (messages per second, 0 = as fast as possible)"""
+    start = time.perf_counter()
+    for i in range(count):
+        if rate:
+            delay = start + i / rate - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+        yield i
+
+
+def bench_direct(args, html):
+    """One SMTP session per message, like the original send_email_report"""
+    standin = SMTPStandIn(latency=args.latency_ms / 1000).start()
+    latencies = []
+    lock = threading.Lock()
+
+    def send(i):
+        offered = time.perf_counter()
+        msg = email_outbox.build_message(SENDER, f"teacher{i}@example.com", "Results", html)
+        with smtplib.SMTP(standin.host, standin.port) as server:
+            server.login(SENDER, "password")
+            server.send_message(msg)
+        with lock:
+            latencies.append(time.perf_counter() - offered)
+
+    start = time.perf_counter()
+    # Each Streamlit session sent its own mail, so concurrency follows the offered rate
+    with ThreadPoolExecutor(max_workers=args.direct_workers) as executor:
+        for i in paced(args.messages, args.rate):
+            executor.submit(send, i)
+    elapsed = time.perf_counter() - start
+
+    stats = standin.stats()
+    standin.stop()
+    print_report("Direct (new SMTP session per message)", stats["messages"], elapsed, stats, latencies)
+
+
+def bench_outbox(args, html):
+    """Enqueue into the outbox and let the pooled background sender deliver"""
+    standin = SMTPStandIn(latency=args.latency_ms / 1000).start()
+    workdir = tempfile.mkdtemp(prefix="bench_email_")
+    db_path = os.path.join(workdir, "bench.db")
+
+    pool = email_outbox.SMTPPool(standin.host, standin.port, SENDER, "password",
+                                 size=args.pool_size, use_tls=False)
+    sender = email_outbox.OutboxSender(pool, db_path=db_path, batch_size=args.batch_size, poll_interval=0.05)
+    sender.start()
+
+    enqueue_times = []
+    start = time.perf_counter()
+    for i in paced(args.messages, args.rate):
+        t = time.perf_counter()
+        email_outbox.enqueue_email(f"teacher{i}@example.com", "Results", html, db_path=db_path)
+        enqueue_times.append(time.perf_counter() - t)
+        sender.wake()
+
+    while email_outbox.outbox_counts(db_path).get(email_outbox.SENT, 0) < args.messages:
+        time.sleep(0.02)
+    elapsed = time.perf_counter() - start
+    sender.stop()
+
+    conn = email_outbox.connect(db_path)
+    latencies = [row[0] for row in conn.execute("SELECT sent_at - created_at FROM email_outbox")]
+    conn.close()
+
+    stats = standin.stats()
+    standin.stop()
+    shutil.rmtree(workdir, ignore_errors=True)
+
+    print_report(f"Outbox (pool of {args.pool_size}, batches of {args.batch_size})",
+                 stats["messages"], elapsed, stats, latencies)
+    enqueue_times.sort()
+    print(f"  submit blocked   p50 {percentile(enqueue_times, 0.5) * 1000:.2f} ms  "
+          f"p99 {percentile(enqueue_times, 0.99) * 1000:.2f} ms (time to queue)")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Email throughput benchmark")
+    parser.add_argument("--messages", type=int, default=300)
+    parser.add_argument("--rate", type=float, default=0, help="Offered messages per second (0 = unpaced)")
+    parser.add_argument("--pool-size", type=int, default=4)
+    parser.add_argument("--batch-size", type=int, default=20)
+    parser.add_argument("--latency-ms", type=float, default=10.0, help="Simulated server time per message")
+    parser.add_argument("--direct-workers", type=int, default=16, help="Concurrent sessions for the direct path")
+    parser.add_argument("--mode", choices=["both", "direct", "outbox"], default="both")
+    args = parser.parse_args(argv)
+
+    html = sample_report()
+    print(f"{args.messages} messages of {len(html) / 1024:.1f} KiB, offered rate "
+          f"{args.rate or 'unpaced'}, server latency {args.latency_ms:.0f} ms")
+
+    if args.mode in ("both", "direct"):
+        bench_direct(args, html)
+    if args.mode in ("both", "outbox"):
+        bench_outbox(args, html)
+
+
+if __name__ == "__main__":
+    main()
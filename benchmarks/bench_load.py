@@ -0,0 +1,271 @@
+"""
+Load test: N virtual teachers taking the whole test against one API instance.
+
+Starts the AssemblyAI mock (devtools/assemblyai_mock.py) and the headless API
+(teachtalk.api under uvicorn, in its own process with a throwaway secrets
+file, results database and spill directory). Each virtual teacher starts a
+session, uploads a recording for all nine items, polls each until it is
+scored, and submits. The benchmark reports teachers and items per second,
+latency percentiles per stage, and the API process's CPU time and peak
+memory (read from /proc, so CPU and memory are Linux only).
+
+Stages:
+    create   POST /sessions
+    upload   PUT of one recording (until the 202)
+    score    from the upload until polling sees the item scored
+    submit   POST /sessions/{token}/submit (save results, queue emails)
+    teacher  the whole test for one teacher
+
+Usage:
+    python benchmarks/bench_load.py --teachers 50 --concurrency 25 --processing-ms 1500 --latency-ms 20
+    python benchmarks/bench_load.py --teachers 50 --shared-audio   # every teacher uploads the same files
+"""
+
+import argparse
+import json
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "devtools"))
+
+from teachtalk import scoring
+from assemblyai_mock import AssemblyAIMock
+
+ITEM_KEYS = (
+    [f"sentence_{i}" for i in range(len(scoring.PART1_SENTENCES))]
+    + [f"prompt_{i}" for i in range(len(scoring.PART2_PROMPTS))]
+    + ["explanation"]
+)
+STAGES = ("create", "upload", "score", "submit", "teacher")
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * fraction))]
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class ProcessSampler:
+    """Samples a process's CPU time and resident memory from /proc"""
+
+    def __init__(self, pid, interval=0.25):
+        self.pid = pid
+        self.interval = interval
+        self.peak_rss = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def cpu_seconds(self):
+        try:
+            with open(f"/proc/{self.pid}/stat") as f:
+                fields = f.read().rsplit(")", 1)[1].split()
+        except OSError:
+            return None
+        # utime and stime are fields 14 and 15 of /proc/<pid>/stat
+        return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+
+    def rss_bytes(self):
+        try:
+            with open(f"/proc/{self.pid}/status") as f:
+                for line in f:
+                    if line.startswith("VmRSS:"):
+                        return int(line.split()[1]) * 1024
+        except OSError:
+            pass
+        return None
+
+    def _run(self):
+        while not self._stop.is_set():
+            rss = self.rss_bytes()
+            if rss:
+                self.peak_rss = max(self.peak_rss, rss)
+            self._stop.wait(self.interval)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+
+def start_api(workdir, mock, args):
+    """Run the API under uvicorn in a fresh process configured through its own secrets file"""
+    os.makedirs(os.path.join(workdir, ".streamlit"))
+    secrets = {
+        "ASSEMBLYAI_API_KEY": "load-test",
+        "ASSEMBLYAI_BASE_URL": mock.base_url,
+        "ASSEMBLYAI_POLL_SECONDS": args.poll_ms / 1000,
+        "RESULTS_DB_PATH": os.path.join(workdir, "results.db"),
+        "SESSION_SPILL_DIR": os.path.join(workdir, "spill"),
+    }
+    with open(os.path.join(workdir, ".streamlit", "secrets.toml"), "w") as f:
+        for key, value in secrets.items():
+            # JSON strings and numbers are valid TOML values
+            f.write(f"{key} = {json.dumps(value)}\n")
+
+    port = free_port()
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "teachtalk.api:app", "--port", str(port),
+         "--log-level", "warning", "--no-access-log", "--limit-concurrency", "1000"],
+        cwd=workdir, env=env,
+        stdout=None if args.verbose else subprocess.DEVNULL,
+        stderr=None if args.verbose else subprocess.DEVNULL
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        try:
+            # Also warms up the process-wide resources (config, session store)
+            requests.post(f"{base_url}/sessions", timeout=5).raise_for_status()
+            return process, base_url
+        except requests.ConnectionError:
+            time.sleep(0.1)
+    process.kill()
+    raise RuntimeError("API did not start")
+
+
+def run_teacher(index, base_url, args, timings, lock):
+    """One virtual teacher: start, record all items, submit. Returns None or an error message."""
+    http = requests.Session()
+
+    def timed(stage, start):
+        with lock:
+            timings[stage].append(time.perf_counter() - start)
+
+    teacher_start = time.perf_counter()
+    start = time.perf_counter()
+    response = http.post(f"{base_url}/sessions", timeout=30)
+    response.raise_for_status()
+    token = response.json()["token"]
+    timed("create", start)
+
+    for item_index, item_key in enumerate(ITEM_KEYS):
+        seed = item_index if args.shared_audio else index * len(ITEM_KEYS) + item_index
+        audio = seed.to_bytes(8, "big") * (args.audio_kb * 128)
+
+        upload_start = time.perf_counter()
+        response = http.put(f"{base_url}/sessions/{token}/items/{item_key}", data=audio, timeout=60)
+        response.raise_for_status()
+        timed("upload", upload_start)
+
+        status = response.json()["status"]
+        while status == "pending":
+            time.sleep(args.poll_ms / 1000)
+            response = http.get(f"{base_url}/sessions/{token}/items/{item_key}", timeout=30)
+            response.raise_for_status()
+            status = response.json()["status"]
+        if status != "scored":
+            return f"{item_key}: {status} {response.json().get('error') or ''}"
+        timed("score", upload_start)
+
+    start = time.perf_counter()
+    response = http.post(f"{base_url}/sessions/{token}/submit", json={
+        "name": f"Teacher {index}", "institution": f"School {index % 10}",
+        "email": f"teacher{index}@example.com",
+    }, timeout=60)
+    response.raise_for_status()
+    timed("submit", start)
+    timed("teacher", teacher_start)
+    return None
+
+
+def print_report(args, elapsed, timings, failures, sampler, cpu_used, mock_stats):
+    completed = len(timings["teacher"])
+    items = len(timings["score"])
+    print(f"\n{args.teachers} teachers, concurrency {args.concurrency}, "
+          f"mock latency {args.latency_ms:.0f} ms, processing {args.processing_ms:.0f} ms")
+    print(f"  completed        {completed} teachers, {len(failures)} failed, in {elapsed:.2f}s")
+    print(f"  throughput       {completed / elapsed * 60:.1f} teachers/min, {items / elapsed:.2f} items/s")
+    print(f"  {'latency (ms)':<16} {'p50':>9} {'p90':>9} {'p99':>9} {'max':>9}")
+    for stage in STAGES:
+        values = sorted(timings[stage])
+        print(
+            f"  {stage:<16} "
+            + " ".join(f"{percentile(values, q) * 1000:>9.1f}" for q in (0.50, 0.90, 0.99))
+            + f" {(values[-1] if values else 0) * 1000:>9.1f}"
+        )
+    if cpu_used is not None:
+        print(f"  API CPU          {cpu_used:.2f}s ({cpu_used / elapsed * 100:.0f}% of one core, "
+              f"{cpu_used / completed * 1000 if completed else 0:.1f} ms per teacher)")
+    if sampler.peak_rss:
+        print(f"  API peak RSS     {sampler.peak_rss / 1024 / 1024:.1f} MB")
+    print(f"  mock             {mock_stats}")
+    for failure in failures[:5]:
+        print(f"  failure: {failure}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load-test the assessment API with virtual teachers")
+    parser.add_argument("--teachers", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=0, help="Teachers in flight at once (0 = all)")
+    parser.add_argument("--audio-kb", type=int, default=64, help="Size of each uploaded recording")
+    parser.add_argument("--shared-audio", action="store_true", help="All teachers upload identical recordings")
+    parser.add_argument("--latency-ms", type=float, default=20.0, help="Mock AssemblyAI per-request latency")
+    parser.add_argument("--processing-ms", type=float, default=1000.0, help="Mock transcription time")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Mock HTTP 500 rate")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="Mock transcription failure rate")
+    parser.add_argument("--poll-ms", type=float, default=200.0, help="Client and server poll interval")
+    parser.add_argument("--verbose", action="store_true", help="Show the API server's output")
+    args = parser.parse_args(argv)
+    args.concurrency = args.concurrency or args.teachers
+
+    mock = AssemblyAIMock(
+        latency=args.latency_ms / 1000, processing_time=args.processing_ms / 1000,
+        error_rate=args.error_rate, failure_rate=args.failure_rate
+    ).start()
+    workdir = tempfile.mkdtemp(prefix="teachtalk_load_")
+    process, base_url = start_api(workdir, mock, args)
+    sampler = ProcessSampler(process.pid).start()
+    try:
+        timings = {stage: [] for stage in STAGES}
+        lock = threading.Lock()
+        failures = []
+
+        cpu_start = sampler.cpu_seconds()
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+            futures = [
+                pool.submit(run_teacher, i, base_url, args, timings, lock) for i in range(args.teachers)
+            ]
+            for future in futures:
+                try:
+                    error = future.result()
+                except Exception as e:
+                    error = str(e)
+                if error:
+                    failures.append(error)
+        elapsed = time.perf_counter() - start
+        cpu_end = sampler.cpu_seconds()
+
+        cpu_used = cpu_end - cpu_start if cpu_start is not None and cpu_end is not None else None
+        print_report(args, elapsed, timings, failures, sampler, cpu_used, mock.stats())
+    finally:
+        sampler.stop()
+        process.terminate()
+        process.wait(timeout=10)
+        mock.stop()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""
+Benchmark report rendering.
+
+Renders teacher and head-teacher reports for a spread of synthetic results and
+reports the time per render, with the cached stylesheets warm and with the
+stylesheet cache cleared before every render (the cost the old f-string
+reports paid on every call).
+
+Usage:
+    python benchmarks/bench_report_render.py --reports 5000
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from teachtalk import report_templates
+
+COMPONENTS = ["Accuracy", "Fluency", "Intonation", "Vocabulary", "Grammar"]
+
+
+def synthetic_results(count, seed=42):
+    rng = random.Random(seed)
+    results = []
+    for i in range(count):
+        avg_scores = {component: rng.uniform(0.5, 5.0) for component in COMPONENTS}
+        percentage = sum(avg_scores.values()) / (len(avg_scores) * 5) * 100
+        results.append({
+            "name": f"Teacher {i}",
+            "institution": f"School {i % 50}",
+            "email": f"teacher{i}@example.com",
+            "avg_scores": avg_scores,
+            "total_score": percentage * 0.45,
+            "max_score": 45,
+            "percentage": percentage,
+            "proficiency_level": "Intermediate",
+            "strengths": [c for c, avg in avg_scores.items() if avg >= 4.0],
+            "improvements": [c for c, avg in avg_scores.items() if avg < 3.0],
+        })
+    return results
+
+
+def render_teacher(result):
+    return report_templates.render_teacher_report(
+        result["name"], result["institution"], result["email"], result["avg_scores"],
+        result["total_score"], result["max_score"], result["percentage"],
+        result["proficiency_level"], result["strengths"], result["improvements"]
+    )
+
+
+def render_head_teacher(result):
+    return report_templates.render_head_teacher_report(
+        result["name"], result["institution"], result["email"], result["avg_scores"],
+        5, 3.4, 3, 3.1, 3.0, result["total_score"], result["max_score"], result["percentage"],
+        result["proficiency_level"], result["strengths"], result["improvements"]
+    )
+
+
+def clear_caches():
+    report_templates.teacher_stylesheet.cache_clear()
+    report_templates.head_teacher_stylesheet.cache_clear()
+
+
+def bench(label, render, results, cold):
+    timings = []
+    total_bytes = 0
+    for result in results:
+        if cold:
+            clear_caches()
+        start = time.perf_counter()
+        html = render(result)
+        timings.append(time.perf_counter() - start)
+        total_bytes += len(html)
+
+    timings.sort()
+    total = sum(timings)
+    print(
+        f"{label:<32} {len(results) / total:>10.0f} reports/s  "
+        f"mean {statistics.mean(timings) * 1e6:>7.1f} µs  "
+        f"p50 {timings[len(timings) // 2] * 1e6:>7.1f} µs  "
+        f"p99 {timings[int(len(timings) * 0.99)] * 1e6:>7.1f} µs  "
+        f"avg size {total_bytes / len(results) / 1024:.1f} KiB"
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark report rendering")
+    parser.add_argument("--reports", type=int, default=2000)
+    args = parser.parse_args(argv)
+
+    results = synthetic_results(args.reports)
+
+    # Warm up
+    for result in results[:50]:
+        render_teacher(result)
+        render_head_teacher(result)
+
+    bench("teacher (cached stylesheet)", render_teacher, results, cold=False)
+    bench("teacher (stylesheet per call)", render_teacher, results, cold=True)
+    bench("head teacher (cached stylesheet)", render_head_teacher, results, cold=False)
+    bench("head teacher (stylesheet per call)", render_head_teacher, results, cold=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,224 @@
+"""
+Local mock of the AssemblyAI endpoints the app uses, for load tests.
+
+Implements ``POST /v2/upload``, ``POST /v2/transcript`` and
+``GET /v2/transcript/{id}`` closely enough for transcribe_audio_assemblyai:
+any authorization header is accepted, each upload is kept in memory only as a
+hash, and a transcript stays ``processing`` for a configurable time before it
+completes with a canned teacher response (picked by the audio hash, so the
+same audio always gets the same transcript). Per-request latency, an HTTP 500
+rate and a transcription failure rate make it behave more like the real
+service under load.
+
+Point the app at it with ``ASSEMBLYAI_BASE_URL = "http://127.0.0.1:8100"``.
+
+Usage:
+    python devtools/assemblyai_mock.py --port 8100 --latency-ms 50 --processing-ms 1500
+"""
+
+import argparse
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+TRANSCRIPTS = (
+    "Good morning everyone, please open your books to page twelve.",
+    "Can you tell me why the answer is different this time?",
+    "Let's work together in small groups and share our ideas.",
+    "Remember to check your spelling before you hand in your work.",
+    "Photosynthesis is how plants use sunlight to make their own food, "
+    "so the leaves capture light energy and turn water and carbon dioxide into sugar.",
+    "That's a great question! Fractions show parts of a whole, like half of a pizza.",
+    "Um, I think, uh, we should probably start with the first exercise.",
+)
+
+_TRANSCRIPT_PATH = re.compile(r"^/v2/transcript/([0-9a-f]+)$")
+
+
+def _words(text, duration_ms):
+    tokens = text.split()
+    step = duration_ms // max(1, len(tokens))
+    return [
+        {"text": token, "start": i * step, "end": i * step + step - 50, "confidence": 0.9}
+        for i, token in enumerate(tokens)
+    ]
+
+
+class AssemblyAIMock:
+    """A threaded HTTP server imitating the AssemblyAI upload and transcript API"""
+
+    def __init__(self, host="127.0.0.1", port=0, latency=0.0, processing_time=0.0,
+                 error_rate=0.0, failure_rate=0.0):
+        self.latency = latency
+        self.processing_time = processing_time
+        self.error_rate = error_rate
+        self.failure_rate = failure_rate
+
+        self._lock = threading.Lock()
+        self._uploads = {}
+        self._transcripts = {}
+        self.requests = 0
+        self.uploads = 0
+        self.bytes_received = 0
+        self.transcripts = 0
+        self.errors = 0
+
+        mock = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                pass
+
+            def do_POST(self):
+                mock._handle(self, "POST")
+
+            def do_GET(self):
+                mock._handle(self, "GET")
+
+        class Server(ThreadingHTTPServer):
+            daemon_threads = True
+            allow_reuse_address = True
+            request_queue_size = 256
+
+        self.server = Server((host, port), Handler)
+        self.host, self.port = self.server.server_address
+        self.base_url = f"http://{self.host}:{self.port}"
+        self._thread = None
+
+    def _count(self, attribute, amount=1):
+        with self._lock:
+            setattr(self, attribute, getattr(self, attribute) + amount)
+
+    @staticmethod
+    def _reply(handler, status, payload):
+        body = json.dumps(payload).encode("utf-8")
+        handler.send_response(status)
+        handler.send_header("Content-Type", "application/json")
+        handler.send_header("Content-Length", str(len(body)))
+        handler.end_headers()
+        handler.wfile.write(body)
+
+    @staticmethod
+    def _read_body(handler):
+        if handler.headers.get("Transfer-Encoding", "").lower() == "chunked":
+            body = bytearray()
+            while True:
+                size = int(handler.rfile.readline().split(b";")[0], 16)
+                if size == 0:
+                    handler.rfile.readline()
+                    return bytes(body)
+                body += handler.rfile.read(size)
+                handler.rfile.readline()
+        return handler.rfile.read(int(handler.headers.get("Content-Length") or 0))
+
+    def _handle(self, handler, method):
+        self._count("requests")
+        body = self._read_body(handler) if method == "POST" else b""
+        if self.latency:
+            time.sleep(self.latency)
+        if self.error_rate and random.random() < self.error_rate:
+            self._count("errors")
+            self._reply(handler, 500, {"error": "Internal server error (simulated)"})
+            return
+
+        if method == "POST" and handler.path == "/v2/upload":
+            upload_id = uuid.uuid4().hex
+            with self._lock:
+                self._uploads[upload_id] = hashlib.blake2b(body, digest_size=8).digest()
+                self.uploads += 1
+                self.bytes_received += len(body)
+            self._reply(handler, 200, {"upload_url": f"{self.base_url}/uploads/{upload_id}"})
+        elif method == "POST" and handler.path == "/v2/transcript":
+            request = json.loads(body or b"{}")
+            upload_id = str(request.get("audio_url", "")).rsplit("/", 1)[-1]
+            transcript_id = uuid.uuid4().hex
+            with self._lock:
+                digest = self._uploads.pop(upload_id, None)
+                if digest is not None:
+                    self._transcripts[transcript_id] = (time.monotonic() + self.processing_time, digest)
+                    self.transcripts += 1
+            if digest is None:
+                self._reply(handler, 400, {"error": "Unknown audio_url"})
+                return
+            self._reply(handler, 200, {"id": transcript_id, "status": "queued"})
+        elif method == "GET" and _TRANSCRIPT_PATH.match(handler.path):
+            transcript_id = _TRANSCRIPT_PATH.match(handler.path).group(1)
+            with self._lock:
+                job = self._transcripts.get(transcript_id)
+            if job is None:
+                self._reply(handler, 404, {"error": "Transcript not found"})
+                return
+            ready_at, digest = job
+            if time.monotonic() < ready_at:
+                self._reply(handler, 200, {"id": transcript_id, "status": "processing"})
+                return
+            with self._lock:
+                self._transcripts.pop(transcript_id, None)
+            if self.failure_rate and random.random() < self.failure_rate:
+                self._reply(handler, 200, {"id": transcript_id, "status": "error",
+                                           "error": "Transcoding failed (simulated)"})
+                return
+            text = TRANSCRIPTS[digest[0] % len(TRANSCRIPTS)]
+            duration_ms = 400 * len(text.split())
+            self._reply(handler, 200, {
+                "id": transcript_id,
+                "status": "completed",
+                "text": text,
+                "words": _words(text, duration_ms),
+                "confidence": 0.9,
+                "audio_duration": duration_ms / 1000,
+            })
+        else:
+            self._reply(handler, 404, {"error": "Not found"})
+
+    def start(self):
+        self._thread = threading.Thread(target=self.server.serve_forever, name="assemblyai-mock", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "uploads": self.uploads,
+                "bytes_received": self.bytes_received,
+                "transcripts": self.transcripts,
+                "errors": self.errors,
+            }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Local AssemblyAI mock server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Delay before answering each request")
+    parser.add_argument("--processing-ms", type=float, default=1000.0, help="Time until a transcript completes")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with HTTP 500")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="Fraction of transcripts that end in error")
+    args = parser.parse_args(argv)
+
+    mock = AssemblyAIMock(
+        args.host, args.port, args.latency_ms / 1000, args.processing_ms / 1000, args.error_rate, args.failure_rate
+    ).start()
+    print(f"AssemblyAI mock listening on {mock.base_url} (Ctrl+C to stop)")
+    try:
+        while True:
+            time.sleep(10)
+            print(mock.stats())
+    except KeyboardInterrupt:
+        mock.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+"""
+Local stand-in for slow, unreliable school Wi-Fi in front of the API.
+
+A TCP proxy that forwards connections to an upstream server (e.g. the API
+under uvicorn) while throttling the client-to-server direction to a given
+bandwidth and cutting connections at random: after each ``block`` of bytes
+forwarded upstream, the connection is dropped with probability ``drop_rate``.
+Use it to check that chunked uploads resume where they left off.
+
+Usage:
+    uvicorn teachtalk.api:app --port 8000
+    python devtools/flaky_proxy.py --upstream 127.0.0.1:8000 --port 8001 --kbps 256 --drop-rate 0.05
+    python devtools/upload_client.py http://127.0.0.1:8001 recording.wav --item explanation
+"""
+
+import argparse
+import random
+import socket
+import socketserver
+import threading
+import time
+
+
+class FlakyProxy:
+    """A threaded TCP proxy with an upload bandwidth limit and random disconnects"""
+
+    def __init__(self, upstream, host="127.0.0.1", port=0, kbps=0.0, drop_rate=0.0, block=16 * 1024):
+        self.upstream = upstream
+        self.kbps = kbps
+        self.drop_rate = drop_rate
+        self.block = block
+
+        self._lock = threading.Lock()
+        self.connections = 0
+        self.dropped = 0
+        self.bytes_up = 0
+
+        proxy = self
+
+        class Handler(socketserver.BaseRequestHandler):
+            def handle(self):
+                proxy._serve(self.request)
+
+        class Server(socketserver.ThreadingTCPServer):
+            daemon_threads = True
+            allow_reuse_address = True
+
+        self.server = Server((host, port), Handler)
+        self.host, self.port = self.server.server_address
+        self.base_url = f"http://{self.host}:{self.port}"
+        self._thread = None
+
+    def _count(self, attribute, amount=1):
+        with self._lock:
+            setattr(self, attribute, getattr(self, attribute) + amount)
+
+    def _serve(self, client):
+        self._count("connections")
+        try:
+            server = socket.create_connection(self.upstream)
+        except OSError:
+            client.close()
+            return
+        closed = threading.Event()
+
+        def close_both():
+            closed.set()
+            for sock in (client, server):
+                try:
+                    sock.shutdown(socket.SHUT_RDWR)
+                except OSError:
+                    pass
+                sock.close()
+
+        def downstream():
+            try:
+                while not closed.is_set():
+                    data = server.recv(65536)
+                    if not data:
+                        break
+                    client.sendall(data)
+            except OSError:
+                pass
+            close_both()
+
+        threading.Thread(target=downstream, daemon=True).start()
+        try:
+            while not closed.is_set():
+                data = client.recv(self.block)
+                if not data:
+                    break
+                if self.kbps:
+                    time.sleep(len(data) / (self.kbps * 1024))
+                server.sendall(data)
+                self._count("bytes_up", len(data))
+                if self.drop_rate and random.random() < self.drop_rate:
+                    self._count("dropped")
+                    break
+        except OSError:
+            pass
+        close_both()
+
+    def start(self):
+        self._thread = threading.Thread(target=self.server.serve_forever, name="flaky-proxy", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def stats(self):
+        with self._lock:
+            return {"connections": self.connections, "dropped": self.dropped, "bytes_up": self.bytes_up}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Throttling, connection-dropping TCP proxy")
+    parser.add_argument("--upstream", default="127.0.0.1:8000", help="host:port to forward to")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--kbps", type=float, default=0.0, help="Upload bandwidth in KiB/s (0 = unlimited)")
+    parser.add_argument("--drop-rate", type=float, default=0.0, help="Chance of dropping after each 16 KiB sent")
+    args = parser.parse_args(argv)
+
+    host, _, port = args.upstream.rpartition(":")
+    proxy = FlakyProxy((host, int(port)), args.host, args.port, args.kbps, args.drop_rate).start()
+    print(f"Flaky proxy on {proxy.base_url} -> {args.upstream} (Ctrl+C to stop)")
+    try:
+        while True:
+            time.sleep(10)
+            print(proxy.stats())
+    except KeyboardInterrupt:
+        proxy.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,264 @@
+"""
+Local Redis stand-in for running several app replicas against one session store.
+
+Speaks enough RESP2 for redis-py (``protocol=2``) and ``redis-cli`` to use it
+as the shared session backend (PING, HELLO/CLIENT/SELECT handshakes, GET, SET
+with EX/PX, DEL, EXISTS, EXPIRE, TTL, STRLEN, KEYS, SCAN, DBSIZE, FLUSHDB, and
+WATCH/MULTI/EXEC transactions). Everything lives in one in-memory dict guarded
+by a lock; expired keys are dropped when they are next touched. Nothing is
+persisted, so it only stands in for Redis while developing and load-testing.
+
+Usage:
+    python devtools/redis_standin.py --port 6380
+    # in secrets.toml of every replica:
+    # SESSION_BACKEND = "redis"
+    # SESSION_REDIS_URL = "redis://127.0.0.1:6380/0"
+"""
+
+import argparse
+import fnmatch
+import socketserver
+import threading
+import time
+
+
+class RESPError(Exception):
+    pass
+
+
+class RedisStandIn:
+    """A threaded RESP server over an in-memory key/value dict"""
+
+    def __init__(self, host="127.0.0.1", port=0):
+        # Reentrant: EXEC runs the queued commands while holding it
+        self._lock = threading.RLock()
+        self._data = {}
+        self._expires = {}
+        # Bumped on every write to a key, for WATCH
+        self._versions = {}
+        self.connections = 0
+        self.commands = 0
+
+        standin = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                with standin._lock:
+                    standin.connections += 1
+                standin._serve(self.rfile, self.wfile)
+
+        class Server(socketserver.ThreadingTCPServer):
+            daemon_threads = True
+            allow_reuse_address = True
+
+        self.server = Server((host, port), Handler)
+        self.host, self.port = self.server.server_address
+        self._thread = None
+
+    @staticmethod
+    def _read_command(rfile):
+        line = rfile.readline()
+        if not line:
+            return None
+        if not line.startswith(b"*"):
+            # Inline command (e.g. typed into telnet)
+            return line.strip().split()
+        args = []
+        for _ in range(int(line[1:])):
+            length = int(rfile.readline()[1:])
+            args.append(rfile.read(length + 2)[:-2])
+        return args
+
+    @staticmethod
+    def _encode(value):
+        if value is None:
+            return b"$-1\r\n"
+        if isinstance(value, RESPError):
+            return b"-ERR " + str(value).encode("utf-8") + b"\r\n"
+        if isinstance(value, bool):
+            return b"+OK\r\n"
+        if isinstance(value, int):
+            return b":%d\r\n" % value
+        if isinstance(value, list):
+            return b"*%d\r\n" % len(value) + b"".join(RedisStandIn._encode(item) for item in value)
+        if isinstance(value, str):
+            return b"+" + value.encode("utf-8") + b"\r\n"
+        return b"$%d\r\n" % len(value) + value + b"\r\n"
+
+    def _run(self, command, args):
+        try:
+            return self._execute(command, args)
+        except RESPError as e:
+            return e
+        except (ValueError, IndexError):
+            return RESPError("syntax error")
+
+    def _serve(self, rfile, wfile):
+        # Per-connection transaction state: watched key -> version, queued commands
+        watched = {}
+        queued = None
+        while True:
+            args = self._read_command(rfile)
+            if args is None:
+                return
+            if not args:
+                continue
+            command = args[0].decode("ascii").upper()
+            if command == "WATCH":
+                with self._lock:
+                    for key in args[1:]:
+                        self._live(key)
+                        watched[key] = self._versions.get(key, 0)
+                reply = True
+            elif command == "UNWATCH":
+                watched.clear()
+                reply = True
+            elif command == "MULTI":
+                queued = []
+                reply = True
+            elif command == "DISCARD":
+                queued = None
+                watched.clear()
+                reply = True
+            elif command == "EXEC":
+                if queued is None:
+                    reply = RESPError("EXEC without MULTI")
+                else:
+                    with self._lock:
+                        for key in watched:
+                            self._live(key)
+                        if any(self._versions.get(key, 0) != version for key, version in watched.items()):
+                            # A watched key changed: abort (nil reply)
+                            reply = None
+                        else:
+                            reply = [self._run(queued_command, queued_args) for queued_command, queued_args in queued]
+                    queued = None
+                    watched.clear()
+            elif queued is not None:
+                queued.append((command, args[1:]))
+                reply = "QUEUED"
+            else:
+                reply = self._run(command, args[1:])
+            wfile.write(self._encode(reply))
+            wfile.flush()
+
+    def _touch(self, key):
+        self._versions[key] = self._versions.get(key, 0) + 1
+
+    def _live(self, key):
+        """Whether a key exists, dropping it first if it has expired (call with the lock held)"""
+        expires = self._expires.get(key)
+        if expires is not None and expires <= time.time():
+            self._data.pop(key, None)
+            self._expires.pop(key, None)
+            self._touch(key)
+        return key in self._data
+
+    def _execute(self, command, args):
+        with self._lock:
+            self.commands += 1
+
+            if command == "PING":
+                return args[0] if args else "PONG"
+            if command in ("CLIENT", "SELECT"):
+                return True
+            if command == "HELLO":
+                # Only RESP2 is spoken (connect redis-py with protocol=2)
+                if args and args[0] != b"2":
+                    raise RESPError("NOPROTO only RESP2 is supported")
+                return [b"server", b"redis", b"version", b"7.0.0", b"proto", 2]
+            if command == "GET":
+                return self._data[args[0]] if self._live(args[0]) else None
+            if command == "SET":
+                key, value = args[0], args[1]
+                options = [arg.upper() for arg in args[2:]]
+                if b"NX" in options and self._live(key):
+                    return None
+                self._data[key] = value
+                self._expires.pop(key, None)
+                self._touch(key)
+                if b"EX" in options:
+                    self._expires[key] = time.time() + int(args[2 + options.index(b"EX") + 1])
+                elif b"PX" in options:
+                    self._expires[key] = time.time() + int(args[2 + options.index(b"PX") + 1]) / 1000
+                return True
+            if command == "DEL":
+                removed = 0
+                for key in args:
+                    if self._live(key):
+                        del self._data[key]
+                        self._expires.pop(key, None)
+                        self._touch(key)
+                        removed += 1
+                return removed
+            if command == "EXISTS":
+                return sum(1 for key in args if self._live(key))
+            if command == "EXPIRE":
+                if not self._live(args[0]):
+                    return 0
+                self._expires[args[0]] = time.time() + int(args[1])
+                self._touch(args[0])
+                return 1
+            if command == "TTL":
+                if not self._live(args[0]):
+                    return -2
+                expires = self._expires.get(args[0])
+                return -1 if expires is None else int(expires - time.time())
+            if command == "STRLEN":
+                return len(self._data[args[0]]) if self._live(args[0]) else 0
+            if command in ("KEYS", "SCAN"):
+                # SCAN returns every match in one pass (cursor 0)
+                pattern = args[0] if command == "KEYS" else b"*"
+                if command == "SCAN" and b"MATCH" in [arg.upper() for arg in args]:
+                    pattern = args[[arg.upper() for arg in args].index(b"MATCH") + 1]
+                pattern = pattern.decode("utf-8")
+                keys = [key for key in list(self._data) if self._live(key)
+                        and fnmatch.fnmatchcase(key.decode("utf-8", "replace"), pattern)]
+                return keys if command == "KEYS" else [b"0", keys]
+            if command == "DBSIZE":
+                return sum(1 for key in list(self._data) if self._live(key))
+            if command == "FLUSHDB":
+                for key in self._data:
+                    self._touch(key)
+                self._data.clear()
+                self._expires.clear()
+                return True
+            raise RESPError(f"unknown command '{command}'")
+
+    def start(self):
+        self._thread = threading.Thread(target=self.server.serve_forever, name="redis-standin", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "connections": self.connections,
+                "commands": self.commands,
+                "keys": len(self._data),
+                "bytes": sum(len(value) for value in self._data.values()),
+            }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Local Redis stand-in server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=6380)
+    args = parser.parse_args(argv)
+
+    standin = RedisStandIn(args.host, args.port).start()
+    print(f"Redis stand-in listening on {standin.host}:{standin.port} (Ctrl+C to stop)")
+    try:
+        while True:
+            time.sleep(10)
+            print(standin.stats())
+    except KeyboardInterrupt:
+        standin.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+"""
+Local SMTP stand-in for load-testing the email path.
+
+Speaks enough SMTP for smtplib (EHLO/HELO, AUTH PLAIN/LOGIN, MAIL, RCPT, DATA,
+RSET, NOOP, QUIT), accepts any credentials and discards messages after counting
+them. It does not offer STARTTLS, so point the app at it with
+``SMTP_USE_TLS = false``. Optional per-message latency and failure rate make it
+behave more like a real relay.
+
+Usage:
+    python devtools/smtp_standin.py --port 2525 --latency-ms 50
+"""
+
+import argparse
+import random
+import socketserver
+import threading
+import time
+
+
+class SMTPStandIn:
+    """A threaded SMTP stand-in server that records connection and message counts"""
+
+    def __init__(self, host="127.0.0.1", port=0, latency=0.0, failure_rate=0.0):
+        self.latency = latency
+        self.failure_rate = failure_rate
+
+        self._lock = threading.Lock()
+        self.connections = 0
+        self.messages = 0
+        self.rejected = 0
+        self.bytes_received = 0
+
+        standin = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                standin._count("connections")
+                standin._serve(self.rfile, self.wfile)
+
+        class Server(socketserver.ThreadingTCPServer):
+            daemon_threads = True
+            allow_reuse_address = True
+
+        self.server = Server((host, port), Handler)
+        self.host, self.port = self.server.server_address
+        self._thread = None
+
+    def _count(self, attribute, amount=1):
+        with self._lock:
+            setattr(self, attribute, getattr(self, attribute) + amount)
+
+    def _serve(self, rfile, wfile):
+        def reply(line):
+            wfile.write(line.encode("ascii") + b"\r\n")
+            wfile.flush()
+
+        reply("220 localhost SMTP stand-in ready")
+        while True:
+            line = rfile.readline()
+            if not line:
+                return
+            command = line.decode("utf-8", "replace").strip()
+            verb = command.split(" ", 1)[0].upper()
+
+            if verb == "EHLO":
+                reply("250-localhost")
+                reply("250-AUTH PLAIN LOGIN")
+                reply("250 8BITMIME")
+            elif verb == "HELO":
+                reply("250 localhost")
+            elif verb == "AUTH":
+                parts = command.split()
+                if len(parts) >= 2 and parts[1].upper() == "LOGIN":
+                    # Username and password prompts (base64 "Username:" / "Password:")
+                    if len(parts) == 2:
+                        reply("334 VXNlcm5hbWU6")
+                        rfile.readline()
+                    reply("334 UGFzc3dvcmQ6")
+                    rfile.readline()
+                elif len(parts) == 2:
+                    reply("334 ")
+                    rfile.readline()
+                reply("235 2.7.0 Authentication successful")
+            elif verb in ("MAIL", "RCPT", "RSET", "NOOP"):
+                reply("250 OK")
+            elif verb == "DATA":
+                reply("354 End data with <CR><LF>.<CR><LF>")
+                size = 0
+                while True:
+                    data_line = rfile.readline()
+                    if not data_line or data_line == b".\r\n":
+                        break
+                    size += len(data_line)
+                if self.latency:
+                    time.sleep(self.latency)
+                if self.failure_rate and random.random() < self.failure_rate:
+                    self._count("rejected")
+                    reply("451 4.3.0 Temporary failure (simulated)")
+                else:
+                    self._count("messages")
+                    self._count("bytes_received", size)
+                    reply("250 OK: queued")
+            elif verb == "QUIT":
+                reply("221 Bye")
+                return
+            else:
+                reply("502 Command not implemented")
+
+    def start(self):
+        self._thread = threading.Thread(target=self.server.serve_forever, name="smtp-standin", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "connections": self.connections,
+                "messages": self.messages,
+                "rejected": self.rejected,
+                "bytes_received": self.bytes_received,
+            }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Local SMTP stand-in server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=2525)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Delay before accepting each message")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="Fraction of messages to reject with 451")
+    args = parser.parse_args(argv)
+
+    standin = SMTPStandIn(args.host, args.port, args.latency_ms / 1000, args.failure_rate).start()
+    print(f"SMTP stand-in listening on {standin.host}:{standin.port} (Ctrl+C to stop)")
+    try:
+        while True:
+            time.sleep(10)
+            print(standin.stats())
+    except KeyboardInterrupt:
+        standin.stop()
+
+
+if __name__ == "__main__":
+    main()
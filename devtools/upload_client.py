@@ -0,0 +1,93 @@
+"""
+Reference client for the API's resumable chunked uploads.
+
+Starts an upload for one item, sends the recording chunk by chunk from the
+file (one chunk in memory at a time) and, whenever a request fails, asks the
+API for the acknowledged offset and carries on from there. Then polls the
+item until it is scored.
+
+Usage:
+    python devtools/upload_client.py http://127.0.0.1:8001 recording.wav --item explanation
+    python devtools/upload_client.py http://127.0.0.1:8001 recording.wav --token <session token>
+"""
+
+import argparse
+import os
+import time
+
+import requests
+
+
+def upload_resumable(http, base_url, token, item_key, path, retries=20, backoff=0.5, timeout=30):
+    """Upload a file in resumable chunks; returns ``(final response JSON, attempts that failed)``"""
+    size = os.path.getsize(path)
+    uploads_url = f"{base_url}/sessions/{token}/items/{item_key}/uploads"
+    response = http.post(uploads_url, json={"size": size}, timeout=timeout)
+    response.raise_for_status()
+    upload = response.json()
+    upload_url = f"{uploads_url}/{upload['upload_id']}"
+    chunk_size = upload["chunk_size"]
+
+    offset = 0
+    failures = 0
+    with open(path, "rb") as f:
+        while True:
+            try:
+                f.seek(offset)
+                chunk = f.read(chunk_size)
+                response = http.patch(upload_url, data=chunk, headers={"Upload-Offset": str(offset)},
+                                      timeout=timeout)
+                if response.status_code == 409:
+                    # The API has more (or less) than we thought: resync below
+                    raise requests.RequestException(response.text)
+                response.raise_for_status()
+                result = response.json()
+                offset = result["offset"]
+                if offset == size:
+                    return result, failures
+            except requests.RequestException:
+                failures += 1
+                if failures > retries:
+                    raise
+                time.sleep(backoff)
+                try:
+                    response = http.get(upload_url, timeout=timeout)
+                    response.raise_for_status()
+                    offset = response.json()["offset"]
+                except requests.RequestException:
+                    pass
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Upload a recording to the API in resumable chunks")
+    parser.add_argument("base_url")
+    parser.add_argument("path")
+    parser.add_argument("--token", help="Existing session token (default: start a new session)")
+    parser.add_argument("--item", default="explanation", help="Item key, e.g. sentence_0 or explanation")
+    parser.add_argument("--retries", type=int, default=20)
+    args = parser.parse_args(argv)
+
+    http = requests.Session()
+    token = args.token
+    if not token:
+        response = http.post(f"{args.base_url}/sessions", timeout=30)
+        response.raise_for_status()
+        token = response.json()["token"]
+        print(f"session {token}")
+
+    start = time.perf_counter()
+    result, failures = upload_resumable(http, args.base_url, token, args.item, args.path, args.retries)
+    print(f"uploaded {os.path.getsize(args.path)} bytes in {time.perf_counter() - start:.1f}s "
+          f"({failures} failed requests resumed): {result}")
+
+    item = result
+    while item.get("status") == "pending":
+        time.sleep(0.5)
+        response = http.get(f"{args.base_url}/sessions/{token}/items/{args.item}", timeout=30)
+        response.raise_for_status()
+        item = response.json()
+    print(item)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,203 @@
+import streamlit as st
+from datetime import datetime
+
+from teachtalk import audio_archive, rerun_profiler, resources, results_store
+
+# Page configuration
+st.set_page_config(
+    page_title="Admin Dashboard - Speaking Proficiency Test",
+    page_icon="📊",
+    layout="wide"
+)
+
+st.title("📊 Institution Dashboard")
+st.write("Speaking proficiency statistics for head teachers and administrators.")
+
+# Access control
+config = resources.get_config()
+admin_password = config.admin_password
+
+if not admin_password:
+    st.warning("⚠️ The admin dashboard is disabled. Set ADMIN_PASSWORD in Streamlit secrets to enable it.")
+    st.stop()
+
+if not st.session_state.get("admin_authenticated"):
+    password = st.text_input("Admin Password", type="password")
+    if password:
+        if password == admin_password:
+            st.session_state.admin_authenticated = True
+            st.rerun()
+        else:
+            st.error("⚠️ Incorrect password.")
+    st.stop()
+
+results_db_path = config.results_db_path
+
+# Institution selection
+institutions = results_store.list_institutions(db_path=results_db_path)
+if not institutions:
+    st.info("No submissions yet.")
+    st.stop()
+
+all_label = "All institutions"
+selected = st.selectbox("Institution", [all_label] + institutions)
+institution_key = results_store.ALL_INSTITUTIONS if selected == all_label else selected
+
+# Rollup lookups are primary-key reads, so this is constant time regardless of history
+stats = results_store.fetch_rollups(institution_key, db_path=results_db_path)
+components = stats["components"]
+
+st.markdown("---")
+
+# Headline metrics
+percentage_stats = components.get("Percentage", {"n": 0, "mean": 0.0, "std": 0.0})
+
+col1, col2, col3 = st.columns(3)
+with col1:
+    st.metric("📝 Submissions", f"{stats['submissions']}")
+with col2:
+    st.metric("📈 Average Percentage", f"{percentage_stats['mean']:.1f}%")
+with col3:
+    st.metric("📏 Std. Deviation", f"{percentage_stats['std']:.1f}")
+
+# Component breakdown
+st.markdown("### 📊 Component Averages")
+
+component_rows = [
+    {
+        "Component": component,
+        "Assessed": components[component]["n"],
+        "Average (out of 5)": round(components[component]["mean"], 2),
+        "Std. Deviation": round(components[component]["std"], 2),
+    }
+    for component in results_store.ROLLUP_COMPONENTS
+    if component != "Percentage" and component in components
+]
+
+if component_rows:
+    st.dataframe(component_rows, use_container_width=True, hide_index=True)
+else:
+    st.info("No component scores recorded yet.")
+
+# Proficiency level distribution
+st.markdown("### 🏆 Proficiency Levels")
+
+level_order = ["Expert", "Advanced", "Intermediate", "Developing", "Emerging"]
+levels = stats["levels"]
+level_rows = [
+    {
+        "Level": level,
+        "Teachers": levels.get(level, 0),
+        "Share": f"{levels.get(level, 0) / stats['submissions'] * 100:.1f}%" if stats["submissions"] else "0%",
+    }
+    for level in level_order + sorted(set(levels) - set(level_order))
+]
+
+col1, col2 = st.columns([1, 2])
+with col1:
+    st.dataframe(level_rows, use_container_width=True, hide_index=True)
+with col2:
+    st.bar_chart({row["Level"]: row["Teachers"] for row in level_rows})
+
+# Process-wide resources built by this server process
+timings = resources.init_timings()
+if timings:
+    with st.expander("⚙️ Server resources"):
+        st.dataframe(
+            [{"Resource": name, "Init time (ms)": round(seconds * 1000, 1)} for name, seconds in timings.items()],
+            use_container_width=True, hide_index=True
+        )
+
+# In-progress test sessions held by this server process
+session_stats = resources.get_session_store().stats()
+with st.expander("🧠 Session memory"):
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Sessions in memory", session_stats["sessions"])
+    col2.metric(
+        "Memory used",
+        f"{session_stats['bytes'] / 1024 / 1024:.2f} MB",
+        help=f"Budget: {session_stats['budget_bytes'] / 1024 / 1024:.0f} MB" if session_stats["budget_bytes"]
+        else "Sessions are stored in Redis"
+    )
+    col3.metric("Spilled to disk", session_stats["evictions"])
+    col4.metric("Restored", session_stats["restores"])
+    if session_stats["largest"]:
+        st.dataframe(
+            [
+                {
+                    "Session": row["token"],
+                    "Size (KB)": round(row["bytes"] / 1024, 1),
+                    "Last active": datetime.fromtimestamp(row["last_seen"]).strftime("%H:%M:%S")
+                    if row["last_seen"] else "",
+                }
+                for row in session_stats["largest"]
+            ],
+            use_container_width=True, hide_index=True
+        )
+
+# Transcripts shared across sessions by audio hash
+index_stats = resources.get_transcript_index().stats()
+with st.expander("🔁 Transcript reuse"):
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Cached transcripts", index_stats["entries"])
+    col2.metric("In progress", index_stats["in_flight"])
+    col3.metric("Reused", index_stats["hits"])
+    col4.metric("Transcribed", index_stats["misses"])
+
+# Profile this admin's own reruns of the test page (see teachtalk.rerun_profiler)
+with st.expander("🔬 Rerun profiling"):
+    if rerun_profiler.PROFILE_DIR:
+        st.info(f"Every session is being profiled into {rerun_profiler.PROFILE_DIR} (TEACHTALK_PROFILE_DIR).")
+    else:
+        # A plain session_state key (not the widget's) so the flag survives switching pages
+        st.session_state[rerun_profiler.SESSION_FLAG] = st.toggle(
+            "Profile my reruns", value=bool(st.session_state.get(rerun_profiler.SESSION_FLAG))
+        )
+        st.caption(
+            f"Profiles are written to {rerun_profiler.DEFAULT_PROFILE_DIR}. "
+            "Rank the hottest functions with: python -m teachtalk.rerun_profiler"
+        )
+
+# Audit a submission by listening to its archived recordings (see teachtalk.audio_archive)
+with st.expander("🗄️ Recording archive"):
+    archive = resources.get_audio_archive()
+    audit_email = st.text_input("Teacher email", key="audit_email").strip()
+    if audit_email:
+        submissions = results_store.fetch_results(email=audit_email, db_path=results_db_path)
+        if not submissions:
+            st.info("No submissions for this email.")
+        else:
+            submission = st.selectbox(
+                "Submission", list(reversed(submissions)),
+                format_func=lambda row: f"{row['date']} · {row['institution']} · {row['percentage']:.1f}%"
+            )
+            for row in results_store.fetch_recordings(result_id=submission["id"], db_path=results_db_path):
+                scores = ", ".join(
+                    f"{component.capitalize()} {row[component]}"
+                    for component in ("accuracy", "fluency", "intonation", "vocabulary", "grammar")
+                    if row[component] is not None
+                )
+                st.markdown(f"**{row['item_key']}** · {scores}")
+                st.caption(row["transcript"])
+                audio = archive.read(row["audio_hash"]) if row["audio_hash"] else None
+                if audio is None:
+                    st.caption("Recording not archived (or past its retention period).")
+                else:
+                    st.audio(audio)
+
+    st.caption(
+        f"Archive: {archive.root}. Saved results' audio is kept {config.audio_retention_days:g} days, "
+        f"unused audio {config.audio_orphan_days:g} days (0 = forever)."
+    )
+    col1, col2 = st.columns(2)
+    if col1.button("Show archive size"):
+        archive_stats = archive.stats()
+        st.write(f"{archive_stats['files']} recordings, {archive_stats['stored_bytes'] / 1024 / 1024:.1f} MB on disk")
+    if col2.button("Apply retention now"):
+        pruned = audio_archive.prune(
+            archive, results_db_path, config.audio_retention_days, config.audio_orphan_days
+        )
+        st.success(
+            f"Removed {pruned['removed']} recordings ({pruned['freed_bytes'] / 1024 / 1024:.1f} MB), "
+            f"kept {pruned['kept']}."
+        )
@@ -0,0 +1,16 @@
+"""
+Classroom Speaking Proficiency Test.
+
+``app.py`` at the repository root is the Streamlit entry point; everything it
+needs lives in this package so it is imported once per process instead of
+being re-executed on every rerun:
+
+- ``scoring``: rubric scorers, test items and submission summaries
+- ``transcription``: AssemblyAI speech-to-text
+- ``reporting``: report rendering and queued email delivery
+- ``results_store``: SQLite results storage (plus ``results_export`` and
+  ``parquet_archive`` for bulk export)
+
+Modules with heavy dependencies (``email_outbox``, ``head_teacher_digest``,
+``pdf_reports``, ``parquet_archive``) are only imported where they are used.
+"""
@@ -0,0 +1,407 @@
+"""
+Headless HTTP API for the assessment flow (ASGI, FastAPI).
+
+Lets mobile clients and load tests take the test without a browser, using the
+same config (Streamlit secrets), session store, transcript index, scoring and
+email outbox as the Streamlit app. With ``SESSION_BACKEND = "redis"`` the app
+and any number of API replicas share sessions.
+
+    POST  /sessions                               start a test -> {"token"}
+    GET   /sessions/{token}                       progress and scores so far
+    PUT   /sessions/{token}/items/{item_key}      upload a recording (raw audio body) -> 202
+    GET   /sessions/{token}/items/{item_key}      poll: pending, scored, no_speech or error
+    POST  /sessions/{token}/submit                {"name", "institution", "email", "head_teacher_email"}
+    GET   /metrics                                per-stage timings (Prometheus, see teachtalk.telemetry)
+
+Resumable chunked uploads, under /sessions/{token}/items/{item_key}:
+
+    POST  /uploads                                {"size"} -> {"upload_id", "chunk_size"}
+    PATCH /uploads/{upload_id}                    one chunk, Upload-Offset header -> {"offset"}
+    GET   /uploads/{upload_id}                    {"offset", "size"} to resume from
+
+Item keys are ``sentence_<i>`` (Part 1), ``prompt_<i>`` (Part 2) and
+``explanation`` (Part 3). Transcription and scoring run in worker threads after
+the upload returns; poll the item until it leaves ``pending``.
+
+On unreliable connections, upload long recordings in chunks instead of one
+PUT (see ``teachtalk.uploads``): start an upload, then PATCH chunks of at most
+``chunk_size`` bytes in order. If a chunk fails, GET the upload for the
+acknowledged offset and continue from there. The PATCH that completes the
+upload answers like the PUT (``audio_hash`` and ``status``) as well.
+
+Run one worker process per replica (no ``uvicorn --workers``): the status of
+pending uploads is kept in the process that received them, so polls must reach
+it. Scale out with replicas behind sticky routing on the session token.
+
+Requires the packages in requirements-api.txt.
+
+Usage:
+    uvicorn teachtalk.api:app --port 8000
+    python -m teachtalk.api --port 8000
+"""
+
+import argparse
+import asyncio
+import io
+import threading
+import time
+
+from fastapi import BackgroundTasks, FastAPI, HTTPException, Request
+from fastapi.responses import PlainTextResponse
+from pydantic import BaseModel
+from starlette.requests import ClientDisconnect
+
+from . import assessment, reporting, resources, scoring, telemetry
+from .session_state import TestSession, is_valid_token
+from .transcription import get_audio_hash
+
+MAX_UPLOAD_BYTES = 25 * 1024 * 1024
+
+app = FastAPI(title="Speaking Proficiency Test API")
+
+# (token, item_key) -> {"audio_hash", "status", "error", "updated"} for uploads handled by this
+# process; dropped on submit or once older than a session lives (SESSION_TTL_HOURS)
+_jobs = {}
+_jobs_lock = threading.Lock()
+
+
+class UploadStart(BaseModel):
+    size: int
+
+
+class Submission(BaseModel):
+    name: str
+    institution: str
+    email: str
+    head_teacher_email: str = ""
+
+
+def _set_job(token, item_key, audio_hash, status, error=None):
+    now = time.time()
+    expired_before = now - resources.get_config().session_ttl_hours * 3600
+    with _jobs_lock:
+        for key in [key for key, job in _jobs.items() if job["updated"] < expired_before]:
+            del _jobs[key]
+        job = _jobs.get((token, item_key))
+        # A newer upload for the same item wins
+        if job is not None and job["audio_hash"] != audio_hash and status != "pending":
+            return
+        if status == "scored":
+            # Scored items are served from the session store
+            _jobs.pop((token, item_key), None)
+        else:
+            _jobs[(token, item_key)] = {"audio_hash": audio_hash, "status": status, "error": error, "updated": now}
+
+
+def _forget_jobs(token):
+    with _jobs_lock:
+        for key in [key for key in _jobs if key[0] == token]:
+            del _jobs[key]
+
+
+def _item_json(rec):
+    data = {"status": "scored", "audio_hash": rec.audio_hash, "transcript": rec.transcript}
+    for component in ("accuracy", "vocabulary", "grammar", "fluency", "intonation"):
+        if getattr(rec, component) is not None:
+            data[component] = getattr(rec, component)
+    features = rec.feature_dict()
+    if features and features.get("silence_trimmed") is not None:
+        data["silence_trimmed"] = features["silence_trimmed"]
+        data["long_pauses"] = features["long_pauses"]
+    return data
+
+
+def _session_json(token, test_session):
+    items = {}
+    for i in range(len(scoring.PART1_SENTENCES)):
+        items[f"sentence_{i}"] = test_session.part1.get(f"sentence_{i}")
+    for i in range(len(scoring.PART2_PROMPTS)):
+        items[f"prompt_{i}"] = test_session.part2.get(f"prompt_{i}")
+    items["explanation"] = test_session.part3
+    return {
+        "token": token,
+        "submitted": test_session.submitted,
+        "completed": sum(1 for rec in items.values() if rec is not None),
+        "total": len(items),
+        "items": {key: _item_json(rec) if rec else None for key, rec in items.items()},
+    }
+
+
+def _check_token(token):
+    if not is_valid_token(token):
+        raise HTTPException(status_code=404, detail="Unknown session")
+
+
+def _item(item_key):
+    part_prompt = assessment.item_part_and_prompt(item_key)
+    if part_prompt is None:
+        raise HTTPException(status_code=404, detail=f"Unknown item '{item_key}'")
+    return part_prompt
+
+
+def _score_and_store(token, item_key, part, prompt, audio, audio_hash):
+    """Transcribe, score and store one upload; returns the job's ``(status, error)``, status None if superseded"""
+    config = resources.get_config()
+    session_store = resources.get_session_store()
+
+    result, error = assessment.transcribe(audio, audio_hash, config)
+    if error or not result:
+        return "error", error or "Empty transcription result"
+
+    rec = assessment.score_item(part, prompt, audio, audio_hash, result, resources.get_audio_archive())
+    if rec is None:
+        return "no_speech", None
+
+    def store(test_session):
+        if test_session.submitted:
+            return "error", "Session already submitted"
+        with _jobs_lock:
+            job = _jobs.get((token, item_key))
+        # A newer upload of this item is pending or already stored: keep its record
+        if job is None or job["audio_hash"] != audio_hash:
+            return None, None
+        test_session.set_item(part, item_key, rec)
+        return "scored", None
+
+    # Other items of the same test may be saved concurrently (other workers or replicas)
+    return session_store.update(token, store)
+
+
+@telemetry.traced("api.score_item")
+def _score_upload(token, item_key, part, prompt, audio, audio_hash):
+    """Transcribe and score one upload into its session (runs in a worker thread)"""
+    try:
+        status, error = _score_and_store(token, item_key, part, prompt, audio, audio_hash)
+    except Exception as e:
+        # e.g. the audio archive's disk is full: fail the item instead of leaving it pending
+        _set_job(token, item_key, audio_hash, "error", f"Error: {str(e)}")
+        raise
+    if status is not None:
+        _set_job(token, item_key, audio_hash, status, error)
+
+
+@app.post("/sessions", status_code=201)
+async def create_session():
+    return {"token": resources.get_session_store().new_token()}
+
+
+@app.get("/sessions/{token}")
+async def get_session(token: str):
+    _check_token(token)
+    test_session = await asyncio.to_thread(resources.get_session_store().load, token)
+    return _session_json(token, test_session)
+
+
+async def _read_body(request, limit, detail):
+    body = bytearray()
+    try:
+        async for chunk in request.stream():
+            body += chunk
+            if len(body) > limit:
+                raise HTTPException(status_code=413, detail=detail)
+    except ClientDisconnect:
+        # Nobody is left to read the response; just drop the partial body
+        raise HTTPException(status_code=400, detail="Client disconnected") from None
+    return body
+
+
+async def _accept_recording(token, item_key, part, prompt, body, background_tasks):
+    """Queue a complete recording for scoring (unless it is already the item's scored one)"""
+    audio = io.BytesIO(body)
+    # Both read the whole recording (up to MAX_UPLOAD_BYTES): keep them off the event loop
+    error = await asyncio.to_thread(assessment.check_recording, audio)
+    if error:
+        raise HTTPException(status_code=400, detail=error)
+    audio_hash = await asyncio.to_thread(get_audio_hash, audio)
+
+    test_session = await asyncio.to_thread(resources.get_session_store().load, token)
+    if test_session.submitted:
+        raise HTTPException(status_code=409, detail="Session already submitted")
+    rec = test_session.get_item(part, item_key)
+    if rec is not None and rec.audio_hash == audio_hash:
+        return {"audio_hash": audio_hash, "status": "scored"}
+
+    _set_job(token, item_key, audio_hash, "pending")
+    # Sync background tasks run in the threadpool, off the event loop
+    background_tasks.add_task(_score_upload, token, item_key, part, prompt, audio, audio_hash)
+    return {"audio_hash": audio_hash, "status": "pending"}
+
+
+@app.put("/sessions/{token}/items/{item_key}", status_code=202)
+async def upload_item(token: str, item_key: str, request: Request, background_tasks: BackgroundTasks):
+    _check_token(token)
+    part, prompt = _item(item_key)
+
+    body = await _read_body(request, MAX_UPLOAD_BYTES, "Recording too large")
+    if not body:
+        raise HTTPException(status_code=400, detail="Empty recording")
+    return await _accept_recording(token, item_key, part, prompt, body, background_tasks)
+
+
+def _upload_status(token, item_key, upload_id):
+    try:
+        owner, offset, size = resources.get_upload_store().status(upload_id)
+    except KeyError:
+        raise HTTPException(status_code=404, detail="Unknown upload") from None
+    if owner != [token, item_key]:
+        raise HTTPException(status_code=404, detail="Unknown upload")
+    return offset, size
+
+
+@app.post("/sessions/{token}/items/{item_key}/uploads", status_code=201)
+async def start_upload(token: str, item_key: str, upload: UploadStart):
+    _check_token(token)
+    _item(item_key)
+    if upload.size > MAX_UPLOAD_BYTES:
+        raise HTTPException(status_code=413, detail="Recording too large")
+    if upload.size <= 0:
+        raise HTTPException(status_code=400, detail="Empty recording")
+
+    upload_store = resources.get_upload_store()
+    upload_id = await asyncio.to_thread(upload_store.create, [token, item_key], upload.size)
+    return {"upload_id": upload_id, "offset": 0, "size": upload.size, "chunk_size": upload_store.chunk_size}
+
+
+@app.get("/sessions/{token}/items/{item_key}/uploads/{upload_id}")
+async def get_upload(token: str, item_key: str, upload_id: str):
+    _check_token(token)
+    _item(item_key)
+    offset, size = await asyncio.to_thread(_upload_status, token, item_key, upload_id)
+    return {"upload_id": upload_id, "offset": offset, "size": size}
+
+
+@app.patch("/sessions/{token}/items/{item_key}/uploads/{upload_id}")
+async def append_upload(token: str, item_key: str, upload_id: str, request: Request,
+                        background_tasks: BackgroundTasks):
+    _check_token(token)
+    part, prompt = _item(item_key)
+    try:
+        offset = int(request.headers["Upload-Offset"])
+    except (KeyError, ValueError):
+        raise HTTPException(status_code=400, detail="Upload-Offset header required") from None
+    await asyncio.to_thread(_upload_status, token, item_key, upload_id)
+
+    upload_store = resources.get_upload_store()
+    # A chunk cut off by a dropped connection is never appended: the client
+    # resumes from the last acknowledged offset
+    chunk = await _read_body(request, upload_store.chunk_size, f"Chunks are at most {upload_store.chunk_size} bytes")
+    try:
+        offset, size = await asyncio.to_thread(upload_store.append, upload_id, offset, bytes(chunk))
+    except KeyError:
+        raise HTTPException(status_code=404, detail="Unknown upload") from None
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e)) from None
+
+    response = {"upload_id": upload_id, "offset": offset, "size": size}
+    if offset == size:
+        try:
+            body = await asyncio.to_thread(upload_store.take, upload_id)
+        except (KeyError, ValueError):
+            raise HTTPException(status_code=409, detail="Upload already completed") from None
+        response.update(await _accept_recording(token, item_key, part, prompt, body, background_tasks))
+    return response
+
+
+@app.get("/sessions/{token}/items/{item_key}")
+async def get_item(token: str, item_key: str):
+    _check_token(token)
+    part, _ = _item(item_key)
+
+    with _jobs_lock:
+        job = _jobs.get((token, item_key))
+    if job is not None:
+        return {"audio_hash": job["audio_hash"], "status": job["status"], "error": job["error"]}
+
+    # Scored items are read from the session store, so any replica can answer
+    test_session = await asyncio.to_thread(resources.get_session_store().load, token)
+    rec = test_session.get_item(part, item_key)
+    if rec is None:
+        raise HTTPException(status_code=404, detail="No recording for this item")
+    return _item_json(rec)
+
+
+@telemetry.traced("api.submit")
+def _submit(token, submission):
+    config = resources.get_config()
+    session_store = resources.get_session_store()
+
+    if not session_store.load(token).has_recordings():
+        raise HTTPException(status_code=400, detail="Complete at least one section before submitting")
+    # Claim first, so concurrent submits of one test save and email only once
+    if not session_store.update(token, TestSession.claim_submission):
+        raise HTTPException(status_code=409, detail="Session already submitted")
+
+    # No item is stored into a submitted session, so this is what gets saved
+    test_session = session_store.load(token)
+    summary = scoring.summarize_submission(test_session.part1, test_session.part2, test_session.part3)
+    try:
+        result_id = assessment.save_results(
+            test_session, submission.name, submission.institution, submission.email, summary,
+            db_path=config.results_db_path, submission_key=f"session:{token}"
+        )
+    except Exception:
+        session_store.update(token, TestSession.release_submission)
+        raise
+    _forget_jobs(token)
+
+    emails = {}
+    teacher_html = reporting.generate_html_report(submission.name, submission.institution, submission.email, summary)
+    emails["teacher"] = reporting.send_email_report(submission.email, submission.name, teacher_html)[1]
+
+    head_teacher_email = submission.head_teacher_email.strip()
+    if head_teacher_email and reporting.validate_email(head_teacher_email):
+        if config.digest_mode:
+            reporting.queue_head_teacher_digest(
+                head_teacher_email, submission.name, submission.email, submission.institution, summary
+            )
+            emails["head_teacher"] = "Added to the head teacher's next digest"
+        else:
+            head_teacher_html = reporting.generate_head_teacher_report(
+                submission.name, submission.institution, submission.email, summary
+            )
+            emails["head_teacher"] = reporting.send_head_teacher_email(
+                head_teacher_email, submission.name, head_teacher_html
+            )[1]
+
+    return {
+        "result_id": result_id,
+        "total_score": summary["total_score"],
+        "max_score": summary["max_score"],
+        "percentage": summary["percentage"],
+        "proficiency_level": summary["proficiency_level"],
+        "component_scores": summary["avg_scores"],
+        "strengths": summary["strengths"],
+        "improvements": summary["improvements"],
+        "emails": emails,
+    }
+
+
+@app.post("/sessions/{token}/submit")
+async def submit_session(token: str, submission: Submission):
+    _check_token(token)
+    if not submission.name or not submission.institution:
+        raise HTTPException(status_code=422, detail="Name and institution are required")
+    if not reporting.validate_email(submission.email):
+        raise HTTPException(status_code=422, detail="A valid email address is required")
+    return await asyncio.to_thread(_submit, token, submission)
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    return telemetry.render_prometheus()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the assessment HTTP API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    args = parser.parse_args(argv)
+
+    import uvicorn
+
+    # One worker process per replica: upload job state (_jobs) lives in this process
+    uvicorn.run("teachtalk.api:app", host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+"""
+The assessment flow without any UI: transcribe a recording, score it into a
+session, and save a submission.
+
+Shared by the Streamlit app (``app.py``) and the headless HTTP API
+(``teachtalk.api``), so both score and store results identically.
+"""
+
+from datetime import datetime
+
+from . import audio_info, resources, results_store, scoring, vad
+from .session_state import ItemRecord
+from .telemetry import span
+from .transcription import transcribe_audio_assemblyai
+
+NO_SPEECH = "No speech detected"
+
+# Shorter recordings are rejected before upload
+MIN_RECORDING_SECONDS = 0.5
+
+
+def item_part_and_prompt(item_key):
+    """``(part, prompt)`` for an item key (sentence_<i>, prompt_<i>, explanation), or None"""
+    if item_key == "explanation":
+        return 3, scoring.PART3_PROMPT
+    kind, _, index = item_key.partition("_")
+    items = {"sentence": (1, scoring.PART1_SENTENCES), "prompt": (2, scoring.PART2_PROMPTS)}.get(kind)
+    if items is None or not index.isdigit() or int(index) >= len(items[1]):
+        return None
+    return items[0], items[1][int(index)]
+
+
+def check_recording(audio):
+    """
+    An error message for a recording too short to contain an answer, else None.
+
+    Reads only the header (``teachtalk.audio_info``); recordings in formats it
+    cannot read are let through to the transcription service.
+    """
+    info = audio_info.probe(audio)
+    if info is not None and info.duration < MIN_RECORDING_SECONDS:
+        return f"Recording is empty or too short ({info.duration:.1f}s)"
+    return None
+
+
+def trim_audio(audio, config):
+    """
+    ``(upload, stats)``: the recording with silence trimmed (see ``teachtalk.vad``)
+    and the trim stats, or the recording itself and None when trimming is off
+    or the audio is not PCM WAV.
+    """
+    if not config.vad_trim:
+        return audio, None
+    with span("vad.trim") as s:
+        trimmed, stats = vad.trim_silence(audio.getbuffer(), max_pause=config.vad_max_pause_seconds or None)
+        if stats:
+            s.set("removed_seconds", round(stats["removed_seconds"], 3))
+    return (trimmed or audio), stats
+
+
+def _transcribe_trimmed(audio, config):
+    upload, stats = trim_audio(audio, config)
+    result, error = transcribe_audio_assemblyai(
+        upload, config.assemblyai_api_key, session=resources.get_http_session(),
+        base_url=config.assemblyai_base_url, poll_seconds=config.assemblyai_poll_seconds
+    )
+    if result is not None and stats:
+        result = dict(result, vad=stats)
+    return result, error
+
+
+def transcribe(audio, audio_hash, config):
+    """
+    ``(result, error)`` for a recording, shared with any other upload of the same audio.
+
+    Silence is trimmed before upload; the result then carries the trim stats
+    under ``"vad"``.
+    """
+    return resources.get_transcript_index().transcribe(audio_hash, lambda: _transcribe_trimmed(audio, config))
+
+
+def speech_duration(result, audio=None):
+    """
+    Seconds of speech for words per minute: the transcribed (trimmed) audio
+    plus any long pauses the trim shortened, so compressing pauses does not
+    make a teacher look faster.
+
+    When the transcription result has no duration it is read from the
+    recording's header instead (less the trimmed edge silence).
+    """
+    duration = result.get("audio_duration", None)
+    stats = result.get("vad")
+    if not duration and audio is not None:
+        info = audio_info.probe(audio)
+        if info is not None:
+            edges = stats["removed_seconds"] - stats["pause_seconds"] if stats else 0.0
+            return max(0.0, info.duration - edges) or None
+    if duration and stats and stats["pause_seconds"]:
+        duration += stats["pause_seconds"]
+    return duration
+
+
+def score_item(part, prompt, audio, audio_hash, result, audio_archive):
+    """
+    Score a transcription result into an ItemRecord and archive the audio.
+
+    Returns None when the transcript has no usable speech.
+    """
+    transcript = result.get("text", "")
+    if not transcript or not transcript.strip() or transcript == NO_SPEECH:
+        return None
+
+    with span("audio.archive"):
+        audio_archive.put(audio_hash, audio.getbuffer())
+    duration = speech_duration(result, audio)
+    if duration != result.get("audio_duration", None):
+        result = dict(result, audio_duration=duration)
+    features = scoring.compute_speech_features(transcript, duration)
+    stats = result.get("vad")
+    if stats:
+        features["silence_trimmed"] = round(stats["removed_seconds"], 2)
+        features["long_pauses"] = stats["pauses"] or None
+    return ItemRecord.create(
+        audio_hash,
+        transcript,
+        scoring.score_recording(part, result, prompt),
+        features,
+        datetime.now().isoformat()
+    )
+
+
+def results_row(name, institution, email, summary):
+    """The results store row for a scoring.summarize_submission summary"""
+    part1_scores = summary["part1_scores"]
+    part2_scores = summary["part2_scores"]
+    avg_scores = summary["avg_scores"]
+    return {
+        "Name": name,
+        "Institution": institution,
+        "Email": email,
+        "Part1_Count": len(part1_scores),
+        "Part1_Avg": round(sum(part1_scores) / len(part1_scores), 2) if part1_scores else 0,
+        "Part2_Count": len(part2_scores),
+        "Part2_Avg": round(sum(part2_scores) / len(part2_scores), 2) if part2_scores else 0,
+        "Part3_Score": round(summary["part3_score"], 2),
+        "Total_Score": round(summary["total_score"], 2),
+        "Max_Score": round(summary["max_score"], 2),
+        "Percentage": round(summary["percentage"], 2),
+        "Proficiency_Level": summary["proficiency_level"],
+        "Accuracy_Avg": round(avg_scores.get("Accuracy", 0), 2),
+        "Fluency_Avg": round(avg_scores.get("Fluency", 0), 2),
+        "Intonation_Avg": round(avg_scores.get("Intonation", 0), 2),
+        "Vocabulary_Avg": round(avg_scores.get("Vocabulary", 0), 2),
+        "Grammar_Avg": round(avg_scores.get("Grammar", 0), 2),
+        "Date": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    }
+
+
+def save_results(test_session, name, institution, email, summary, db_path=None, submission_key=None):
+    """Save a submission and its per-recording rows; returns the results row id (see save_submission)"""
+    recordings = test_session.recording_rows(
+        scoring.PART1_SENTENCES, scoring.PART2_PROMPTS, scoring.PART3_PROMPT, scoring.RUBRIC_VERSION
+    )
+    with span("results.save", recordings=len(recordings)):
+        return results_store.save_submission(
+            results_row(name, institution, email, summary), recordings, db_path=db_path,
+            submission_key=submission_key
+        )
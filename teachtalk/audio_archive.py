@@ -0,0 +1,193 @@
+"""
+Content-addressed, compressed archive of every scored recording.
+
+Each recording is stored once under its audio hash (the blake2b digest from
+``transcription.get_audio_hash``), which is also saved in every
+``recording_results`` row, so going from a result row to its audio is a path
+computation, with no index to keep in sync:
+
+    <root>/<hash[0:2]>/<hash[2:4]>/<hash>.gz
+
+Files are plain gzip (``gunzip -c`` restores the upload byte for byte),
+written atomically; storing a recording that is already archived only
+refreshes its modification time. Two levels of 256 shards keep directories
+small at millions of recordings.
+
+Retention (``prune``) deletes audio referenced by saved results once the newest
+referencing recording is older than ``retention_days``, and audio that no saved
+result references (abandoned tests, retaken items) once it has not been
+stored for ``orphan_days``. Either policy is off at 0.
+
+The command line takes its defaults (archive directory, results database and
+both retention periods) from ``.streamlit/secrets.toml`` in the working
+directory, like the app: ``AUDIO_ARCHIVE_DIR``, ``RESULTS_DB_PATH``,
+``AUDIO_RETENTION_DAYS`` and ``AUDIO_ORPHAN_DAYS``.
+
+Usage:
+    python -m teachtalk.audio_archive stats
+    python -m teachtalk.audio_archive prune --dry-run
+    python -m teachtalk.audio_archive prune --retention-days 365 --orphan-days 7
+    python -m teachtalk.audio_archive export --result-id 42 --out /tmp/audit
+"""
+
+import argparse
+import gzip
+import os
+import tempfile
+import time
+import uuid
+from datetime import datetime
+
+from . import audio_info, results_store
+
+DEFAULT_ARCHIVE_DIR = os.path.join(tempfile.gettempdir(), "teachtalk_audio")
+SUFFIX = ".gz"
+
+
+class AudioArchive:
+    """Gzipped recordings in sharded directories, keyed by audio hash"""
+
+    def __init__(self, root=None, compresslevel=6):
+        self.root = root or DEFAULT_ARCHIVE_DIR
+        self.compresslevel = compresslevel
+
+    def path(self, audio_hash):
+        if len(audio_hash) < 4 or not all(c in "0123456789abcdef" for c in audio_hash):
+            raise ValueError(f"Not an audio hash: {audio_hash!r}")
+        return os.path.join(self.root, audio_hash[:2], audio_hash[2:4], audio_hash + SUFFIX)
+
+    def has(self, audio_hash):
+        return os.path.exists(self.path(audio_hash))
+
+    def put(self, audio_hash, buffer):
+        """Archive audio bytes (any buffer, e.g. UploadedFile.getbuffer()); returns True if newly stored"""
+        path = self.path(audio_hash)
+        try:
+            os.utime(path)
+            return False
+        except FileNotFoundError:
+            pass
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        with open(tmp_path, "wb") as f:
+            # mtime=0 keeps the compressed bytes identical for identical audio
+            f.write(gzip.compress(buffer, compresslevel=self.compresslevel, mtime=0))
+        os.replace(tmp_path, path)
+        return True
+
+    def read(self, audio_hash):
+        """The original audio bytes, or None if not archived"""
+        try:
+            with gzip.open(self.path(audio_hash), "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def remove(self, audio_hash):
+        try:
+            os.unlink(self.path(audio_hash))
+            return True
+        except FileNotFoundError:
+            return False
+
+    def entries(self):
+        """``(audio_hash, stored_bytes, mtime)`` for every archived recording"""
+        if not os.path.isdir(self.root):
+            return
+        for shard in os.scandir(self.root):
+            if not shard.is_dir():
+                continue
+            for subshard in os.scandir(shard.path):
+                if not subshard.is_dir():
+                    continue
+                for entry in os.scandir(subshard.path):
+                    if entry.name.endswith(SUFFIX):
+                        stat = entry.stat()
+                        yield entry.name[:-len(SUFFIX)], stat.st_size, stat.st_mtime
+
+    def stats(self):
+        files = 0
+        stored_bytes = 0
+        for _, size, _ in self.entries():
+            files += 1
+            stored_bytes += size
+        return {"files": files, "stored_bytes": stored_bytes}
+
+
+def prune(archive, db_path=None, retention_days=0, orphan_days=0, now=None, dry_run=False):
+    """Apply the retention policies; returns counts of kept and removed files and bytes freed"""
+    now = now or time.time()
+    newest_use = {}
+    for audio_hash, recorded_at in results_store.recording_audio_dates(db_path=db_path).items():
+        try:
+            newest_use[audio_hash] = datetime.fromisoformat(recorded_at).timestamp()
+        except (TypeError, ValueError):
+            # Unparseable date: treat as recorded now rather than risk deleting it
+            newest_use[audio_hash] = now
+
+    kept = removed = freed = 0
+    for audio_hash, size, mtime in list(archive.entries()):
+        if audio_hash in newest_use:
+            expired = retention_days > 0 and now - newest_use[audio_hash] > retention_days * 86400
+        else:
+            expired = orphan_days > 0 and now - mtime > orphan_days * 86400
+        if expired:
+            if not dry_run:
+                archive.remove(audio_hash)
+            removed += 1
+            freed += size
+        else:
+            kept += 1
+    return {"kept": kept, "removed": removed, "freed_bytes": freed}
+
+
+def main(argv=None):
+    from . import resources
+
+    config = resources.get_config()
+
+    parser = argparse.ArgumentParser(description="Recording archive maintenance")
+    parser.add_argument("--root", default=config.audio_archive_dir or DEFAULT_ARCHIVE_DIR, help="Archive directory")
+    parser.add_argument("--db", default=config.results_db_path, help="Path to the results database")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    subparsers.add_parser("stats", help="Count archived recordings and their size on disk")
+
+    prune_parser = subparsers.add_parser("prune", help="Delete recordings past their retention period")
+    prune_parser.add_argument("--retention-days", type=float, default=config.audio_retention_days,
+                              help="For audio of saved results (0 = forever)")
+    prune_parser.add_argument("--orphan-days", type=float, default=config.audio_orphan_days,
+                              help="For audio no saved result uses (0 = forever)")
+    prune_parser.add_argument("--dry-run", action="store_true")
+
+    export_parser = subparsers.add_parser("export", help="Write a submission's recordings out as audio files")
+    export_parser.add_argument("--result-id", type=int, required=True)
+    export_parser.add_argument("--out", required=True)
+
+    args = parser.parse_args(argv)
+    archive = AudioArchive(args.root)
+
+    if args.command == "stats":
+        stats = archive.stats()
+        print(f"{stats['files']} recordings, {stats['stored_bytes'] / 1024 / 1024:.1f} MB on disk")
+    elif args.command == "prune":
+        stats = prune(archive, args.db, args.retention_days, args.orphan_days, dry_run=args.dry_run)
+        verb = "Would remove" if args.dry_run else "Removed"
+        print(f"{verb} {stats['removed']} recordings ({stats['freed_bytes'] / 1024 / 1024:.1f} MB), "
+              f"kept {stats['kept']}")
+    elif args.command == "export":
+        os.makedirs(args.out, exist_ok=True)
+        for row in results_store.fetch_recordings(result_id=args.result_id, db_path=args.db):
+            audio = archive.read(row["audio_hash"]) if row["audio_hash"] else None
+            if audio is None:
+                print(f"{row['item_key']}: not archived")
+                continue
+            extension = ".wav" if audio_info.probe(audio) else ".audio"
+            path = os.path.join(args.out, f"{args.result_id}_{row['item_key']}{extension}")
+            with open(path, "wb") as f:
+                f.write(audio)
+            print(f"{row['item_key']}: {path}")
+
+
+if __name__ == "__main__":
+    main()
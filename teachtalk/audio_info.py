@@ -0,0 +1,72 @@
+"""
+Recording metadata read from the file header, without decoding the audio.
+
+``st.audio_input`` records WAV. ``probe`` walks the RIFF chunks until it has
+the ``fmt `` chunk and the size of the ``data`` chunk, which gives the
+duration in seconds, the sample rate and the channel count without reading the
+samples, however long the recording is. Other formats (or damaged headers) give None, so callers fall back to
+whatever they did before.
+"""
+
+import struct
+from collections import namedtuple
+
+# WAVE format tags that store fixed-size frames (duration = data bytes / block align)
+PCM_FORMATS = {
+    0x0001: "pcm",
+    0x0003: "float",
+    0x0006: "alaw",
+    0x0007: "mulaw",
+}
+WAVE_FORMAT_EXTENSIBLE = 0xFFFE
+
+AudioInfo = namedtuple("AudioInfo", "format duration sample_rate channels bits_per_sample data_bytes")
+
+
+def probe(audio):
+    """
+    ``AudioInfo`` for a WAV recording (an upload, BytesIO or bytes-like), or None.
+
+    Only the header is read. A data chunk whose declared size runs past the
+    end of the buffer (recorders that never patch the size in) is measured up
+    to the end of the buffer instead.
+    """
+    buffer = audio.getbuffer() if hasattr(audio, "getbuffer") else audio
+    with memoryview(buffer) as view:
+        view = view.cast("B")
+        if len(view) < 12 or view[0:4] != b"RIFF" or view[8:12] != b"WAVE":
+            return None
+
+        fmt = None
+        offset = 12
+        while offset + 8 <= len(view):
+            chunk_id = bytes(view[offset:offset + 4])
+            (chunk_size,) = struct.unpack_from("<I", view, offset + 4)
+            body = offset + 8
+            if chunk_id == b"fmt " and chunk_size >= 16:
+                fmt = struct.unpack_from("<HHIIHH", view, body)
+                if fmt[0] == WAVE_FORMAT_EXTENSIBLE and chunk_size >= 26:
+                    # The real format tag is the first two bytes of the subformat GUID
+                    fmt = struct.unpack_from("<H", view, body + 24) + fmt[1:]
+            elif chunk_id == b"data":
+                if fmt is None:
+                    return None
+                data_bytes = min(chunk_size, len(view) - body)
+                return _info(fmt, data_bytes)
+            # Chunks are word aligned
+            offset = body + chunk_size + (chunk_size & 1)
+    return None
+
+
+def _info(fmt, data_bytes):
+    format_tag, channels, sample_rate, _, block_align, bits_per_sample = fmt
+    if format_tag not in PCM_FORMATS or not sample_rate or not block_align:
+        return None
+    return AudioInfo(
+        format=PCM_FORMATS[format_tag],
+        duration=(data_bytes // block_align) / sample_rate,
+        sample_rate=sample_rate,
+        channels=channels,
+        bits_per_sample=bits_per_sample,
+        data_bytes=data_bytes,
+    )
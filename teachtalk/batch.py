@@ -0,0 +1,262 @@
+"""
+Offline batch assessment: score a folder of recordings listed in a roster.
+
+Schools that record offline send a directory of audio files and a roster CSV
+with one row per recording:
+
+    file,name,institution,email,item
+    ana/s1.wav,Ana Silva,Escola Azul,ana@example.com,sentence_0
+    ana/answer.wav,Ana Silva,Escola Azul,ana@example.com,explanation
+
+``file`` is relative to the audio directory; ``item`` is an item key
+(``sentence_<i>``, ``prompt_<i>`` or ``explanation``). Recordings go through
+the same pipeline as the app and the API (silence trimming, the shared
+transcript index, ``scoring``, the audio archive), transcribed by a bounded
+pool of worker threads. Once all of a teacher's recordings are done, their
+submission is saved to the results store (no emails are sent).
+
+Progress goes to a journal file (one JSON line per scored recording or saved
+submission, next to the roster by default). Running the same command again
+skips everything the journal already holds, retries recordings that failed
+and saves the submissions that are now complete. Before a teacher's
+submission is saved, the journal records a submission key for it, and the
+results store saves each key only once, so a run interrupted between saving
+and journaling does not save the teacher twice. A recording whose file has
+changed since (different audio hash) is scored again.
+
+Settings (AssemblyAI key, results database, archive...) come from
+``.streamlit/secrets.toml`` in the working directory, as for the app.
+
+Usage:
+    python -m teachtalk.batch recordings/ roster.csv --workers 8
+    python -m teachtalk.batch recordings/ roster.csv --save-incomplete
+"""
+
+import argparse
+import csv
+import io
+import json
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from . import assessment, audio_info, resources, scoring
+from .session_state import READABLE_FORMATS, SESSION_FORMAT, TestSession
+from .transcription import get_audio_hash
+
+ROSTER_COLUMNS = ("file", "name", "institution", "email", "item")
+
+
+def read_roster(path, audio_dir):
+    """``(rows, problems)``: valid roster rows (with ``part``, ``prompt`` and ``path``) and error messages"""
+    rows = []
+    problems = []
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        reader = csv.DictReader(f)
+        missing = [column for column in ROSTER_COLUMNS if column not in (reader.fieldnames or [])]
+        if missing:
+            raise ValueError(f"Roster is missing columns: {', '.join(missing)}")
+        for line, row in enumerate(reader, start=2):
+            row = {column: (row[column] or "").strip() for column in ROSTER_COLUMNS}
+            part_prompt = assessment.item_part_and_prompt(row["item"])
+            row["path"] = os.path.join(audio_dir, row["file"])
+            if part_prompt is None:
+                problems.append(f"line {line}: unknown item '{row['item']}'")
+            elif not row["name"] or not row["email"]:
+                problems.append(f"line {line}: name and email are required")
+            elif not os.path.isfile(row["path"]):
+                problems.append(f"line {line}: no such file {row['file']}")
+            else:
+                row["part"], row["prompt"] = part_prompt
+                rows.append(row)
+    return rows, problems
+
+
+def teacher_key(row):
+    return f"{row['email'].lower()}|{row['name']}|{row['institution']}"
+
+
+class Journal:
+    """Append-only JSON lines recording scored items, submission keys and saved submissions"""
+
+    def __init__(self, path):
+        self.path = path
+        self.items = {}
+        self.saved = {}
+        self.submission_keys = {}
+        self._lock = threading.Lock()
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    if not line.strip():
+                        continue
+                    entry = json.loads(line)
+                    if "result_id" in entry:
+                        self.saved[entry["teacher"]] = entry["result_id"]
+                    elif "submission_key" in entry:
+                        self.submission_keys[entry["teacher"]] = entry["submission_key"]
+                    # Records of older formats are padded on load, so they are not scored again
+                    elif entry.get("format") in READABLE_FORMATS:
+                        self.items[(entry["teacher"], entry["item"])] = entry
+
+    def _append(self, entry):
+        with self._lock, open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry) + "\n")
+
+    def record_item(self, teacher, item_key, file, audio_hash, status, record=None):
+        entry = {
+            "format": SESSION_FORMAT, "teacher": teacher, "item": item_key, "file": file,
+            "audio_hash": audio_hash, "status": status, "record": list(record) if record else None,
+        }
+        self._append(entry)
+        with self._lock:
+            self.items[(teacher, item_key)] = entry
+
+    def submission_key(self, teacher):
+        """The key a teacher's submission is saved under, journaled before the first save attempt"""
+        key = self.submission_keys.get(teacher)
+        if key is None:
+            key = uuid.uuid4().hex
+            self._append({"teacher": teacher, "submission_key": key})
+            with self._lock:
+                self.submission_keys[teacher] = key
+        return key
+
+    def record_saved(self, teacher, result_id):
+        self._append({"teacher": teacher, "result_id": result_id})
+        with self._lock:
+            self.saved[teacher] = result_id
+
+
+def process_recording(row, config):
+    """Transcribe and score one roster row; returns ``(status, audio_hash, record, error, seconds of audio)``"""
+    with open(row["path"], "rb") as f:
+        audio = io.BytesIO(f.read())
+    info = audio_info.probe(audio)
+    duration = info.duration if info else 0.0
+    audio_hash = get_audio_hash(audio)
+
+    error = assessment.check_recording(audio)
+    if error:
+        return "no_speech", audio_hash, None, error, duration
+    result, error = assessment.transcribe(audio, audio_hash, config)
+    if error or not result:
+        return "error", audio_hash, None, error or "Empty transcription result", duration
+    rec = assessment.score_item(row["part"], row["prompt"], audio, audio_hash, result, resources.get_audio_archive())
+    if rec is None:
+        return "no_speech", audio_hash, None, assessment.NO_SPEECH, duration
+    return "scored", audio_hash, rec, None, duration
+
+
+def build_session(rows, journal, teacher):
+    """TestSession of a teacher's journaled, scored recordings"""
+    data = {"part1": {}, "part2": {}, "part3": None, "submitted": False}
+    for row in rows:
+        entry = journal.items.get((teacher, row["item"]))
+        if entry is None or entry["status"] != "scored":
+            continue
+        if row["part"] == 3:
+            data["part3"] = entry["record"]
+        else:
+            data[f"part{row['part']}"][row["item"]] = entry["record"]
+    return TestSession.from_dict(data)
+
+
+def run(audio_dir, roster_path, journal_path=None, workers=4, save_incomplete=False, out=print):
+    """Score a roster's recordings and save complete submissions; returns the run's counts"""
+    config = resources.get_config()
+    rows, problems = read_roster(roster_path, audio_dir)
+    for problem in problems:
+        out(f"skipping {problem}")
+    journal = Journal(journal_path or roster_path + ".journal.jsonl")
+
+    # Failures are not journaled, so anything the journal holds for the same audio is done
+    pending = []
+    for row in rows:
+        teacher = teacher_key(row)
+        if teacher in journal.saved:
+            continue
+        entry = journal.items.get((teacher, row["item"]))
+        if entry is not None:
+            with open(row["path"], "rb") as f:
+                if get_audio_hash(f.read()) == entry["audio_hash"]:
+                    continue
+        pending.append(row)
+
+    counts = {"scored": 0, "no_speech": 0, "error": 0}
+    audio_seconds = 0.0
+    start = time.perf_counter()
+    out(f"{len(rows)} recordings in roster, {len(rows) - len(pending)} already done, "
+        f"{len(pending)} to transcribe with {workers} workers")
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(process_recording, row, config): row for row in pending}
+        for done, future in enumerate(as_completed(futures), start=1):
+            row = futures[future]
+            try:
+                status, audio_hash, rec, error, duration = future.result()
+            except Exception as e:
+                status, audio_hash, rec, error, duration = "error", None, None, f"{type(e).__name__}: {e}", 0.0
+            if status != "error":
+                journal.record_item(teacher_key(row), row["item"], row["file"], audio_hash, status, rec)
+            counts[status] += 1
+            audio_seconds += duration
+
+            elapsed = time.perf_counter() - start
+            rate = done / elapsed if elapsed else 0.0
+            eta = (len(pending) - done) / rate if rate else 0.0
+            out(f"[{done:>{len(str(len(pending)))}}/{len(pending)}] {rate:5.2f} rec/s  ETA {eta:5.0f}s  "
+                f"{row['file']} -> {status}" + (f" ({error})" if error else ""))
+
+    # Save every teacher whose recordings are all done
+    by_teacher = {}
+    for row in rows:
+        by_teacher.setdefault(teacher_key(row), []).append(row)
+    saved = 0
+    incomplete = 0
+    for teacher, teacher_rows in by_teacher.items():
+        if teacher in journal.saved:
+            continue
+        finished = all((teacher, row["item"]) in journal.items for row in teacher_rows)
+        if not finished and not save_incomplete:
+            incomplete += 1
+            continue
+        test_session = build_session(teacher_rows, journal, teacher)
+        if not test_session.has_recordings():
+            continue
+        first = teacher_rows[0]
+        summary = scoring.summarize_submission(test_session.part1, test_session.part2, test_session.part3)
+        # A retry after a crash between these two steps finds the key and saves nothing
+        result_id = assessment.save_results(
+            test_session, first["name"], first["institution"], first["email"], summary,
+            db_path=config.results_db_path, submission_key=journal.submission_key(teacher)
+        )
+        journal.record_saved(teacher, result_id)
+        saved += 1
+
+    elapsed = time.perf_counter() - start
+    out(f"\n{counts['scored']} scored, {counts['no_speech']} without speech, {counts['error']} failed "
+        f"in {elapsed:.1f}s ({len(pending) / elapsed if elapsed else 0:.2f} recordings/s, "
+        f"{audio_seconds / elapsed if elapsed else 0:.1f}s of audio per second)")
+    out(f"{saved} submissions saved, {incomplete} teachers waiting on failed recordings"
+        + (" (run again to retry)" if incomplete else ""))
+    return dict(counts, saved=saved, incomplete=incomplete, elapsed=elapsed)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Score a folder of offline recordings listed in a roster CSV")
+    parser.add_argument("audio_dir", help="Directory the roster's file paths are relative to")
+    parser.add_argument("roster", help=f"CSV with columns: {', '.join(ROSTER_COLUMNS)}")
+    parser.add_argument("--workers", type=int, default=4, help="Recordings transcribed at once")
+    parser.add_argument("--journal", help="Progress journal (default: <roster>.journal.jsonl)")
+    parser.add_argument("--save-incomplete", action="store_true",
+                        help="Save teachers even if some of their recordings failed")
+    args = parser.parse_args(argv)
+
+    run(args.audio_dir, args.roster, args.journal, args.workers, args.save_incomplete)
+
+
+if __name__ == "__main__":
+    main()
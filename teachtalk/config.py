@@ -0,0 +1,93 @@
+"""
+Application configuration.
+
+``AppConfig`` is an immutable snapshot of the settings the app reads from
+Streamlit secrets (see ``secrets.toml.example``), parsed and type-converted
+once. Inside the app use ``resources.get_config()``, which builds it once per
+process; command-line tools can build one from any mapping with
+``AppConfig.from_mapping``.
+"""
+
+from dataclasses import dataclass
+
+from .results_store import DEFAULT_DB_PATH
+
+
+def _bool(value):
+    if isinstance(value, str):
+        return value.strip().lower() in ("1", "true", "yes", "on")
+    return bool(value)
+
+
+@dataclass(frozen=True)
+class AppConfig:
+    assemblyai_api_key: str = ""
+    assemblyai_base_url: str = "https://api.assemblyai.com"
+    assemblyai_poll_seconds: float = 2.0
+    sender_email: str = ""
+    sender_password: str = ""
+    smtp_server: str = "smtp.gmail.com"
+    smtp_port: int = 587
+    smtp_pool_size: int = 2
+    smtp_use_tls: bool = True
+    results_db_path: str = DEFAULT_DB_PATH
+    admin_password: str = ""
+    head_teacher_digest_minutes: float = 0.0
+    attach_pdf_reports: bool = False
+    pdf_cache_dir: str = ""
+    fragment_reruns: bool = True
+    session_memory_budget_mb: float = 256.0
+    session_spill_dir: str = ""
+    session_backend: str = "memory"
+    session_redis_url: str = "redis://127.0.0.1:6379/0"
+    session_ttl_hours: float = 24.0
+    transcript_index_size: int = 512
+    upload_chunk_kb: int = 256
+    audio_archive_dir: str = ""
+    audio_retention_days: float = 365.0
+    audio_orphan_days: float = 30.0
+    vad_trim: bool = True
+    vad_max_pause_seconds: float = 0.0
+
+    @classmethod
+    def from_mapping(cls, values):
+        """Build a config from a secrets-style mapping (upper-case keys); missing keys use the defaults"""
+        defaults = cls()
+        get = values.get
+        return cls(
+            assemblyai_api_key=str(get("ASSEMBLYAI_API_KEY", defaults.assemblyai_api_key)),
+            assemblyai_base_url=str(get("ASSEMBLYAI_BASE_URL", defaults.assemblyai_base_url)).rstrip("/"),
+            assemblyai_poll_seconds=float(get("ASSEMBLYAI_POLL_SECONDS", defaults.assemblyai_poll_seconds)),
+            sender_email=str(get("SENDER_EMAIL", defaults.sender_email)),
+            sender_password=str(get("SENDER_PASSWORD", defaults.sender_password)),
+            smtp_server=str(get("SMTP_SERVER", defaults.smtp_server)),
+            smtp_port=int(get("SMTP_PORT", defaults.smtp_port)),
+            smtp_pool_size=int(get("SMTP_POOL_SIZE", defaults.smtp_pool_size)),
+            smtp_use_tls=_bool(get("SMTP_USE_TLS", defaults.smtp_use_tls)),
+            results_db_path=str(get("RESULTS_DB_PATH", defaults.results_db_path)),
+            admin_password=str(get("ADMIN_PASSWORD", defaults.admin_password)),
+            head_teacher_digest_minutes=float(get("HEAD_TEACHER_DIGEST_MINUTES", defaults.head_teacher_digest_minutes)),
+            attach_pdf_reports=_bool(get("ATTACH_PDF_REPORTS", defaults.attach_pdf_reports)),
+            pdf_cache_dir=str(get("PDF_CACHE_DIR", defaults.pdf_cache_dir)),
+            fragment_reruns=_bool(get("FRAGMENT_RERUNS", defaults.fragment_reruns)),
+            session_memory_budget_mb=float(get("SESSION_MEMORY_BUDGET_MB", defaults.session_memory_budget_mb)),
+            session_spill_dir=str(get("SESSION_SPILL_DIR", defaults.session_spill_dir)),
+            session_backend=str(get("SESSION_BACKEND", defaults.session_backend)).lower(),
+            session_redis_url=str(get("SESSION_REDIS_URL", defaults.session_redis_url)),
+            session_ttl_hours=float(get("SESSION_TTL_HOURS", defaults.session_ttl_hours)),
+            transcript_index_size=int(get("TRANSCRIPT_INDEX_SIZE", defaults.transcript_index_size)),
+            upload_chunk_kb=int(get("UPLOAD_CHUNK_KB", defaults.upload_chunk_kb)),
+            audio_archive_dir=str(get("AUDIO_ARCHIVE_DIR", defaults.audio_archive_dir)),
+            audio_retention_days=float(get("AUDIO_RETENTION_DAYS", defaults.audio_retention_days)),
+            audio_orphan_days=float(get("AUDIO_ORPHAN_DAYS", defaults.audio_orphan_days)),
+            vad_trim=_bool(get("VAD_TRIM", defaults.vad_trim)),
+            vad_max_pause_seconds=float(get("VAD_MAX_PAUSE_SECONDS", defaults.vad_max_pause_seconds)),
+        )
+
+    @property
+    def email_configured(self):
+        return bool(self.sender_email and self.sender_password)
+
+    @property
+    def digest_mode(self):
+        return self.head_teacher_digest_minutes > 0
@@ -0,0 +1,370 @@
+"""
+Durable email outbox with a background sender.
+
+Reports are queued in an ``email_outbox`` table in the results database and the
+submit handler returns immediately. A background thread claims due messages in
+batches, sends them over a small pool of authenticated SMTP connections that are
+reused across messages, and retries failures with exponential backoff.
+"""
+
+import logging
+import queue
+import random
+import smtplib
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from email.mime.application import MIMEApplication
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+
+from . import results_store
+from . import telemetry
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS email_outbox (
+    id INTEGER PRIMARY KEY,
+    recipient TEXT NOT NULL,
+    subject TEXT NOT NULL,
+    html_body TEXT NOT NULL,
+    kind TEXT NOT NULL DEFAULT 'report',
+    attach_pdf INTEGER NOT NULL DEFAULT 0,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt_at REAL NOT NULL,
+    lease_until REAL,
+    last_error TEXT,
+    created_at REAL NOT NULL,
+    sent_at REAL
+);
+CREATE INDEX IF NOT EXISTS idx_email_outbox_due ON email_outbox (status, next_attempt_at);
+"""
+
+# Message status values
+PENDING = "pending"
+SENDING = "sending"
+SENT = "sent"
+FAILED = "failed"
+
+_schema_paths = set()
+_schema_lock = threading.Lock()
+
+
+def connect(db_path=None):
+    """Connect to the results database and make sure the outbox table exists"""
+    conn = results_store.connect(db_path)
+    key = db_path or results_store.DEFAULT_DB_PATH
+    if key not in _schema_paths:
+        with _schema_lock:
+            if key not in _schema_paths:
+                conn.executescript(SCHEMA)
+                columns = {row["name"] for row in conn.execute("PRAGMA table_info(email_outbox)")}
+                if "attach_pdf" not in columns:
+                    conn.execute("ALTER TABLE email_outbox ADD COLUMN attach_pdf INTEGER NOT NULL DEFAULT 0")
+                _schema_paths.add(key)
+    return conn
+
+
+def enqueue_email(recipient, subject, html_body, kind="report", attach_pdf=False, db_path=None):
+    """
+    Queue an email for background delivery. Returns the outbox message id.
+
+    With attach_pdf, the sender attaches a PDF copy of the HTML body when it sends.
+    """
+    now = time.time()
+    conn = connect(db_path)
+    try:
+        with results_store.transaction(conn):
+            cursor = conn.execute(
+                "INSERT INTO email_outbox "
+                "(recipient, subject, html_body, kind, attach_pdf, status, next_attempt_at, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (recipient, subject, html_body, kind, int(attach_pdf), PENDING, now, now)
+            )
+        return cursor.lastrowid
+    finally:
+        conn.close()
+
+
+def claim_batch(limit, lease_seconds=300, max_attempts=6, db_path=None):
+    """
+    Claim up to ``limit`` due messages for sending.
+
+    Claiming counts as an attempt (the returned ``attempts`` includes it).
+    Claimed messages are leased; if the sender dies mid-send the lease expires
+    and the message is picked up again, unless that was its last attempt, in
+    which case it is marked failed.
+    """
+    now = time.time()
+    conn = connect(db_path)
+    try:
+        with results_store.transaction(conn):
+            rows = conn.execute(
+                "SELECT id, recipient, subject, html_body, kind, attach_pdf, attempts, created_at FROM email_outbox "
+                "WHERE (status = ? AND next_attempt_at <= ?) OR (status = ? AND lease_until < ?) "
+                "ORDER BY next_attempt_at LIMIT ?",
+                (PENDING, now, SENDING, now, limit)
+            ).fetchall()
+            exhausted = [row for row in rows if row["attempts"] >= max_attempts]
+            claimed = [dict(row, attempts=row["attempts"] + 1) for row in rows if row["attempts"] < max_attempts]
+            conn.executemany(
+                "UPDATE email_outbox SET status = ?, lease_until = NULL, last_error = ? WHERE id = ?",
+                [(FAILED, "Sender stopped during the last attempt", row["id"]) for row in exhausted]
+            )
+            conn.executemany(
+                "UPDATE email_outbox SET status = ?, attempts = ?, lease_until = ? WHERE id = ?",
+                [(SENDING, message["attempts"], now + lease_seconds, message["id"]) for message in claimed]
+            )
+        return claimed
+    finally:
+        conn.close()
+
+
+def record_results(sent_ids, failures, max_attempts, backoff_base, backoff_max, db_path=None):
+    """
+    Mark sent messages and schedule retries for failed ones.
+
+    ``failures`` is a list of (message, error) pairs of claimed messages (whose
+    ``attempts`` already counts this one). Messages that have used up
+    ``max_attempts`` are marked failed.
+    """
+    now = time.time()
+    updates = []
+    for message, error in failures:
+        attempts = message["attempts"]
+        if attempts >= max_attempts:
+            updates.append((FAILED, now, error, message["id"]))
+        else:
+            delay = min(backoff_max, backoff_base * (2 ** (attempts - 1)))
+            delay *= random.uniform(0.8, 1.2)
+            updates.append((PENDING, now + delay, error, message["id"]))
+
+    conn = connect(db_path)
+    try:
+        with results_store.transaction(conn):
+            conn.executemany(
+                "UPDATE email_outbox SET status = ?, sent_at = ?, "
+                "lease_until = NULL, last_error = NULL WHERE id = ?",
+                [(SENT, now, message_id) for message_id in sent_ids]
+            )
+            conn.executemany(
+                "UPDATE email_outbox SET status = ?, next_attempt_at = ?, "
+                "lease_until = NULL, last_error = ? WHERE id = ?",
+                updates
+            )
+    finally:
+        conn.close()
+
+
+def outbox_counts(db_path=None):
+    """Number of outbox messages per status"""
+    conn = connect(db_path)
+    try:
+        return {
+            row["status"]: row["n"]
+            for row in conn.execute("SELECT status, COUNT(*) AS n FROM email_outbox GROUP BY status")
+        }
+    finally:
+        conn.close()
+
+
+def build_message(sender_email, recipient, subject, html_body, attachments=()):
+    """Build the MIME message for an outbox entry; attachments are (filename, pdf_bytes) pairs"""
+    body = MIMEMultipart('alternative')
+    body.attach(MIMEText(html_body, 'html'))
+
+    if attachments:
+        msg = MIMEMultipart('mixed')
+        msg.attach(body)
+        for filename, data in attachments:
+            part = MIMEApplication(data, _subtype='pdf')
+            part.add_header('Content-Disposition', 'attachment', filename=filename)
+            msg.attach(part)
+    else:
+        msg = body
+
+    msg['From'] = sender_email
+    msg['To'] = recipient
+    msg['Subject'] = subject
+    return msg
+
+
+class SMTPPool:
+    """A bounded pool of logged-in SMTP connections that are reused across messages"""
+
+    def __init__(self, server, port, sender_email, sender_password, size=2, use_tls=True, timeout=30):
+        self.server = server
+        self.port = port
+        self.sender_email = sender_email
+        self.sender_password = sender_password
+        self.size = size
+        self.use_tls = use_tls
+        self.timeout = timeout
+
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+        self._lock = threading.Lock()
+        self.connections_opened = 0
+        self.messages_sent = 0
+
+    def _open(self):
+        connection = smtplib.SMTP(self.server, self.port, timeout=self.timeout)
+        if self.use_tls:
+            connection.starttls()
+        if self.sender_password:
+            connection.login(self.sender_email, self.sender_password)
+        with self._lock:
+            self.connections_opened += 1
+        return connection
+
+    def acquire(self):
+        """Get a live connection, reusing an idle one when its NOOP check passes"""
+        self._slots.acquire()
+        try:
+            while True:
+                try:
+                    connection = self._idle.get_nowait()
+                except queue.Empty:
+                    return self._open()
+                try:
+                    if connection.noop()[0] == 250:
+                        return connection
+                except (smtplib.SMTPException, OSError):
+                    pass
+                self._close(connection)
+        except BaseException:
+            self._slots.release()
+            raise
+
+    def release(self, connection, broken=False):
+        if broken:
+            self._close(connection)
+        else:
+            self._idle.put(connection)
+        self._slots.release()
+
+    def send(self, msg):
+        """Send a message on a pooled connection; broken connections are discarded"""
+        connection = self.acquire()
+        try:
+            connection.send_message(msg)
+        except (smtplib.SMTPServerDisconnected, OSError):
+            self.release(connection, broken=True)
+            raise
+        except BaseException:
+            self.release(connection)
+            raise
+        self.release(connection)
+        with self._lock:
+            self.messages_sent += 1
+
+    def _close(self, connection):
+        try:
+            connection.quit()
+        except (smtplib.SMTPException, OSError):
+            try:
+                connection.close()
+            except OSError:
+                pass
+
+    def close_all(self):
+        while True:
+            try:
+                self._close(self._idle.get_nowait())
+            except queue.Empty:
+                break
+
+
+class OutboxSender(threading.Thread):
+    """Background thread that drains the outbox in batches over an SMTPPool"""
+
+    def __init__(self, pool, db_path=None, batch_size=20, poll_interval=5.0,
+                 max_attempts=6, backoff_base=30.0, backoff_max=3600.0, periodic_tasks=(),
+                 pdf_renderer=None):
+        super().__init__(name="email-outbox-sender", daemon=True)
+        self.pool = pool
+        self.db_path = db_path
+        # Callable(html) -> PDF bytes, used for messages queued with attach_pdf
+        self.pdf_renderer = pdf_renderer
+        # Callables run at the start of every pass, e.g. to queue due digests
+        self.periodic_tasks = list(periodic_tasks)
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+
+        self._wake = threading.Event()
+        self._stopping = threading.Event()
+        self._executor = ThreadPoolExecutor(max_workers=pool.size, thread_name_prefix="email-outbox-smtp")
+
+    def wake(self):
+        """Start a send pass now instead of waiting for the next poll"""
+        self._wake.set()
+
+    def stop(self, timeout=None):
+        self._stopping.set()
+        self._wake.set()
+        self.join(timeout)
+        self._executor.shutdown(wait=True)
+        self.pool.close_all()
+
+    def _send_one(self, message):
+        telemetry.observe("email.queue_wait", time.time() - message["created_at"])
+        attachments = []
+        if message["attach_pdf"] and self.pdf_renderer:
+            with telemetry.span("email.render_pdf"):
+                attachments.append((f"{message['kind']}_report.pdf", self.pdf_renderer(message["html_body"])))
+
+        msg = build_message(
+            self.pool.sender_email, message["recipient"], message["subject"], message["html_body"], attachments
+        )
+        with telemetry.span("email.smtp_send", kind=message["kind"], attempt=message["attempts"]):
+            self.pool.send(msg)
+
+    def send_pending(self):
+        """Send one batch of due messages. Returns the number of messages attempted."""
+        batch = claim_batch(self.batch_size, max_attempts=self.max_attempts, db_path=self.db_path)
+        if not batch:
+            return 0
+
+        futures = [(message, self._executor.submit(self._send_one, message)) for message in batch]
+
+        sent_ids = []
+        failures = []
+        for message, future in futures:
+            try:
+                future.result()
+                sent_ids.append(message["id"])
+            except smtplib.SMTPAuthenticationError:
+                failures.append((message, "Email authentication failed. Please check your credentials."))
+            except Exception as e:
+                failures.append((message, f"{type(e).__name__}: {str(e)}"))
+
+        record_results(sent_ids, failures, self.max_attempts, self.backoff_base, self.backoff_max,
+                       db_path=self.db_path)
+
+        for message, error in failures:
+            logger.warning("Email %s to %s failed: %s", message["id"], message["recipient"], error)
+
+        return len(batch)
+
+    def run(self):
+        while not self._stopping.is_set():
+            for task in self.periodic_tasks:
+                try:
+                    task()
+                except Exception:
+                    logger.exception("Email outbox periodic task failed")
+
+            try:
+                # Keep draining while full batches come back
+                while self.send_pending() >= self.batch_size and not self._stopping.is_set():
+                    pass
+            except Exception:
+                logger.exception("Email outbox send pass failed")
+
+            self._wake.wait(self.poll_interval)
+            self._wake.clear()
@@ -0,0 +1,128 @@
+"""
+Head-teacher digest batching.
+
+When digest mode is on (``HEAD_TEACHER_DIGEST_MINUTES`` > 0), submissions that
+name a head teacher are collected in ``head_teacher_digest_items`` instead of
+producing one email each. Once a head teacher's oldest pending item is older
+than the window, all of their pending items are rendered into one combined
+summary and queued in the email outbox. Every due head teacher is rendered and
+queued in a single pass and a single transaction, and the outbox sender then
+delivers the whole batch over its pooled SMTP connections.
+"""
+
+import json
+import threading
+import time
+from datetime import datetime
+
+from . import email_outbox
+from . import report_templates
+from . import results_store
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS head_teacher_digest_items (
+    id INTEGER PRIMARY KEY,
+    recipient TEXT NOT NULL,
+    teacher_name TEXT NOT NULL,
+    teacher_email TEXT NOT NULL,
+    institution TEXT NOT NULL,
+    summary TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    outbox_id INTEGER
+);
+CREATE INDEX IF NOT EXISTS idx_digest_items_pending ON head_teacher_digest_items (outbox_id, recipient, created_at);
+"""
+
+_schema_paths = set()
+_schema_lock = threading.Lock()
+
+
+def connect(db_path=None):
+    """Connect to the results database and make sure the digest and outbox tables exist"""
+    conn = email_outbox.connect(db_path)
+    key = db_path or results_store.DEFAULT_DB_PATH
+    if key not in _schema_paths:
+        with _schema_lock:
+            if key not in _schema_paths:
+                conn.executescript(SCHEMA)
+                _schema_paths.add(key)
+    return conn
+
+
+def queue_digest_item(recipient, teacher_name, teacher_email, institution, avg_scores,
+                      total_score, max_score, percentage, proficiency_level,
+                      strengths, improvements, db_path=None):
+    """Add one teacher's results to their head teacher's next digest"""
+    summary = {
+        "avg_scores": {component: round(avg, 2) for component, avg in avg_scores.items()},
+        "total_score": round(total_score, 2),
+        "max_score": round(max_score, 2),
+        "percentage": round(percentage, 2),
+        "proficiency_level": proficiency_level,
+        "strengths": list(strengths),
+        "improvements": list(improvements),
+        "date": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+    }
+
+    conn = connect(db_path)
+    try:
+        with results_store.transaction(conn):
+            cursor = conn.execute(
+                "INSERT INTO head_teacher_digest_items "
+                "(recipient, teacher_name, teacher_email, institution, summary, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (recipient.strip().lower(), teacher_name, teacher_email, institution,
+                 json.dumps(summary, separators=(",", ":")), time.time())
+            )
+        return cursor.lastrowid
+    finally:
+        conn.close()
+
+
+def flush_due_digests(window_seconds, db_path=None):
+    """
+    Render and queue a digest for every head teacher whose oldest pending item is
+    older than the window. Returns the number of digests queued.
+    """
+    now = time.time()
+    conn = connect(db_path)
+    try:
+        with results_store.transaction(conn):
+            due = [
+                row["recipient"] for row in conn.execute(
+                    "SELECT recipient FROM head_teacher_digest_items WHERE outbox_id IS NULL "
+                    "GROUP BY recipient HAVING MIN(created_at) <= ?",
+                    (now - window_seconds,)
+                )
+            ]
+            if not due:
+                return 0
+
+            placeholders = ", ".join("?" for _ in due)
+            items_by_recipient = {}
+            for row in conn.execute(
+                f"SELECT * FROM head_teacher_digest_items WHERE outbox_id IS NULL AND recipient IN ({placeholders}) "
+                "ORDER BY created_at",
+                due
+            ):
+                item = dict(row)
+                item["summary"] = json.loads(item["summary"])
+                items_by_recipient.setdefault(item["recipient"], []).append(item)
+
+            for recipient, items in items_by_recipient.items():
+                count = len(items)
+                subject = f"Speaking Assessment Digest - {count} new report{'s' if count != 1 else ''}"
+                cursor = conn.execute(
+                    "INSERT INTO email_outbox (recipient, subject, html_body, kind, status, next_attempt_at, created_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (recipient, subject, report_templates.render_head_teacher_digest(items), "head_teacher_digest",
+                     email_outbox.PENDING, now, now)
+                )
+                conn.executemany(
+                    "UPDATE head_teacher_digest_items SET outbox_id = ? WHERE id = ?",
+                    [(cursor.lastrowid, item["id"]) for item in items]
+                )
+
+        return len(items_by_recipient)
+    finally:
+        conn.close()
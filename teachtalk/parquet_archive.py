@@ -0,0 +1,302 @@
+"""
+Partitioned Parquet archive of speaking test results for district-level analytics.
+
+Results are exported from the SQLite results store into a Hive-style dataset:
+
+    <dataset_dir>/institution=<name>/month=<YYYY-MM>/part-<first_id>-<last_id>.parquet
+
+Each export appends new files only for rows not yet archived. A batch is
+written one partition at a time, then the highest id of the batch is recorded
+in ``<dataset_dir>/_watermark`` (which dataset scans ignore). Files with ids
+above the watermark belong to a batch that never finished; they are deleted and
+that batch is exported again, so a crash mid-batch can neither skip nor
+duplicate rows. ``compact`` merges the small files of a partition into one.
+Scans read only the requested columns and prune partitions by institution and
+month.
+
+Usage:
+    python -m teachtalk.parquet_archive export /data/results_parquet
+    python -m teachtalk.parquet_archive compact /data/results_parquet
+    python -m teachtalk.parquet_archive average /data/results_parquet --column fluency_avg --start 2025-09 --end 2025-12
+
+Requires pyarrow (pip install -r requirements-parquet.txt).
+"""
+
+import argparse
+import os
+import re
+import uuid
+from datetime import datetime
+from urllib.parse import quote
+
+from . import results_store
+
+PART_FILE_PATTERN = re.compile(r"^part-(\d+)-(\d+)\.parquet$")
+
+# Highest id of the last fully written batch ("_" prefix: skipped by dataset scans)
+WATERMARK_FILE = "_watermark"
+
+# Columns stored in the data files (institution and month live in the partition path)
+ARCHIVE_COLUMNS = ["id"] + [c for c in results_store.RESULT_COLUMNS if c != "institution"]
+
+
+def _require_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.dataset
+        import pyarrow.parquet
+    except ImportError as e:
+        raise RuntimeError("The Parquet archive requires pyarrow. Install it with: pip install pyarrow") from e
+    return pyarrow
+
+
+def _schema():
+    pa = _require_pyarrow()
+    fields = []
+    for column in ARCHIVE_COLUMNS:
+        if column == "id" or column in results_store.INTEGER_COLUMNS:
+            fields.append(pa.field(column, pa.int64()))
+        elif column == "date":
+            fields.append(pa.field(column, pa.timestamp("s")))
+        elif column in results_store.TEXT_COLUMNS:
+            fields.append(pa.field(column, pa.string()))
+        else:
+            fields.append(pa.field(column, pa.float64()))
+    return pa.schema(fields)
+
+
+def _partition_dir(dataset_dir, institution, month):
+    # URI-encode so any institution name is a safe path segment; pyarrow decodes it on read
+    return os.path.join(dataset_dir, f"institution={quote(institution or '', safe='')}", f"month={month}")
+
+
+def _iter_part_files(dataset_dir):
+    """Yield (partition_dir, file_name, first_id, last_id) for every data file"""
+    for root, _dirs, files in os.walk(dataset_dir):
+        for file_name in files:
+            match = PART_FILE_PATTERN.match(file_name)
+            if match:
+                yield root, file_name, int(match.group(1)), int(match.group(2))
+
+
+def archived_watermark(dataset_dir):
+    """Highest results id of the last completely written batch (0 if empty)"""
+    try:
+        with open(os.path.join(dataset_dir, WATERMARK_FILE), encoding="utf-8") as f:
+            return int(f.read().strip() or 0)
+    except FileNotFoundError:
+        # Archives written before the watermark file: the file names are the record
+        return max((last_id for _root, _name, _first, last_id in _iter_part_files(dataset_dir)), default=0)
+
+
+def _write_watermark(dataset_dir, last_id):
+    tmp_path = os.path.join(dataset_dir, f".tmp-{uuid.uuid4().hex}")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(str(last_id))
+    os.replace(tmp_path, os.path.join(dataset_dir, WATERMARK_FILE))
+
+
+def _discard_unfinished(dataset_dir, watermark):
+    """Remove files of a batch interrupted before its watermark was written; returns how many"""
+    removed = 0
+    for root, file_name, _first_id, last_id in list(_iter_part_files(dataset_dir)):
+        if last_id > watermark:
+            os.remove(os.path.join(root, file_name))
+            removed += 1
+    return removed
+
+
+def _write_table(table, partition_dir, first_id, last_id):
+    """Write atomically: write to a temp name, then rename into place"""
+    pq = _require_pyarrow().parquet
+    os.makedirs(partition_dir, exist_ok=True)
+    final_path = os.path.join(partition_dir, f"part-{first_id}-{last_id}.parquet")
+    tmp_path = os.path.join(partition_dir, f".tmp-{uuid.uuid4().hex}")
+    pq.write_table(table, tmp_path, compression="zstd")
+    os.replace(tmp_path, final_path)
+    return final_path
+
+
+def _write_partitions(dataset_dir, rows):
+    """Group rows (dicts) by institution and month and write one file per partition"""
+    pa = _require_pyarrow()
+    schema = _schema()
+
+    partitions = {}
+    for row in rows:
+        key = (row["institution"], row["date"][:7])
+        partitions.setdefault(key, []).append(row)
+
+    written = []
+    for (institution, month), partition_rows in partitions.items():
+        columns = {column: [] for column in ARCHIVE_COLUMNS}
+        for row in partition_rows:
+            for column in ARCHIVE_COLUMNS:
+                value = row[column]
+                if column == "date":
+                    value = datetime.strptime(value[:19], "%Y-%m-%d %H:%M:%S")
+                columns[column].append(value)
+        table = pa.Table.from_pydict(columns, schema=schema)
+        first_id = partition_rows[0]["id"]
+        last_id = partition_rows[-1]["id"]
+        written.append(_write_table(table, _partition_dir(dataset_dir, institution, month), first_id, last_id))
+
+    return written
+
+
+def export_results(dataset_dir, db_path=None, batch_size=50000):
+    """
+    Append results not yet archived to the Parquet dataset.
+
+    Rows are read from the results store in id order, batch_size rows at a time,
+    so memory stays bounded regardless of history size. Returns the number of
+    rows exported.
+    """
+    _require_pyarrow()
+    os.makedirs(dataset_dir, exist_ok=True)
+    watermark = archived_watermark(dataset_dir)
+    _discard_unfinished(dataset_dir, watermark)
+
+    conn = results_store.connect(db_path)
+    try:
+        cursor = conn.execute(
+            f"SELECT id, institution, {', '.join(ARCHIVE_COLUMNS[1:])} FROM results WHERE id > ? ORDER BY id",
+            (watermark,)
+        )
+        exported = 0
+        while True:
+            batch = cursor.fetchmany(batch_size)
+            if not batch:
+                break
+            _write_partitions(dataset_dir, [dict(row) for row in batch])
+            # Only now is the whole batch on disk
+            _write_watermark(dataset_dir, batch[-1]["id"])
+            exported += len(batch)
+        return exported
+    finally:
+        conn.close()
+
+
+def compact(dataset_dir, min_files=2):
+    """
+    Merge the data files of each partition into a single file.
+
+    Files whose id range is already covered by another file (left behind by an
+    interrupted compaction) are removed. Returns the number of partitions compacted.
+    """
+    pa = _require_pyarrow()
+    pq = pa.parquet
+
+    # Never merge files of an unfinished batch into files below the watermark
+    _discard_unfinished(dataset_dir, archived_watermark(dataset_dir))
+
+    by_partition = {}
+    for root, file_name, first_id, last_id in _iter_part_files(dataset_dir):
+        by_partition.setdefault(root, []).append((first_id, last_id, file_name))
+
+    compacted = 0
+    for partition_dir, files in by_partition.items():
+        # Drop files fully contained in a wider file
+        files.sort(key=lambda f: (f[0], -f[1]))
+        kept = []
+        for first_id, last_id, file_name in files:
+            if kept and first_id >= kept[-1][0] and last_id <= kept[-1][1]:
+                os.remove(os.path.join(partition_dir, file_name))
+                continue
+            kept.append((first_id, last_id, file_name))
+
+        if len(kept) < min_files:
+            continue
+
+        tables = [pq.read_table(os.path.join(partition_dir, file_name)) for _f, _l, file_name in kept]
+        merged = pa.concat_tables(tables).sort_by("id")
+        first_id = kept[0][0]
+        last_id = max(last for _first, last, _name in kept)
+        merged_path = _write_table(merged, partition_dir, first_id, last_id)
+        for _first, _last, file_name in kept:
+            path = os.path.join(partition_dir, file_name)
+            if path != merged_path:
+                os.remove(path)
+        compacted += 1
+
+    return compacted
+
+
+def open_dataset(dataset_dir):
+    """Open the archive as a pyarrow dataset with Hive partitioning"""
+    pa = _require_pyarrow()
+    # Explicit string types so institution names like "2024" are not inferred as integers
+    partitioning = pa.dataset.partitioning(
+        pa.schema([("institution", pa.string()), ("month", pa.string())]), flavor="hive"
+    )
+    return pa.dataset.dataset(dataset_dir, format="parquet", partitioning=partitioning)
+
+
+def scan(dataset_dir, columns, institution=None, start_month=None, end_month=None):
+    """
+    Read only the given columns, pruning partitions by institution and month range
+    (months as 'YYYY-MM', inclusive). Returns a pyarrow Table.
+    """
+    ds = _require_pyarrow().dataset
+    dataset = open_dataset(dataset_dir)
+
+    expression = None
+    conditions = []
+    if institution is not None:
+        conditions.append(ds.field("institution") == institution)
+    if start_month:
+        conditions.append(ds.field("month") >= start_month)
+    if end_month:
+        conditions.append(ds.field("month") <= end_month)
+    for condition in conditions:
+        expression = condition if expression is None else expression & condition
+
+    return dataset.to_table(columns=columns, filter=expression)
+
+
+def average_by_institution(dataset_dir, column="fluency_avg", start_month=None, end_month=None):
+    """Average of a score column per institution, e.g. average fluency this term"""
+    table = scan(dataset_dir, ["institution", column], start_month=start_month, end_month=end_month)
+    grouped = table.group_by("institution").aggregate([(column, "mean"), (column, "count")])
+    return sorted(
+        (
+            {"institution": row["institution"], "mean": row[f"{column}_mean"], "count": row[f"{column}_count"]}
+            for row in grouped.to_pylist()
+        ),
+        key=lambda r: r["institution"]
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Parquet archive of speaking test results")
+    parser.add_argument("--db", default=results_store.DEFAULT_DB_PATH, help="Path to the results database")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    export_parser = subparsers.add_parser("export", help="Append new results to the archive")
+    export_parser.add_argument("dataset_dir")
+    export_parser.add_argument("--batch-size", type=int, default=50000)
+
+    compact_parser = subparsers.add_parser("compact", help="Merge small files within each partition")
+    compact_parser.add_argument("dataset_dir")
+
+    average_parser = subparsers.add_parser("average", help="Average a score column per institution")
+    average_parser.add_argument("dataset_dir")
+    average_parser.add_argument("--column", default="fluency_avg")
+    average_parser.add_argument("--start", help="First month (YYYY-MM)")
+    average_parser.add_argument("--end", help="Last month (YYYY-MM)")
+
+    args = parser.parse_args(argv)
+
+    if args.command == "export":
+        exported = export_results(args.dataset_dir, db_path=args.db, batch_size=args.batch_size)
+        print(f"Exported {exported} new results to {args.dataset_dir}")
+    elif args.command == "compact":
+        compacted = compact(args.dataset_dir)
+        print(f"Compacted {compacted} partitions")
+    elif args.command == "average":
+        for row in average_by_institution(args.dataset_dir, args.column, args.start, args.end):
+            print(f"{row['institution']}\t{row['mean']:.2f}\t(n={row['count']})")
+
+
+if __name__ == "__main__":
+    main()
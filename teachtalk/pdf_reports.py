@@ -0,0 +1,197 @@
+"""
+PDF copies of the emailed reports.
+
+HTML reports are converted to PDF in a pool of worker processes so the
+conversion never runs on a Streamlit session thread. Output is cached on disk by
+the SHA-256 of the report HTML, so the same report is only ever rendered once.
+The outbox sender uses ``render_pdf`` to attach PDFs to queued emails, and
+``render_institution_pdfs`` renders a whole institution's reports in bulk.
+
+Usage (bulk mode):
+    python -m teachtalk.pdf_reports "Riverside High" --out ./riverside_pdfs
+
+Requires xhtml2pdf (pip install -r requirements-pdf.txt).
+"""
+
+import argparse
+import hashlib
+import logging
+import multiprocessing
+import os
+import re
+import tempfile
+import threading
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from io import BytesIO
+
+from . import report_templates
+from . import results_store
+
+DEFAULT_CACHE_DIR = os.path.join(tempfile.gettempdir(), "speaking_test_pdfs")
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _html_to_pdf(html):
+    """Convert report HTML to PDF bytes (runs in a worker process)"""
+    try:
+        from xhtml2pdf import pisa
+    except ImportError as e:
+        raise RuntimeError("PDF reports require xhtml2pdf. Install it with: pip install xhtml2pdf") from e
+
+    # xhtml2pdf logs every CSS property it does not support
+    logging.getLogger("xhtml2pdf").setLevel(logging.ERROR)
+
+    output = BytesIO()
+    status = pisa.CreatePDF(html, dest=output, encoding="utf-8")
+    if status.err:
+        raise RuntimeError(f"PDF conversion failed with {status.err} error(s)")
+    return output.getvalue()
+
+
+def get_pool(max_workers=None):
+    """Process pool shared by every caller in this process (created on first use)"""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                # spawn: never fork a process that is running Streamlit's threads
+                _pool = ProcessPoolExecutor(
+                    max_workers=max_workers or max(1, min(4, (os.cpu_count() or 2) - 1)),
+                    mp_context=multiprocessing.get_context("spawn")
+                )
+    return _pool
+
+
+def content_hash(html):
+    return hashlib.sha256(html.encode("utf-8")).hexdigest()
+
+
+def _cache_path(cache_dir, digest):
+    return os.path.join(cache_dir, digest[:2], f"{digest}.pdf")
+
+
+def _write_atomic(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def render_pdf(html, cache_dir=None):
+    """Return the PDF for a report, rendering it in the process pool on a cache miss"""
+    cache_dir = cache_dir or DEFAULT_CACHE_DIR
+    path = _cache_path(cache_dir, content_hash(html))
+
+    if os.path.exists(path):
+        with open(path, "rb") as f:
+            return f.read()
+
+    pdf = get_pool().submit(_html_to_pdf, html).result()
+    _write_atomic(path, pdf)
+    return pdf
+
+
+def render_pdfs(htmls, cache_dir=None):
+    """
+    Render many reports concurrently across the pool.
+
+    Returns {content_hash: cache_path}; reports already in the cache are not re-rendered.
+    """
+    cache_dir = cache_dir or DEFAULT_CACHE_DIR
+    paths = {}
+    pending = {}
+
+    for html in htmls:
+        digest = content_hash(html)
+        path = _cache_path(cache_dir, digest)
+        paths[digest] = path
+        if digest not in pending and not os.path.exists(path):
+            pending[digest] = get_pool().submit(_html_to_pdf, html)
+
+    for digest, future in pending.items():
+        _write_atomic(paths[digest], future.result())
+
+    return paths
+
+
+def report_html_from_result(row):
+    """Rebuild a teacher's report HTML from a stored results row"""
+    avg_scores = {}
+    for component, column in results_store.ROLLUP_COMPONENTS.items():
+        if component != "Percentage" and row[column] > 0:
+            avg_scores[component] = row[column]
+
+    strengths = [component for component, avg in avg_scores.items() if avg >= 4.0]
+    improvements = [component for component, avg in avg_scores.items() if avg < 3.0]
+
+    return report_templates.render_teacher_report(
+        row["name"], row["institution"], row["email"], avg_scores,
+        row["total_score"], row["max_score"], row["percentage"], row["proficiency_level"],
+        strengths, improvements,
+        now=datetime.strptime(row["date"][:19], "%Y-%m-%d %H:%M:%S")
+    )
+
+
+def _safe_filename(text):
+    return re.sub(r"[^A-Za-z0-9._-]+", "_", text).strip("_") or "report"
+
+
+def render_institution_pdfs(institution, out_dir, start_date=None, end_date=None,
+                            db_path=None, cache_dir=None, batch_size=200):
+    """
+    Render PDF reports for every result of an institution into out_dir.
+
+    Results are processed batch_size at a time so memory stays bounded.
+    Returns the list of written file paths.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    written = []
+
+    where, params = results_store.results_filter(
+        institution=institution, start_date=start_date, end_date=end_date
+    )
+    conn = results_store.connect(db_path)
+    try:
+        cursor = conn.execute(f"SELECT * FROM results{where} ORDER BY date, id", params)
+        while True:
+            batch = [dict(row) for row in cursor.fetchmany(batch_size)]
+            if not batch:
+                break
+
+            htmls = [report_html_from_result(row) for row in batch]
+            paths = render_pdfs(htmls, cache_dir=cache_dir)
+
+            for row, html in zip(batch, htmls):
+                file_name = f"{_safe_filename(row['name'])}_{row['date'][:10]}_{row['id']}.pdf"
+                out_path = os.path.join(out_dir, file_name)
+                with open(paths[content_hash(html)], "rb") as src:
+                    _write_atomic(out_path, src.read())
+                written.append(out_path)
+    finally:
+        conn.close()
+
+    return written
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Render PDF reports for an institution")
+    parser.add_argument("institution")
+    parser.add_argument("--out", required=True, help="Directory to write PDFs into")
+    parser.add_argument("--db", default=results_store.DEFAULT_DB_PATH, help="Path to the results database")
+    parser.add_argument("--start", help="First date to include (YYYY-MM-DD)")
+    parser.add_argument("--end", help="Last date to include (YYYY-MM-DD)")
+    parser.add_argument("--workers", type=int, help="Number of worker processes")
+    args = parser.parse_args(argv)
+
+    get_pool(args.workers)
+    written = render_institution_pdfs(args.institution, args.out, args.start, args.end, db_path=args.db)
+    print(f"Wrote {len(written)} PDF reports to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,960 @@
+"""
+Compiled, cached HTML templates for the emailed reports.
+
+The page skeletons and fragments are ``string.Template`` texts compiled once at
+import into literal chunks and placeholder names. The stylesheet shared by the teacher and head-teacher reports is
+rendered once per proficiency colour and cached, so each report only fills in
+its per-teacher fragments.
+"""
+
+from datetime import datetime
+from functools import lru_cache
+from string import Template
+
+# Head-teacher reports use a fixed accent colour for headings
+ADMIN_ACCENT = "#2196F3"
+
+
+class CompiledTemplate:
+    """
+    A ``string.Template`` pre-split into literal chunks and placeholder names.
+
+    Parsing happens once; rendering is a single join with no regex scan of the
+    (large) template text.
+    """
+
+    def __init__(self, text):
+        self.literals = []
+        self.names = []
+
+        template = Template(text)
+        position = 0
+        literal = []
+        for match in template.pattern.finditer(text):
+            literal.append(text[position:match.start()])
+            position = match.end()
+            if match.group("escaped") is not None:
+                literal.append(template.delimiter)
+                continue
+            name = match.group("named") or match.group("braced")
+            if name is None:
+                raise ValueError(f"Invalid placeholder in template at offset {match.start()}")
+            self.literals.append("".join(literal))
+            self.names.append(name)
+            literal = []
+        literal.append(text[position:])
+        self.literals.append("".join(literal))
+
+    def substitute(self, **values):
+        literals = self.literals
+        parts = [literals[0]]
+        for index, name in enumerate(self.names):
+            parts.append(str(values[name]))
+            parts.append(literals[index + 1])
+        return "".join(parts)
+
+# === STYLESHEETS ===
+
+BASE_CSS = CompiledTemplate("""
+            body {
+                font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif;
+                line-height: 1.6;
+                color: #333;
+                max-width: 800px;
+                margin: 0 auto;
+                padding: 20px;
+                background-color: #f5f5f5;
+            }
+            .container {
+                background-color: white;
+                padding: 30px;
+                border-radius: 10px;
+                box-shadow: 0 2px 10px rgba(0,0,0,0.1);
+            }
+            .header {
+                text-align: center;
+                border-bottom: 3px solid $accent;
+                padding-bottom: 20px;
+                margin-bottom: 30px;
+            }
+            .header h1 {
+                color: $accent;
+                margin: 0;
+                font-size: 32px;
+            }
+            .score-summary {
+                background: linear-gradient(135deg, ${color}22 0%, ${color}44 100%);
+                padding: 25px;
+                border-radius: 10px;
+                margin: 20px 0;
+                text-align: center;
+            }
+            .score-summary h2 {
+                color: $color;
+                margin: 0 0 15px 0;
+                font-size: 28px;
+            }
+            .score-metrics {
+                display: flex;
+                justify-content: space-around;
+                margin-top: 20px;
+            }
+            .metric {
+                text-align: center;
+            }
+            .metric-value {
+                font-size: 36px;
+                font-weight: bold;
+                color: $color;
+            }
+            .metric-label {
+                font-size: 14px;
+                color: #666;
+                margin-top: 5px;
+            }
+            .component {
+                margin: 15px 0;
+            }
+            .component-header {
+                display: flex;
+                justify-content: space-between;
+                margin-bottom: 5px;
+                font-weight: 600;
+            }
+            .progress-bar {
+                background-color: #e0e0e0;
+                border-radius: 10px;
+                height: 30px;
+                overflow: hidden;
+            }
+            .progress-fill {
+                height: 100%;
+                display: flex;
+                align-items: center;
+                justify-content: center;
+                color: white;
+                font-weight: bold;
+                transition: width 0.3s ease;
+            }
+            .section {
+                margin: 30px 0;
+            }
+            .section h3 {
+                color: $accent;
+                border-left: 4px solid $accent;
+                padding-left: 15px;
+                margin-bottom: 15px;
+            }
+            .info-row {
+                display: flex;
+                justify-content: space-between;
+                padding: 10px 0;
+                border-bottom: 1px solid #eee;
+            }
+            .info-label {
+                font-weight: 600;
+                color: #666;
+            }
+            .footer {
+                text-align: center;
+                margin-top: 40px;
+                padding-top: 20px;
+                border-top: 2px solid #e0e0e0;
+                color: #666;
+                font-size: 14px;
+            }
+""")
+
+TEACHER_CSS = CompiledTemplate("""
+            .feedback-box {
+                background-color: #f9f9f9;
+                padding: 20px;
+                border-radius: 8px;
+                border-left: 4px solid $color;
+                margin: 15px 0;
+            }
+            .tip {
+                background-color: #e8f5e9;
+                padding: 15px;
+                border-radius: 5px;
+                margin: 10px 0;
+                border-left: 3px solid #4CAF50;
+            }
+            .tip strong {
+                color: #2e7d32;
+            }
+            ul {
+                margin: 10px 0;
+                padding-left: 25px;
+            }
+            li {
+                margin: 5px 0;
+            }
+""")
+
+HEAD_TEACHER_CSS = CompiledTemplate("""
+            .header p {
+                color: #666;
+                margin-top: 10px;
+            }
+            .admin-badge {
+                background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
+                color: white;
+                padding: 8px 20px;
+                border-radius: 20px;
+                display: inline-block;
+                font-size: 14px;
+                margin-top: 10px;
+            }
+            .score-metrics {
+                flex-wrap: wrap;
+            }
+            .metric {
+                min-width: 120px;
+                margin: 10px;
+            }
+            .info-card {
+                background-color: #f9f9f9;
+                padding: 20px;
+                border-radius: 8px;
+                margin: 15px 0;
+                border-left: 4px solid $accent;
+            }
+            .recommendation-box {
+                background-color: #fff3cd;
+                border-left: 4px solid #ffc107;
+                padding: 20px;
+                border-radius: 5px;
+                margin: 15px 0;
+            }
+            .recommendation-box h4 {
+                color: #856404;
+                margin-top: 0;
+            }
+            .strength-box {
+                background-color: #d4edda;
+                border-left: 4px solid #28a745;
+                padding: 20px;
+                border-radius: 5px;
+                margin: 15px 0;
+            }
+            .strength-box h4 {
+                color: #155724;
+                margin-top: 0;
+            }
+            .table {
+                width: 100%;
+                border-collapse: collapse;
+                margin: 20px 0;
+            }
+            .table th, .table td {
+                padding: 12px;
+                text-align: left;
+                border-bottom: 1px solid #ddd;
+            }
+            .table th {
+                background-color: $accent;
+                color: white;
+            }
+            .table tr:hover {
+                background-color: #f5f5f5;
+            }
+""")
+
+
+@lru_cache(maxsize=None)
+def teacher_stylesheet(color):
+    """Stylesheet for a teacher report in the given proficiency colour (rendered once per colour)"""
+    return BASE_CSS.substitute(color=color, accent=color) + TEACHER_CSS.substitute(color=color)
+
+
+@lru_cache(maxsize=None)
+def head_teacher_stylesheet(color):
+    """Stylesheet for a head-teacher report in the given proficiency colour (rendered once per colour)"""
+    return BASE_CSS.substitute(color=color, accent=ADMIN_ACCENT) + HEAD_TEACHER_CSS.substitute(accent=ADMIN_ACCENT)
+
+
+# === SHARED HELPERS ===
+
+def proficiency_style(percentage):
+    """Colour and emoji for an overall percentage"""
+    if percentage >= 90:
+        return "#00C851", "🌟"
+    elif percentage >= 75:
+        return "#33B5E5", "🎯"
+    elif percentage >= 60:
+        return "#FFB733", "📈"
+    elif percentage >= 45:
+        return "#FF8800", "🌱"
+    else:
+        return "#FF4444", "🔰"
+
+
+def bar_color(avg):
+    """Progress bar colour for a component average (out of 5)"""
+    if avg >= 4.5:
+        return "#00C851"
+    elif avg >= 3.5:
+        return "#33B5E5"
+    elif avg >= 2.5:
+        return "#FFB733"
+    else:
+        return "#FF8800"
+
+
+# === TEACHER REPORT ===
+
+TEACHER_REPORT = CompiledTemplate("""
+    <!DOCTYPE html>
+    <html>
+    <head>
+        <style>$stylesheet
+        </style>
+    </head>
+    <body>
+        <div class="container">
+            <div class="header">
+                <h1>$emoji Speaking Proficiency Test Report</h1>
+                <p style="color: #666; margin-top: 10px;">Assessment Date: $date</p>
+            </div>
+
+            <div class="section">
+                <h3>📋 Participant Information</h3>
+                <div class="info-row">
+                    <span class="info-label">Name:</span>
+                    <span>$name</span>
+                </div>
+                <div class="info-row">
+                    <span class="info-label">Institution:</span>
+                    <span>$institution</span>
+                </div>
+                <div class="info-row">
+                    <span class="info-label">Email:</span>
+                    <span>$email</span>
+                </div>
+            </div>
+
+            <div class="score-summary">
+                <h2>Overall Performance: $proficiency_level</h2>
+                <div class="score-metrics">
+                    <div class="metric">
+                        <div class="metric-value">$total_score</div>
+                        <div class="metric-label">Total Score (out of $max_score)</div>
+                    </div>
+                    <div class="metric">
+                        <div class="metric-value">$percentage%</div>
+                        <div class="metric-label">Percentage</div>
+                    </div>
+                    <div class="metric">
+                        <div class="metric-value">$emoji</div>
+                        <div class="metric-label">$proficiency_level</div>
+                    </div>
+                </div>
+            </div>
+
+            <div class="section">
+                <h3>📊 Component Breakdown</h3>
+$components
+            </div>
+
+            <div class="section">
+                <h3>✅ Your Strengths</h3>
+$strengths
+            </div>
+
+            <div class="section">
+                <h3>🎯 Areas for Growth</h3>
+$improvements
+            </div>
+
+            <div class="section">
+                <h3>📚 Daily Practice Recommendations</h3>
+                <div class="feedback-box">
+                    <h4>Daily Routines (10-15 minutes)</h4>
+                    <ul>
+                        <li>Record 2-minute explanations of simple topics</li>
+                        <li>Practice classroom instructions aloud</li>
+                        <li>Read educational content aloud</li>
+                        <li>Shadow native speakers from videos</li>
+                        <li>Review and compare your recordings</li>
+                    </ul>
+
+                    <h4>Weekly Goals</h4>
+                    <ul>
+                        <li>Join a speaking practice group</li>
+                        <li>Record a 5-minute lesson segment</li>
+                        <li>Practice with a colleague and give feedback</li>
+                        <li>Watch teaching videos and analyze speech</li>
+                        <li>Set specific improvement targets</li>
+                    </ul>
+                </div>
+            </div>
+
+            <div class="section">
+                <h3>🎓 Next Steps</h3>
+                <div class="feedback-box">
+                    <ol>
+                        <li>Review your component scores and focus areas</li>
+                        <li>Implement the personalized tips in your daily practice</li>
+                        <li>Track your progress by retaking the test in 4-6 weeks</li>
+                        <li>Share your goals with a colleague for accountability</li>
+                    </ol>
+                    <p style="margin-top: 15px;"><em>Remember: Effective communication is a journey. Every practice session brings you closer to becoming a more confident and effective educator!</em></p>
+                </div>
+            </div>
+
+            <div class="footer">
+                <p><strong>Speaking Proficiency Assessment System v2.0</strong></p>
+                <p>This report was automatically generated on $generated_at</p>
+                <p>Keep practicing, stay confident, and celebrate every improvement! 🌟</p>
+            </div>
+        </div>
+    </body>
+    </html>
+    """)
+
+TEACHER_COMPONENT = CompiledTemplate("""
+                <div class="component">
+                    <div class="component-header">
+                        <span>$component</span>
+                        <span>$avg/5</span>
+                    </div>
+                    <div class="progress-bar">
+                        <div class="progress-fill" style="width: $width%; background-color: $bar_color;">
+                            $label%
+                        </div>
+                    </div>
+                </div>
+""")
+
+TEACHER_STRENGTHS = CompiledTemplate("""
+                <div class="feedback-box">
+                    <p><strong>Excellent performance in:</strong> $strengths</p>
+                    <p>These areas showcase your natural abilities. Continue to leverage these skills in your teaching!</p>
+                </div>
+""")
+
+TEACHER_NO_STRENGTHS = """
+                <div class="feedback-box">
+                    <p>Keep working on all areas to identify your strengths. Consistent practice will help you discover where you excel!</p>
+                </div>
+"""
+
+TEACHER_IMPROVEMENTS = CompiledTemplate("""
+                <div class="feedback-box">
+                    <p><strong>Focus on:</strong> $improvements</p>
+                    <p>Targeted practice in these areas will significantly improve your overall performance.</p>
+                </div>
+
+                <h4 style="margin-top: 20px;">Personalized Development Tips:</h4>
+""")
+
+TEACHER_NO_IMPROVEMENTS = """
+                <div class="feedback-box">
+                    <p>Great job! You're performing well across all areas. Continue practicing to maintain your skills!</p>
+                </div>
+"""
+
+TEACHER_TIPS = {
+    "Accuracy": """
+                <div class="tip">
+                    <strong>Accuracy</strong>
+                    <ul>
+                        <li>Listen carefully to the complete sentence before speaking</li>
+                        <li>Practice repeating slowly and clearly rather than rushing</li>
+                        <li>Record yourself and compare with the original</li>
+                        <li>Focus on pronouncing each word distinctly</li>
+                    </ul>
+                </div>
+""",
+    "Fluency": """
+                <div class="tip">
+                    <strong>Fluency</strong>
+                    <ul>
+                        <li>Aim for 120-160 words per minute (natural conversational pace)</li>
+                        <li>Reduce filler words ('um', 'uh', 'like') through awareness</li>
+                        <li>Practice speaking on topics for 60 seconds without stopping</li>
+                        <li>Record yourself daily to track improvement</li>
+                    </ul>
+                </div>
+""",
+    "Intonation": """
+                <div class="tip">
+                    <strong>Intonation</strong>
+                    <ul>
+                        <li>Vary your pitch for questions (rising) and statements (falling)</li>
+                        <li>Emphasize key words in sentences</li>
+                        <li>Read children's stories aloud with expression to practice</li>
+                        <li>Listen to skilled speakers and mimic their patterns</li>
+                    </ul>
+                </div>
+""",
+    "Vocabulary": """
+                <div class="tip">
+                    <strong>Vocabulary</strong>
+                    <ul>
+                        <li>Learn 3-5 new academic/professional words weekly</li>
+                        <li>Use synonyms when explaining familiar concepts</li>
+                        <li>Read educational articles and note useful phrases</li>
+                        <li>Practice using varied vocabulary in daily conversations</li>
+                    </ul>
+                </div>
+""",
+    "Grammar": """
+                <div class="tip">
+                    <strong>Grammar</strong>
+                    <ul>
+                        <li>Speak in complete sentences with clear subjects and verbs</li>
+                        <li>Practice organizing your thoughts before speaking</li>
+                        <li>Review basic sentence structure patterns</li>
+                        <li>Listen to your recordings to identify grammar patterns</li>
+                    </ul>
+                </div>
+""",
+}
+
+
+def render_teacher_report(name, institution, email, avg_scores, total_score, max_score,
+                          percentage, proficiency_level, strengths, improvements, now=None):
+    """Render the teacher's emailed report"""
+    now = now or datetime.now()
+    color, emoji = proficiency_style(percentage)
+
+    components = "".join(
+        TEACHER_COMPONENT.substitute(
+            component=component,
+            avg=f"{avg:.1f}",
+            width=(avg / 5) * 100,
+            bar_color=bar_color(avg),
+            label=f"{(avg / 5) * 100:.0f}"
+        )
+        for component, avg in avg_scores.items()
+    )
+
+    if strengths:
+        strengths_html = TEACHER_STRENGTHS.substitute(strengths=", ".join(strengths))
+    else:
+        strengths_html = TEACHER_NO_STRENGTHS
+
+    if improvements:
+        improvements_html = TEACHER_IMPROVEMENTS.substitute(improvements=", ".join(improvements))
+        improvements_html += "".join(TEACHER_TIPS.get(area, "") for area in improvements)
+    else:
+        improvements_html = TEACHER_NO_IMPROVEMENTS
+
+    return TEACHER_REPORT.substitute(
+        stylesheet=teacher_stylesheet(color),
+        emoji=emoji,
+        date=now.strftime("%B %d, %Y"),
+        name=name,
+        institution=institution,
+        email=email,
+        proficiency_level=proficiency_level,
+        total_score=f"{total_score:.1f}",
+        max_score=f"{max_score:.0f}",
+        percentage=f"{percentage:.1f}",
+        components=components,
+        strengths=strengths_html,
+        improvements=improvements_html,
+        generated_at=now.strftime("%B %d, %Y at %I:%M %p")
+    )
+
+
+# === HEAD TEACHER REPORT ===
+
+HEAD_TEACHER_REPORT = CompiledTemplate("""
+    <!DOCTYPE html>
+    <html>
+    <head>
+        <style>$stylesheet
+        </style>
+    </head>
+    <body>
+        <div class="container">
+            <div class="header">
+                <h1>📊 Speaking Proficiency Assessment Report</h1>
+                <div class="admin-badge">👨‍💼 Head Teacher Copy</div>
+                <p>Assessment Date: $date</p>
+            </div>
+
+            <div class="section">
+                <h3>👤 Teacher Information</h3>
+                <div class="info-card">
+                    <div class="info-row">
+                        <span class="info-label">Teacher Name:</span>
+                        <span><strong>$name</strong></span>
+                    </div>
+                    <div class="info-row">
+                        <span class="info-label">Institution:</span>
+                        <span>$institution</span>
+                    </div>
+                    <div class="info-row">
+                        <span class="info-label">Email:</span>
+                        <span>$teacher_email</span>
+                    </div>
+                    <div class="info-row">
+                        <span class="info-label">Assessment Date:</span>
+                        <span>$generated_at</span>
+                    </div>
+                </div>
+            </div>
+
+            <div class="score-summary">
+                <h2>$emoji Overall Performance: $proficiency_level</h2>
+                <div class="score-metrics">
+                    <div class="metric">
+                        <div class="metric-value">$total_score</div>
+                        <div class="metric-label">Total Score (out of $max_score)</div>
+                    </div>
+                    <div class="metric">
+                        <div class="metric-value">$percentage%</div>
+                        <div class="metric-label">Percentage</div>
+                    </div>
+                    <div class="metric">
+                        <div class="metric-value">$proficiency_level</div>
+                        <div class="metric-label">Proficiency Level</div>
+                    </div>
+                </div>
+            </div>
+
+            <div class="section">
+                <h3>📊 Detailed Performance Breakdown</h3>
+                <table class="table">
+                    <thead>
+                        <tr>
+                            <th>Component</th>
+                            <th>Score (out of 5)</th>
+                            <th>Percentage</th>
+                            <th>Status</th>
+                        </tr>
+                    </thead>
+                    <tbody>
+$component_rows
+                    </tbody>
+                </table>
+            </div>
+
+            <div class="section">
+                <h3>📈 Component Analysis Chart</h3>
+$component_bars
+            </div>
+$strengths$improvements
+            <div class="section">
+                <h3>📋 Summary Assessment</h3>
+                <div class="info-card">
+                    <table class="table">
+                        <tr>
+                            <th>Assessment Part</th>
+                            <th>Completion</th>
+                            <th>Average Score</th>
+                        </tr>
+                        <tr>
+                            <td>Part 1: Sentence Repetition</td>
+                            <td>$part1_count/5 sentences</td>
+                            <td>$part1_avg/5</td>
+                        </tr>
+                        <tr>
+                            <td>Part 2: Question Responses</td>
+                            <td>$part2_count/3 questions</td>
+                            <td>$part2_avg/5</td>
+                        </tr>
+                        <tr>
+                            <td>Part 3: Free Explanation</td>
+                            <td>$part3_status</td>
+                            <td>$part3_score/5</td>
+                        </tr>
+                    </table>
+                </div>
+            </div>
+
+            <div class="section">
+                <h3>💡 Administrative Recommendations</h3>
+                <div class="info-card">
+$recommendations
+                </div>
+            </div>
+
+            <div class="section">
+                <h3>📅 Follow-up Recommendations</h3>
+                <div class="info-card">
+                    <ul>
+                        <li><strong>Next Assessment:</strong> Schedule reassessment in 4-6 months to track progress</li>
+                        <li><strong>Development Plan:</strong> Create personalized improvement plan based on focus areas</li>
+                        <li><strong>Resources:</strong> Provide access to recommended training materials and workshops</li>
+                        <li><strong>Monitoring:</strong> Schedule quarterly check-ins to review progress and adjust support</li>
+                    </ul>
+                </div>
+            </div>
+
+            <div class="footer">
+                <p><strong>Speaking Proficiency Assessment System v2.0</strong></p>
+                <p><em>Administrative Report - Confidential</em></p>
+                <p>This report was automatically generated on $generated_at</p>
+                <p style="margin-top: 15px; font-size: 12px;">
+                    Note: This assessment is designed to support teacher development and should be used
+                    constructively as part of a comprehensive professional development program.
+                </p>
+            </div>
+        </div>
+    </body>
+    </html>
+    """)
+
+HEAD_TEACHER_COMPONENT_ROW = CompiledTemplate("""
+                        <tr>
+                            <td><strong>$component</strong></td>
+                            <td>$avg</td>
+                            <td>$percentage%</td>
+                            <td style="color: $status_color;">$status</td>
+                        </tr>
+""")
+
+HEAD_TEACHER_COMPONENT_BAR = CompiledTemplate("""
+                <div class="component">
+                    <div class="component-header">
+                        <span>$component</span>
+                        <span>$avg/5 ($percentage%)</span>
+                    </div>
+                    <div class="progress-bar">
+                        <div class="progress-fill" style="width: $width%; background-color: $bar_color;">
+                        </div>
+                    </div>
+                </div>
+""")
+
+HEAD_TEACHER_STRENGTHS = CompiledTemplate("""
+            <div class="section">
+                <div class="strength-box">
+                    <h4>✅ Key Strengths</h4>
+                    <p><strong>$name</strong> demonstrates strong performance in: <strong>$strengths</strong></p>
+                    <p>These areas indicate natural teaching communication abilities that should be encouraged and utilized in professional development opportunities.</p>
+                </div>
+            </div>
+""")
+
+HEAD_TEACHER_IMPROVEMENTS = CompiledTemplate("""
+            <div class="section">
+                <div class="recommendation-box">
+                    <h4>🎯 Recommended Focus Areas</h4>
+                    <p><strong>$name</strong> would benefit from targeted development in: <strong>$improvements</strong></p>
+                    <p><strong>Suggested Actions for Administration:</strong></p>
+                    <ul>
+$actions
+                    </ul>
+                </div>
+            </div>
+""")
+
+HEAD_TEACHER_ACTIONS = {
+    "Fluency": "<li>Consider enrolling in speaking fluency workshops or coaching sessions</li>",
+    "Pronunciation": "<li>Provide access to pronunciation improvement resources or speech coaching</li>",
+    "Accuracy": "<li>Provide access to pronunciation improvement resources or speech coaching</li>",
+    "Vocabulary": "<li>Encourage participation in academic vocabulary development programs</li>",
+    "Grammar": "<li>Recommend grammar refresher courses or peer mentoring</li>",
+    "Intonation": "<li>Suggest voice modulation and public speaking training</li>",
+}
+
+# (minimum percentage, template) from highest band down
+HEAD_TEACHER_RECOMMENDATIONS = [
+    (90, CompiledTemplate("""
+                    <p><strong>Recognition:</strong> $name demonstrates exceptional speaking proficiency. Consider this teacher for:</p>
+                    <ul>
+                        <li>Peer mentoring or coaching roles</li>
+                        <li>Professional development workshop facilitation</li>
+                        <li>Demonstration lessons for new teachers</li>
+                        <li>Leading communication skills training</li>
+                    </ul>
+""")),
+    (75, CompiledTemplate("""
+                    <p><strong>Development:</strong> $name shows strong speaking skills with room for refinement. Recommendations:</p>
+                    <ul>
+                        <li>Encourage participation in advanced communication workshops</li>
+                        <li>Provide opportunities to present at staff meetings</li>
+                        <li>Consider for professional development committee membership</li>
+                        <li>Support with targeted improvement in identified focus areas</li>
+                    </ul>
+""")),
+    (60, CompiledTemplate("""
+                    <p><strong>Support Needed:</strong> $name demonstrates developing speaking skills. Recommended actions:</p>
+                    <ul>
+                        <li>Enroll in professional communication development programs</li>
+                        <li>Assign a peer mentor with strong communication skills</li>
+                        <li>Provide regular feedback and observation opportunities</li>
+                        <li>Schedule follow-up assessment in 3-6 months</li>
+                    </ul>
+""")),
+    (0, CompiledTemplate("""
+                    <p><strong>Immediate Support Required:</strong> $name requires focused support for speaking proficiency. Action plan:</p>
+                    <ul>
+                        <li>Priority enrollment in speaking skills development program</li>
+                        <li>Weekly coaching sessions with communication specialist</li>
+                        <li>Structured improvement plan with clear milestones</li>
+                        <li>Monthly progress assessments and feedback sessions</li>
+                        <li>Consider additional language support resources if needed</li>
+                    </ul>
+""")),
+]
+
+
+def _component_status(avg):
+    if avg >= 4.0:
+        return "✅ Strong", "#28a745"
+    elif avg >= 3.0:
+        return "⚠️ Developing", "#ffc107"
+    else:
+        return "🎯 Needs Focus", "#dc3545"
+
+
+def render_head_teacher_report(name, institution, teacher_email, avg_scores, part1_count, part1_avg,
+                               part2_count, part2_avg, part3_score, total_score, max_score,
+                               percentage, proficiency_level, strengths, improvements, now=None):
+    """Render the head teacher's copy of a teacher's report"""
+    now = now or datetime.now()
+    color, emoji = proficiency_style(percentage)
+
+    component_rows = []
+    component_bars = []
+    for component, avg in avg_scores.items():
+        percentage_comp = (avg / 5) * 100
+        status, status_color = _component_status(avg)
+        component_rows.append(HEAD_TEACHER_COMPONENT_ROW.substitute(
+            component=component,
+            avg=f"{avg:.1f}",
+            percentage=f"{percentage_comp:.0f}",
+            status_color=status_color,
+            status=status
+        ))
+        component_bars.append(HEAD_TEACHER_COMPONENT_BAR.substitute(
+            component=component,
+            avg=f"{avg:.1f}",
+            percentage=f"{percentage_comp:.0f}",
+            width=percentage_comp,
+            bar_color=bar_color(avg)
+        ))
+
+    strengths_html = ""
+    if strengths:
+        strengths_html = HEAD_TEACHER_STRENGTHS.substitute(name=name, strengths=", ".join(strengths))
+
+    improvements_html = ""
+    if improvements:
+        improvements_html = HEAD_TEACHER_IMPROVEMENTS.substitute(
+            name=name,
+            improvements=", ".join(improvements),
+            actions="".join(HEAD_TEACHER_ACTIONS.get(area, "") for area in improvements)
+        )
+
+    recommendations = next(
+        template for minimum, template in HEAD_TEACHER_RECOMMENDATIONS if percentage >= minimum
+    ).substitute(name=name)
+
+    return HEAD_TEACHER_REPORT.substitute(
+        stylesheet=head_teacher_stylesheet(color),
+        emoji=emoji,
+        date=now.strftime("%B %d, %Y"),
+        generated_at=now.strftime("%B %d, %Y at %I:%M %p"),
+        name=name,
+        institution=institution,
+        teacher_email=teacher_email,
+        proficiency_level=proficiency_level,
+        total_score=f"{total_score:.1f}",
+        max_score=f"{max_score:.0f}",
+        percentage=f"{percentage:.1f}",
+        component_rows="".join(component_rows),
+        component_bars="".join(component_bars),
+        strengths=strengths_html,
+        improvements=improvements_html,
+        part1_count=part1_count,
+        part1_avg=f"{part1_avg:.1f}",
+        part2_count=part2_count,
+        part2_avg=f"{part2_avg:.1f}",
+        part3_status='✓ Completed' if part3_score > 0 else '✗ Not Completed',
+        part3_score=f"{part3_score:.1f}",
+        recommendations=recommendations
+    )
+
+
+# === HEAD TEACHER DIGEST ===
+
+HEAD_TEACHER_DIGEST = CompiledTemplate("""
+    <!DOCTYPE html>
+    <html>
+    <head>
+        <style>$stylesheet
+        </style>
+    </head>
+    <body>
+        <div class="container">
+            <div class="header">
+                <h1>📊 Speaking Assessment Digest</h1>
+                <div class="admin-badge">👨‍💼 Head Teacher Summary</div>
+                <p>$count new assessment$plural · Average score $average%</p>
+            </div>
+
+            <div class="section">
+                <table class="table">
+                    <thead>
+                        <tr>
+                            <th>Teacher</th>
+                            <th>Institution</th>
+                            <th>Total</th>
+                            <th>Percentage</th>
+                            <th>Level</th>
+                            <th>Focus Areas</th>
+                        </tr>
+                    </thead>
+                    <tbody>
+$rows
+                    </tbody>
+                </table>
+            </div>
+
+            <div class="footer">
+                <p><strong>Speaking Proficiency Assessment System v2.0</strong></p>
+                <p><em>Administrative Report - Confidential</em></p>
+                <p>This digest was automatically generated on $generated_at</p>
+            </div>
+        </div>
+    </body>
+    </html>
+    """)
+
+HEAD_TEACHER_DIGEST_ROW = CompiledTemplate("""
+                        <tr>
+                            <td><strong>$teacher_name</strong><br><span style="color: #666;">$teacher_email</span></td>
+                            <td>$institution</td>
+                            <td>$total_score/$max_score</td>
+                            <td>$percentage%</td>
+                            <td>$proficiency_level</td>
+                            <td>$focus</td>
+                        </tr>
+""")
+
+
+def render_head_teacher_digest(items, now=None):
+    """Render one combined summary of several teachers' results for a head teacher"""
+    now = now or datetime.now()
+
+    rows = "".join(
+        HEAD_TEACHER_DIGEST_ROW.substitute(
+            teacher_name=item["teacher_name"],
+            teacher_email=item["teacher_email"],
+            institution=item["institution"],
+            total_score=f"{item['summary']['total_score']:.1f}",
+            max_score=f"{item['summary']['max_score']:.0f}",
+            percentage=f"{item['summary']['percentage']:.1f}",
+            proficiency_level=item["summary"]["proficiency_level"],
+            focus=", ".join(item["summary"]["improvements"]) or "—"
+        )
+        for item in items
+    )
+    average = sum(item["summary"]["percentage"] for item in items) / len(items) if items else 0
+
+    return HEAD_TEACHER_DIGEST.substitute(
+        stylesheet=head_teacher_stylesheet(ADMIN_ACCENT),
+        count=len(items),
+        plural="s" if len(items) != 1 else "",
+        average=f"{average:.1f}",
+        rows=rows,
+        generated_at=now.strftime("%B %d, %Y at %I:%M %p")
+    )
@@ -0,0 +1,89 @@
+"""
+Report generation and email delivery for the Streamlit app.
+
+Reports are rendered from the compiled templates in ``report_templates`` and
+queued in the email outbox; a background sender (started once per process)
+delivers them (see ``resources.get_email_sender``). The outbox and digest
+modules pull in ``smtplib`` and the ``email`` package, so they are imported on
+first use rather than when the app starts.
+"""
+
+import re
+
+from . import report_templates
+from . import resources
+from .telemetry import traced
+
+def validate_email(email):
+    """Validate email format"""
+    pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
+    return re.match(pattern, email) is not None
+
+def generate_html_report(name, institution, email, summary):
+    """Generate HTML email report from a scoring.summarize_submission summary"""
+    return report_templates.render_teacher_report(
+        name, institution, email, summary["avg_scores"], summary["total_score"], summary["max_score"],
+        summary["percentage"], summary["proficiency_level"], summary["strengths"], summary["improvements"]
+    )
+
+def queue_email(recipient_email, subject, html_content, kind):
+    """Queue an email in the outbox; the background sender delivers it"""
+    try:
+        from . import email_outbox
+        
+        config = resources.get_config()
+        
+        if not config.email_configured:
+            return False, "Email credentials not configured in secrets"
+        
+        email_outbox.enqueue_email(
+            recipient_email, subject, html_content, kind=kind,
+            attach_pdf=config.attach_pdf_reports,
+            db_path=config.results_db_path
+        )
+        resources.get_email_sender().wake()
+        
+        return True, "Email queued for delivery"
+        
+    except Exception as e:
+        return False, f"Error queuing email: {str(e)}"
+
+@traced("email.queue_report")
+def send_email_report(recipient_email, name, html_content):
+    """Queue email with HTML report"""
+    return queue_email(
+        recipient_email, f"Your Speaking Proficiency Test Results - {name}", html_content, "report"
+    )
+
+def generate_head_teacher_report(name, institution, teacher_email, summary):
+    """Generate HTML report for head teacher with summary focus"""
+    part1_scores = summary["part1_scores"]
+    part2_scores = summary["part2_scores"]
+    return report_templates.render_head_teacher_report(
+        name, institution, teacher_email, summary["avg_scores"],
+        len(part1_scores), sum(part1_scores) / len(part1_scores) if part1_scores else 0,
+        len(part2_scores), sum(part2_scores) / len(part2_scores) if part2_scores else 0,
+        summary["part3_score"], summary["total_score"], summary["max_score"], summary["percentage"],
+        summary["proficiency_level"], summary["strengths"], summary["improvements"]
+    )
+
+@traced("email.queue_head_teacher")
+def send_head_teacher_email(recipient_email, teacher_name, html_content):
+    """Queue email to head teacher with assessment summary"""
+    return queue_email(
+        recipient_email, f"Speaking Assessment Report - {teacher_name}", html_content, "head_teacher"
+    )
+
+@traced("email.queue_digest")
+def queue_head_teacher_digest(recipient_email, teacher_name, teacher_email, institution, summary):
+    """Add a teacher's results to their head teacher's next digest"""
+    from . import head_teacher_digest
+    
+    head_teacher_digest.queue_digest_item(
+        recipient_email, teacher_name, teacher_email, institution, summary["avg_scores"],
+        summary["total_score"], summary["max_score"], summary["percentage"], summary["proficiency_level"],
+        summary["strengths"], summary["improvements"],
+        db_path=resources.get_config().results_db_path
+    )
+    # Make sure the sender (which flushes due digests) is running
+    resources.get_email_sender()
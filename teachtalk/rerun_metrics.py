@@ -0,0 +1,120 @@
+"""
+Server CPU per interaction.
+
+When the ``TEACHTALK_CPU_LOG`` environment variable names a file, every full
+script run and every fragment-only rerun appends one JSON line with the CPU
+time the script thread spent on it (``time.thread_time``, so other sessions'
+work is not counted) and its wall time. Compare the logs from a run with
+``FRAGMENT_RERUNS = false`` (every recording reruns the whole page) against
+the default to see what fragments save per interaction.
+
+Runs cut short by ``st.rerun()`` or ``st.stop()`` are logged too, up to the
+point where they stopped; the rerun that follows is logged separately.
+
+Usage:
+    TEACHTALK_CPU_LOG=/tmp/cpu.jsonl streamlit run app.py
+    python -m teachtalk.rerun_metrics /tmp/cpu.jsonl
+"""
+
+import argparse
+import json
+import os
+import statistics
+import threading
+import time
+from contextlib import contextmanager
+
+LOG_PATH = os.environ.get("TEACHTALK_CPU_LOG")
+
+_write_lock = threading.Lock()
+
+
+def _session_id():
+    try:
+        from streamlit.runtime.scriptrunner import get_script_run_ctx
+    except ImportError:
+        return None
+    ctx = get_script_run_ctx()
+    return ctx.session_id if ctx else None
+
+
+def is_fragment_rerun():
+    """Whether the current script run reruns fragments only"""
+    from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+    ctx = get_script_run_ctx()
+    return bool(ctx and ctx.fragment_ids_this_run)
+
+
+def start():
+    """Clock values for the start of an interaction (None when logging is off)"""
+    if not LOG_PATH:
+        return None
+    return time.thread_time(), time.perf_counter()
+
+
+def finish(clock, scope, label):
+    """Log the CPU and wall time spent since start()"""
+    if clock is None:
+        return
+    cpu_start, wall_start = clock
+    record = {
+        "ts": time.time(),
+        "session": _session_id(),
+        "scope": scope,
+        "label": label,
+        "cpu_ms": round((time.thread_time() - cpu_start) * 1000, 3),
+        "wall_ms": round((time.perf_counter() - wall_start) * 1000, 3),
+    }
+    with _write_lock:
+        with open(LOG_PATH, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record) + "\n")
+
+
+@contextmanager
+def track_fragment(label):
+    """Log a fragment's run when it is a fragment-only rerun (full runs are logged as a whole)"""
+    clock = start() if LOG_PATH and is_fragment_rerun() else None
+    try:
+        yield
+    finally:
+        finish(clock, "fragment", label)
+
+
+def summarize(path):
+    """Per (scope, label) count and CPU/wall percentiles from a log file"""
+    groups = {}
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                record = json.loads(line)
+                groups.setdefault((record["scope"], record["label"]), []).append(record)
+
+    summary = []
+    for (scope, label), records in sorted(groups.items()):
+        cpu = sorted(r["cpu_ms"] for r in records)
+        wall = sorted(r["wall_ms"] for r in records)
+        summary.append({
+            "scope": scope,
+            "label": label,
+            "count": len(records),
+            "cpu_median_ms": statistics.median(cpu),
+            "cpu_p90_ms": cpu[int(len(cpu) * 0.9)],
+            "wall_median_ms": statistics.median(wall),
+        })
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Summarize per-interaction CPU logs")
+    parser.add_argument("log", help="File written via TEACHTALK_CPU_LOG")
+    args = parser.parse_args(argv)
+
+    print(f"{'scope':<10} {'label':<20} {'count':>6} {'cpu p50':>9} {'cpu p90':>9} {'wall p50':>9}")
+    for row in summarize(args.log):
+        print(f"{row['scope']:<10} {row['label']:<20} {row['count']:>6} {row['cpu_median_ms']:>8.2f}ms "
+              f"{row['cpu_p90_ms']:>8.2f}ms {row['wall_median_ms']:>8.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,214 @@
+"""
+Opt-in cProfile profiling of script reruns.
+
+Two ways to turn it on:
+
+* ``TEACHTALK_PROFILE_DIR=/path`` when starting the server profiles every
+  session's reruns (e.g. during a load test) into that directory.
+* An admin who is logged in to the admin dashboard can profile their own
+  session with the "Profile my reruns" toggle there, or by opening the app
+  with ``?profile=1`` (``?profile=0`` turns it off). Profiles then go to the
+  system temp directory unless ``TEACHTALK_PROFILE_DIR`` is set.
+
+Each full script run and each fragment-only rerun writes one ``.prof`` file
+named ``<ms timestamp>_<session>_<scope>_<widget>.prof``, where widget is the
+key of the widget whose change triggered the run (best effort, from
+Streamlit's widget state). Runs cut short by ``st.rerun()``, ``st.stop()`` or
+an error are written too, so the profiler is never left running.
+
+Only one run is profiled at a time per process: cProfile cannot run twice at
+once on Python 3.12+, so a run that starts while another session's is being
+profiled is simply not profiled (with ``TEACHTALK_PROFILE_DIR`` under load,
+expect a sample of the runs rather than all of them). On Python 3.12+ a
+profile also includes whatever other threads (other sessions, transcription
+workers) ran in the meantime; on earlier versions it covers the script thread
+only.
+
+The viewer merges the profiles and ranks the hottest functions:
+
+    python -m teachtalk.rerun_profiler /tmp/teachtalk_profiles --top 30
+    python -m teachtalk.rerun_profiler /tmp/teachtalk_profiles --widget p2_1 --sort tottime
+"""
+
+import argparse
+import cProfile
+import glob
+import io
+import os
+import pstats
+import re
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+PROFILE_DIR = os.environ.get("TEACHTALK_PROFILE_DIR")
+DEFAULT_PROFILE_DIR = os.path.join(tempfile.gettempdir(), "teachtalk_profiles")
+
+SESSION_FLAG = "profile_reruns"
+QUERY_PARAM = "profile"
+
+# Held while a profile is running: at most one per process
+_active = threading.Lock()
+
+
+def _session_id():
+    from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+    ctx = get_script_run_ctx()
+    return ctx.session_id if ctx else "nosession"
+
+
+def triggering_widget():
+    """Key (or ID) of the widget whose change triggered this run, or None"""
+    from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+    ctx = get_script_run_ctx()
+    try:
+        # Streamlit internals: fall back to None if their shape changes
+        state = ctx.session_state._state
+        for widget_id in list(state._new_widget_state.keys()):
+            if state._widget_changed(widget_id):
+                key = state._key_id_mapper._id_key_mapping.get(widget_id)
+                if key:
+                    return key
+                # Unkeyed widget IDs look like "$$ID-<hash>-None"
+                return f"unkeyed-{widget_id.split('-')[1][:8]}"
+    except (AttributeError, TypeError):
+        pass
+    return None
+
+
+def session_enabled():
+    """Whether this session's reruns are profiled (reads the admin toggle and ?profile=)"""
+    import streamlit as st
+
+    if PROFILE_DIR:
+        return True
+    requested = st.query_params.get(QUERY_PARAM)
+    if requested is not None and st.session_state.get("admin_authenticated"):
+        st.session_state[SESSION_FLAG] = requested not in ("0", "false", "off")
+    return bool(st.session_state.get(SESSION_FLAG))
+
+
+def start(enabled):
+    """Begin profiling a run; returns a handle for finish() (None when disabled or another run is being profiled)"""
+    if not enabled or not _active.acquire(blocking=False):
+        return None
+    profiler = cProfile.Profile()
+    try:
+        trigger = triggering_widget()
+        profiler.enable()
+    except ValueError:
+        # Another profiling tool (e.g. a debugger) is already active
+        _active.release()
+        return None
+    except BaseException:
+        _active.release()
+        raise
+    return profiler, trigger
+
+
+def finish(handle, scope, label=None):
+    """Stop profiling and write the run's profile file"""
+    if handle is None:
+        return None
+    profiler, trigger = handle
+    profiler.disable()
+    _active.release()
+
+    directory = PROFILE_DIR or DEFAULT_PROFILE_DIR
+    os.makedirs(directory, exist_ok=True)
+    session = re.sub(r"[^A-Za-z0-9]+", "-", _session_id())[:8]
+    widget = re.sub(r"[^A-Za-z0-9_]+", "-", str(trigger or label or "none"))[:40]
+    path = os.path.join(directory, f"{int(time.time() * 1000)}_{session}_{scope}_{widget}.prof")
+    profiler.dump_stats(path)
+    return path
+
+
+@contextmanager
+def profile_run():
+    """Profile a full script run, stopping the profiler even if the run ends in st.rerun() or st.stop()"""
+    handle = start(session_enabled())
+    try:
+        yield
+    finally:
+        finish(handle, "app")
+
+
+@contextmanager
+def profile_fragment(label):
+    """Profile a fragment's run when it is a fragment-only rerun (full runs are profiled as a whole)"""
+    from .rerun_metrics import is_fragment_rerun
+
+    handle = start(is_fragment_rerun() and session_enabled())
+    try:
+        yield
+    finally:
+        finish(handle, "fragment", label)
+
+
+def parse_name(path):
+    """``(timestamp_ms, session, scope, widget)`` from a profile file name"""
+    timestamp, session, scope, widget = os.path.basename(path)[:-len(".prof")].split("_", 3)
+    return int(timestamp), session, scope, widget
+
+
+def load(directory, session=None, scope=None, widget=None):
+    """Profile files in a directory, filtered by session prefix, scope and widget"""
+    paths = []
+    for path in sorted(glob.glob(os.path.join(directory, "*.prof"))):
+        try:
+            _, file_session, file_scope, file_widget = parse_name(path)
+        except ValueError:
+            continue
+        if session and not file_session.startswith(session):
+            continue
+        if scope and file_scope != scope:
+            continue
+        if widget and file_widget != widget:
+            continue
+        paths.append(path)
+    return paths
+
+
+def summarize(paths, sort="cumulative", top=25):
+    """Per-trigger rerun counts and the hottest functions across the given profiles, as text"""
+    out = io.StringIO()
+    groups = {}
+    for path in paths:
+        _, _, scope, widget = parse_name(path)
+        total = pstats.Stats(path).total_tt
+        count, seconds = groups.get((scope, widget), (0, 0.0))
+        groups[(scope, widget)] = (count + 1, seconds + total)
+
+    out.write(f"{len(paths)} profiled reruns\n\n")
+    out.write(f"{'scope':<10} {'trigger':<24} {'runs':>6} {'total s':>9} {'mean ms':>9}\n")
+    for (scope, widget), (count, seconds) in sorted(groups.items(), key=lambda item: -item[1][1]):
+        out.write(f"{scope:<10} {widget:<24} {count:>6} {seconds:>9.3f} {seconds / count * 1000:>9.2f}\n")
+    out.write("\n")
+
+    stats = pstats.Stats(*paths, stream=out)
+    stats.strip_dirs().sort_stats(sort).print_stats(top)
+    return out.getvalue()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Rank the hottest functions across per-rerun profiles")
+    parser.add_argument("directory", nargs="?", default=PROFILE_DIR or DEFAULT_PROFILE_DIR)
+    parser.add_argument("--session", help="Only profiles from sessions starting with this ID prefix")
+    parser.add_argument("--scope", choices=["app", "fragment"])
+    parser.add_argument("--widget", help="Only reruns triggered by this widget key")
+    parser.add_argument("--sort", default="cumulative", choices=["cumulative", "tottime", "ncalls"])
+    parser.add_argument("--top", type=int, default=25)
+    args = parser.parse_args(argv)
+
+    paths = load(args.directory, args.session, args.scope, args.widget)
+    if not paths:
+        print(f"No profiles found in {args.directory}")
+        return
+    print(summarize(paths, args.sort, args.top))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+"""
+Process-wide resources, built once per server process with ``st.cache_resource``.
+
+Every session and rerun shares the same configuration snapshot, HTTP session
+(keep-alive connections to AssemblyAI), SMTP connection pool, background
+email sender, test session store and transcript index. How long each took to build is recorded and can be read back
+with ``init_timings()`` (shown on the admin dashboard). Because the config is
+cached for the life of the process, restart the server after editing secrets.
+"""
+
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+import streamlit as st
+
+from .config import AppConfig
+
+logger = logging.getLogger(__name__)
+
+_init_timings = {}
+_timings_lock = threading.Lock()
+
+
+@contextmanager
+def _timed(name):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        with _timings_lock:
+            _init_timings[name] = elapsed
+        logger.info("Initialized %s in %.1f ms", name, elapsed * 1000)
+
+
+def init_timings():
+    """Seconds spent building each cached resource in this process"""
+    with _timings_lock:
+        return dict(_init_timings)
+
+
+@st.cache_resource
+def get_config():
+    """Application configuration parsed from Streamlit secrets"""
+    with _timed("config"):
+        try:
+            values = dict(st.secrets)
+        except FileNotFoundError:
+            # No secrets file: run with defaults (transcription and email disabled)
+            values = {}
+        return AppConfig.from_mapping(values)
+
+
+@st.cache_resource
+def get_http_session():
+    """Shared requests session so AssemblyAI calls reuse keep-alive connections"""
+    with _timed("http_session"):
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=32)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        return session
+
+
+@st.cache_resource
+def get_smtp_pool():
+    """Pool of logged-in SMTP connections shared by the email sender"""
+    config = get_config()
+    with _timed("smtp_pool"):
+        from .email_outbox import SMTPPool
+
+        return SMTPPool(
+            config.smtp_server,
+            config.smtp_port,
+            config.sender_email,
+            config.sender_password,
+            size=config.smtp_pool_size,
+            use_tls=config.smtp_use_tls
+        )
+
+
+@st.cache_resource
+def get_email_sender():
+    """Start the background outbox sender once per process"""
+    config = get_config()
+    pool = get_smtp_pool()
+    with _timed("email_sender"):
+        import functools
+
+        from . import email_outbox, head_teacher_digest, pdf_reports
+
+        periodic_tasks = []
+        if config.digest_mode:
+            periodic_tasks.append(functools.partial(
+                head_teacher_digest.flush_due_digests, config.head_teacher_digest_minutes * 60,
+                db_path=config.results_db_path
+            ))
+        pdf_renderer = None
+        if config.attach_pdf_reports:
+            pdf_renderer = functools.partial(
+                pdf_reports.render_pdf, cache_dir=config.pdf_cache_dir or pdf_reports.DEFAULT_CACHE_DIR
+            )
+        sender = email_outbox.OutboxSender(
+            pool, db_path=config.results_db_path, periodic_tasks=periodic_tasks, pdf_renderer=pdf_renderer
+        )
+        sender.start()
+        return sender
+
+
+@st.cache_resource
+def get_session_store():
+    """Store of every session's test progress: in this process's memory, or shared through Redis"""
+    config = get_config()
+    with _timed("session_store"):
+        from .session_state import RedisSessionStore, SessionStore, SpillStore
+
+        spill_store = SpillStore(
+            config.session_spill_dir or None, max_age_seconds=int(config.session_ttl_hours * 3600)
+        )
+        if config.session_backend == "redis":
+            return RedisSessionStore(
+                config.session_redis_url, spill_store, ttl_seconds=int(config.session_ttl_hours * 3600)
+            )
+        return SessionStore(spill_store, budget_bytes=int(config.session_memory_budget_mb * 1024 * 1024))
+
+
+@st.cache_resource
+def get_audio_archive():
+    """Compressed, content-addressed store of every scored recording"""
+    config = get_config()
+    with _timed("audio_archive"):
+        from .audio_archive import AudioArchive
+
+        return AudioArchive(config.audio_archive_dir or None)
+
+
+@st.cache_resource
+def get_upload_store():
+    """Partial chunked uploads (API), kept next to the spilled sessions"""
+    config = get_config()
+    spill_root = get_session_store().spill_store.root
+    with _timed("upload_store"):
+        from .uploads import UploadStore
+
+        return UploadStore(os.path.join(spill_root, "uploads"), chunk_size=config.upload_chunk_kb * 1024)
+
+
+@st.cache_resource
+def get_transcript_index():
+    """Audio hash -> transcription job, shared by every session"""
+    config = get_config()
+    with _timed("transcript_index"):
+        from .transcription import TranscriptIndex
+
+        return TranscriptIndex(max_entries=config.transcript_index_size)
+
+
+@st.cache_resource
+def get_metrics_server():
+    """Prometheus /metrics endpoint for this process (None unless TEACHTALK_METRICS_PORT is set)"""
+    from . import telemetry
+
+    if not telemetry.METRICS_PORT:
+        return None
+    with _timed("metrics_server"):
+        return telemetry.serve_metrics(telemetry.METRICS_PORT)
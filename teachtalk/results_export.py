@@ -0,0 +1,140 @@
+"""
+Streaming bulk export of speaking test results as CSV or NDJSON.
+
+Rows are read from the results store through a stepping SQLite cursor and
+written out batch by batch, optionally gzip-compressed on the fly, so memory
+stays constant no matter how many results are exported. In WAL mode the long
+read does not block new submissions.
+
+Usage:
+    python -m teachtalk.results_export --institution "Riverside High" --start 2025-09-01 --end 2025-12-19 \
+        --format csv --gzip -o riverside_term1.csv.gz
+    python -m teachtalk.results_export --format ndjson > all_results.ndjson
+"""
+
+import argparse
+import csv
+import io
+import json
+import sys
+import zlib
+
+from . import results_store
+
+EXPORT_FORMATS = ("csv", "ndjson")
+EXPORT_COLUMNS = ["id"] + results_store.RESULT_COLUMNS
+
+
+def iter_result_rows(institution=None, start_date=None, end_date=None, db_path=None, batch_size=1000):
+    """Yield result rows as tuples (in EXPORT_COLUMNS order), batch_size rows in memory at a time"""
+    where, params = results_store.results_filter(
+        institution=institution, start_date=start_date, end_date=end_date
+    )
+    sql = f"SELECT {', '.join(EXPORT_COLUMNS)} FROM results{where} ORDER BY date, id"
+
+    conn = results_store.connect(db_path)
+    conn.row_factory = None
+    try:
+        cursor = conn.execute(sql, params)
+        while True:
+            batch = cursor.fetchmany(batch_size)
+            if not batch:
+                break
+            yield from batch
+    finally:
+        conn.close()
+
+
+def _encode_batches(rows, fmt, batch_size):
+    """Encode rows to UTF-8 text chunks of roughly batch_size rows each"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer) if fmt == "csv" else None
+
+    if writer:
+        writer.writerow(EXPORT_COLUMNS)
+
+    count = 0
+    for row in rows:
+        if writer:
+            writer.writerow(row)
+        else:
+            buffer.write(json.dumps(dict(zip(EXPORT_COLUMNS, row)), ensure_ascii=False, separators=(",", ":")))
+            buffer.write("\n")
+
+        count += 1
+        if count % batch_size == 0:
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+
+    remainder = buffer.getvalue()
+    if remainder:
+        yield remainder.encode("utf-8")
+
+
+def stream_export(fmt="csv", institution=None, start_date=None, end_date=None, gzip=False,
+                  db_path=None, batch_size=1000):
+    """
+    Generate the export as a stream of bytes chunks.
+
+    Suitable for writing to a file or as the body of a streaming HTTP response.
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unsupported export format: {fmt} (expected one of {', '.join(EXPORT_FORMATS)})")
+
+    rows = iter_result_rows(institution, start_date, end_date, db_path=db_path, batch_size=batch_size)
+    chunks = _encode_batches(rows, fmt, batch_size)
+
+    if not gzip:
+        yield from chunks
+        return
+
+    # wbits=31 produces a gzip container rather than a raw zlib stream
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+def write_export(output, **kwargs):
+    """Write a streamed export to a binary file object. Returns the number of bytes written."""
+    written = 0
+    for chunk in stream_export(**kwargs):
+        output.write(chunk)
+        written += len(chunk)
+    return written
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Stream speaking test results as CSV or NDJSON")
+    parser.add_argument("--db", default=results_store.DEFAULT_DB_PATH, help="Path to the results database")
+    parser.add_argument("--format", choices=EXPORT_FORMATS, default="csv")
+    parser.add_argument("--institution", help="Only export results for this institution")
+    parser.add_argument("--start", help="First date to include (YYYY-MM-DD)")
+    parser.add_argument("--end", help="Last date to include (YYYY-MM-DD)")
+    parser.add_argument("--gzip", action="store_true", help="Compress the output with gzip")
+    parser.add_argument("-o", "--output", help="Output file (defaults to stdout)")
+    args = parser.parse_args(argv)
+
+    kwargs = dict(
+        fmt=args.format,
+        institution=args.institution,
+        start_date=args.start,
+        end_date=args.end,
+        gzip=args.gzip,
+        db_path=args.db,
+    )
+
+    if args.output:
+        with open(args.output, "wb") as output:
+            written = write_export(output, **kwargs)
+        print(f"Wrote {written} bytes to {args.output}", file=sys.stderr)
+    else:
+        write_export(sys.stdout.buffer, **kwargs)
+        sys.stdout.buffer.flush()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,598 @@
+"""
+SQLite-backed results store for the Speaking Proficiency Test.
+
+Replaces the old ``speaking_test_results.csv`` append with a WAL-mode SQLite
+database so concurrent sessions can write safely and results can be queried
+by email, institution and date.
+
+Usage (one-time import of legacy CSV files):
+    python -m teachtalk.results_store import-csv /tmp/speaking_test_results.csv
+"""
+
+import argparse
+import csv
+import hashlib
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+
+DEFAULT_DB_PATH = os.path.join(tempfile.gettempdir(), "speaking_test_results.db")
+
+# Column order of the results table (matches the legacy CSV headers, lower-cased)
+RESULT_COLUMNS = [
+    "name",
+    "institution",
+    "email",
+    "part1_count",
+    "part1_avg",
+    "part2_count",
+    "part2_avg",
+    "part3_score",
+    "total_score",
+    "max_score",
+    "percentage",
+    "proficiency_level",
+    "accuracy_avg",
+    "fluency_avg",
+    "intonation_avg",
+    "vocabulary_avg",
+    "grammar_avg",
+    "date",
+]
+
+# Column order of the per-recording table (result_id is filled in by save_submission)
+RECORDING_COLUMNS = [
+    "part",
+    "item_key",
+    "prompt",
+    "transcript",
+    "audio_hash",
+    "accuracy",
+    "fluency",
+    "intonation",
+    "vocabulary",
+    "grammar",
+    "features",
+    "rubric_version",
+    "recorded_at",
+]
+
+SCORE_COLUMNS = {"accuracy", "fluency", "intonation", "vocabulary", "grammar"}
+
+# Rollup components and the results column each one aggregates
+ROLLUP_COMPONENTS = {
+    "Accuracy": "accuracy_avg",
+    "Fluency": "fluency_avg",
+    "Intonation": "intonation_avg",
+    "Vocabulary": "vocabulary_avg",
+    "Grammar": "grammar_avg",
+    "Percentage": "percentage",
+}
+
+# Institution key of the district-wide rollup rows
+ALL_INSTITUTIONS = "*"
+
+INTEGER_COLUMNS = {"part1_count", "part2_count"}
+TEXT_COLUMNS = {"name", "institution", "email", "proficiency_level", "date"}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    institution TEXT NOT NULL,
+    email TEXT NOT NULL DEFAULT '',
+    part1_count INTEGER NOT NULL DEFAULT 0,
+    part1_avg REAL NOT NULL DEFAULT 0,
+    part2_count INTEGER NOT NULL DEFAULT 0,
+    part2_avg REAL NOT NULL DEFAULT 0,
+    part3_score REAL NOT NULL DEFAULT 0,
+    total_score REAL NOT NULL DEFAULT 0,
+    max_score REAL NOT NULL DEFAULT 0,
+    percentage REAL NOT NULL DEFAULT 0,
+    proficiency_level TEXT NOT NULL DEFAULT '',
+    accuracy_avg REAL NOT NULL DEFAULT 0,
+    fluency_avg REAL NOT NULL DEFAULT 0,
+    intonation_avg REAL NOT NULL DEFAULT 0,
+    vocabulary_avg REAL NOT NULL DEFAULT 0,
+    grammar_avg REAL NOT NULL DEFAULT 0,
+    date TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_results_email ON results (email);
+CREATE INDEX IF NOT EXISTS idx_results_institution_date ON results (institution, date);
+CREATE INDEX IF NOT EXISTS idx_results_date ON results (date);
+
+CREATE TABLE IF NOT EXISTS recording_results (
+    id INTEGER PRIMARY KEY,
+    result_id INTEGER NOT NULL REFERENCES results (id) ON DELETE CASCADE,
+    part INTEGER NOT NULL,
+    item_key TEXT NOT NULL,
+    prompt TEXT NOT NULL DEFAULT '',
+    transcript TEXT NOT NULL DEFAULT '',
+    audio_hash TEXT,
+    accuracy REAL,
+    fluency REAL,
+    intonation REAL,
+    vocabulary REAL,
+    grammar REAL,
+    features TEXT NOT NULL DEFAULT '{}',
+    rubric_version TEXT NOT NULL,
+    recorded_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_recording_results_result ON recording_results (result_id);
+CREATE INDEX IF NOT EXISTS idx_recording_results_audio_hash ON recording_results (audio_hash);
+
+CREATE TABLE IF NOT EXISTS rollup_component (
+    institution TEXT NOT NULL,
+    component TEXT NOT NULL,
+    n INTEGER NOT NULL DEFAULT 0,
+    total REAL NOT NULL DEFAULT 0,
+    total_sq REAL NOT NULL DEFAULT 0,
+    PRIMARY KEY (institution, component)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS rollup_level (
+    institution TEXT NOT NULL,
+    proficiency_level TEXT NOT NULL,
+    n INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (institution, proficiency_level)
+) WITHOUT ROWID;
+
+-- Keys of submissions saved idempotently (e.g. by the batch mode), so a retried save is a no-op
+CREATE TABLE IF NOT EXISTS submission_keys (
+    submission_key TEXT PRIMARY KEY,
+    result_id INTEGER NOT NULL REFERENCES results (id) ON DELETE CASCADE
+);
+
+CREATE TABLE IF NOT EXISTS csv_imports (
+    sha256 TEXT PRIMARY KEY,
+    source_path TEXT NOT NULL,
+    imported_rows INTEGER NOT NULL,
+    skipped_rows INTEGER NOT NULL,
+    imported_at TEXT NOT NULL
+);
+"""
+
+_initialized_paths = set()
+_init_lock = threading.Lock()
+
+
+def connect(db_path=None):
+    """Open a connection to the results database, creating the schema once per process"""
+    db_path = db_path or DEFAULT_DB_PATH
+    # isolation_level=None: transactions are managed explicitly by transaction()
+    conn = sqlite3.connect(db_path, timeout=10, isolation_level=None)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA busy_timeout = 10000")
+    conn.execute("PRAGMA foreign_keys = ON")
+
+    if db_path not in _initialized_paths:
+        with _init_lock:
+            if db_path not in _initialized_paths:
+                # WAL is persistent in the database file, so this only needs doing once
+                conn.execute("PRAGMA journal_mode = WAL")
+                conn.execute("PRAGMA synchronous = NORMAL")
+                conn.executescript(SCHEMA)
+                _initialized_paths.add(db_path)
+
+    return conn
+
+
+@contextmanager
+def transaction(conn):
+    """Run a block inside a single write transaction (BEGIN IMMEDIATE ... COMMIT)"""
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        yield conn
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+    else:
+        conn.execute("COMMIT")
+
+
+def _row_values(row):
+    """Convert a results dict (CSV-style or column-style keys) to a tuple in RESULT_COLUMNS order"""
+    normalized = {key.lower(): value for key, value in row.items()}
+    values = []
+    for column in RESULT_COLUMNS:
+        value = normalized.get(column)
+        if column in TEXT_COLUMNS:
+            values.append("" if value is None else str(value))
+        elif column in INTEGER_COLUMNS:
+            values.append(int(float(value)) if value not in (None, "") else 0)
+        else:
+            values.append(float(value) if value not in (None, "") else 0.0)
+    if not values[-1]:
+        values[-1] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    return tuple(values)
+
+
+def _recording_values(result_id, recording):
+    """Convert a per-recording dict to a tuple (result_id, *RECORDING_COLUMNS)"""
+    values = [result_id]
+    for column in RECORDING_COLUMNS:
+        value = recording.get(column)
+        if column in SCORE_COLUMNS:
+            # Components that were not scored for this part stay NULL
+            values.append(None if value is None else float(value))
+        elif column == "part":
+            values.append(int(value))
+        elif column == "features":
+            values.append(json.dumps(value or {}, separators=(",", ":"), sort_keys=True))
+        elif column == "recorded_at":
+            values.append(value or datetime.now().isoformat())
+        else:
+            values.append(value if value is not None or column == "audio_hash" else "")
+    return tuple(values)
+
+
+def _insert_sql():
+    placeholders = ", ".join("?" for _ in RESULT_COLUMNS)
+    return f"INSERT INTO results ({', '.join(RESULT_COLUMNS)}) VALUES ({placeholders})"
+
+
+def _insert_recording_sql():
+    columns = ["result_id"] + RECORDING_COLUMNS
+    placeholders = ", ".join("?" for _ in columns)
+    return f"INSERT INTO recording_results ({', '.join(columns)}) VALUES ({placeholders})"
+
+
+def _update_rollups(conn, values_list):
+    """
+    Add result rows to the running count/sum/sum-of-squares rollups.
+
+    Deltas are pre-aggregated per (institution, component) so a large batch costs
+    one upsert per key. Must be called inside the transaction that inserts the rows.
+    """
+    institution_index = RESULT_COLUMNS.index("institution")
+    level_index = RESULT_COLUMNS.index("proficiency_level")
+    component_indexes = {
+        component: RESULT_COLUMNS.index(column) for component, column in ROLLUP_COMPONENTS.items()
+    }
+
+    component_deltas = {}
+    level_deltas = {}
+    for values in values_list:
+        for institution in (values[institution_index], ALL_INSTITUTIONS):
+            for component, index in component_indexes.items():
+                value = values[index]
+                # Scores start at 0.5, so 0 means the component was not assessed
+                if value > 0:
+                    delta = component_deltas.setdefault((institution, component), [0, 0.0, 0.0])
+                    delta[0] += 1
+                    delta[1] += value
+                    delta[2] += value * value
+            key = (institution, values[level_index])
+            level_deltas[key] = level_deltas.get(key, 0) + 1
+
+    conn.executemany(
+        "INSERT INTO rollup_component (institution, component, n, total, total_sq) VALUES (?, ?, ?, ?, ?) "
+        "ON CONFLICT (institution, component) DO UPDATE SET "
+        "n = n + excluded.n, total = total + excluded.total, total_sq = total_sq + excluded.total_sq",
+        [(institution, component, *delta) for (institution, component), delta in component_deltas.items()]
+    )
+    conn.executemany(
+        "INSERT INTO rollup_level (institution, proficiency_level, n) VALUES (?, ?, ?) "
+        "ON CONFLICT (institution, proficiency_level) DO UPDATE SET n = n + excluded.n",
+        [(institution, level, n) for (institution, level), n in level_deltas.items()]
+    )
+
+
+def _insert_result_rows(conn, values_list):
+    """Insert result tuples and update the rollups (inside the caller's transaction)"""
+    conn.executemany(_insert_sql(), values_list)
+    _update_rollups(conn, values_list)
+
+
+def insert_results(rows, db_path=None):
+    """Insert a batch of result rows in one transaction. Returns the number of rows written."""
+    values = [_row_values(row) for row in rows]
+    if not values:
+        return 0
+
+    conn = connect(db_path)
+    try:
+        with transaction(conn):
+            _insert_result_rows(conn, values)
+    finally:
+        conn.close()
+
+    return len(values)
+
+
+def save_result(results_data, db_path=None):
+    """Save a single submission's results. Returns the new row id."""
+    values = _row_values(results_data)
+    conn = connect(db_path)
+    try:
+        with transaction(conn):
+            cursor = conn.execute(_insert_sql(), values)
+            _update_rollups(conn, [values])
+        return cursor.lastrowid
+    finally:
+        conn.close()
+
+
+def save_submission(results_data, recordings, db_path=None, submission_key=None):
+    """
+    Save a submission's aggregate results and its per-recording rows in one transaction.
+
+    Each recording is a dict with the RECORDING_COLUMNS keys; ``features`` is a dict
+    stored as compact JSON. Returns the new results row id. With a submission_key
+    the save is idempotent: if that key was saved before, its row id is returned
+    and nothing is written.
+    """
+    conn = connect(db_path)
+    try:
+        values = _row_values(results_data)
+        with transaction(conn):
+            if submission_key is not None:
+                row = conn.execute(
+                    "SELECT result_id FROM submission_keys WHERE submission_key = ?", (submission_key,)
+                ).fetchone()
+                if row:
+                    return row["result_id"]
+            cursor = conn.execute(_insert_sql(), values)
+            result_id = cursor.lastrowid
+            _update_rollups(conn, [values])
+            conn.executemany(
+                _insert_recording_sql(),
+                [_recording_values(result_id, recording) for recording in recordings]
+            )
+            if submission_key is not None:
+                conn.execute(
+                    "INSERT INTO submission_keys (submission_key, result_id) VALUES (?, ?)",
+                    (submission_key, result_id)
+                )
+        return result_id
+    finally:
+        conn.close()
+
+
+def fetch_recordings(result_id=None, audio_hash=None, db_path=None):
+    """Fetch per-recording rows for a submission and/or an audio hash, with features decoded"""
+    clauses = []
+    params = []
+
+    if result_id is not None:
+        clauses.append("result_id = ?")
+        params.append(result_id)
+    if audio_hash:
+        clauses.append("audio_hash = ?")
+        params.append(audio_hash)
+
+    sql = "SELECT * FROM recording_results"
+    if clauses:
+        sql += " WHERE " + " AND ".join(clauses)
+    sql += " ORDER BY result_id, part, item_key"
+
+    conn = connect(db_path)
+    try:
+        rows = []
+        for row in conn.execute(sql, params):
+            row = dict(row)
+            row["features"] = json.loads(row["features"])
+            rows.append(row)
+        return rows
+    finally:
+        conn.close()
+
+
+def recording_audio_dates(db_path=None):
+    """Audio hash -> newest recorded_at of the recordings that use it"""
+    conn = connect(db_path)
+    try:
+        return {
+            row[0]: row[1] for row in conn.execute(
+                "SELECT audio_hash, MAX(recorded_at) FROM recording_results "
+                "WHERE audio_hash IS NOT NULL GROUP BY audio_hash"
+            )
+        }
+    finally:
+        conn.close()
+
+
+def results_filter(email=None, institution=None, start_date=None, end_date=None):
+    """Build a WHERE clause and parameters for filtering results (dates as 'YYYY-MM-DD', inclusive)"""
+    clauses = []
+    params = []
+
+    if email:
+        clauses.append("email = ?")
+        params.append(email)
+    if institution:
+        clauses.append("institution = ?")
+        params.append(institution)
+    if start_date:
+        clauses.append("date >= ?")
+        params.append(start_date)
+    if end_date:
+        # Inclusive end date: '~' sorts after any ' HH:MM:SS' time suffix
+        clauses.append("date < ?")
+        params.append(end_date + "~" if len(end_date) == 10 else end_date)
+
+    where = " WHERE " + " AND ".join(clauses) if clauses else ""
+    return where, params
+
+
+def fetch_results(email=None, institution=None, start_date=None, end_date=None, limit=None, db_path=None):
+    """Query results filtered by email, institution and/or date range (dates as 'YYYY-MM-DD')"""
+    where, params = results_filter(email, institution, start_date, end_date)
+
+    sql = "SELECT * FROM results" + where + " ORDER BY date, id"
+    if limit:
+        sql += " LIMIT ?"
+        params.append(int(limit))
+
+    conn = connect(db_path)
+    try:
+        return [dict(row) for row in conn.execute(sql, params)]
+    finally:
+        conn.close()
+
+
+def rebuild_rollups(db_path=None, batch_size=10000):
+    """Recompute all rollups from the results table (for databases created before rollups existed)"""
+    conn = connect(db_path)
+    try:
+        with transaction(conn):
+            conn.execute("DELETE FROM rollup_component")
+            conn.execute("DELETE FROM rollup_level")
+            cursor = conn.execute(f"SELECT {', '.join(RESULT_COLUMNS)} FROM results")
+            while True:
+                batch = cursor.fetchmany(batch_size)
+                if not batch:
+                    break
+                _update_rollups(conn, [tuple(row) for row in batch])
+    finally:
+        conn.close()
+
+
+def fetch_rollups(institution=ALL_INSTITUTIONS, db_path=None):
+    """
+    Institution statistics from the rollup tables, independent of history size.
+
+    Returns {"components": {component: {"n", "mean", "std"}}, "levels": {level: n},
+    "submissions": n}.
+    """
+    conn = connect(db_path)
+    try:
+        components = {}
+        for row in conn.execute(
+            "SELECT component, n, total, total_sq FROM rollup_component WHERE institution = ?", (institution,)
+        ):
+            n = row["n"]
+            mean = row["total"] / n if n else 0.0
+            variance = max(row["total_sq"] / n - mean * mean, 0.0) if n else 0.0
+            components[row["component"]] = {"n": n, "mean": mean, "std": variance ** 0.5}
+
+        levels = {
+            row["proficiency_level"]: row["n"]
+            for row in conn.execute(
+                "SELECT proficiency_level, n FROM rollup_level WHERE institution = ?", (institution,)
+            )
+        }
+
+        return {"components": components, "levels": levels, "submissions": sum(levels.values())}
+    finally:
+        conn.close()
+
+
+def list_institutions(db_path=None):
+    """Institutions that have at least one submission"""
+    conn = connect(db_path)
+    try:
+        return [
+            row[0] for row in conn.execute(
+                "SELECT DISTINCT institution FROM rollup_level WHERE institution != ? ORDER BY institution",
+                (ALL_INSTITUTIONS,)
+            )
+        ]
+    finally:
+        conn.close()
+
+
+def _file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def import_csv(csv_path, db_path=None, batch_size=1000):
+    """
+    One-time import of a legacy speaking_test_results.csv file.
+
+    Each file is recorded by content hash, so importing the same file twice is a no-op.
+    Rows that were mangled by concurrent appends (wrong field count, unparseable
+    numbers) are skipped and counted.
+
+    Returns (imported_rows, skipped_rows, already_imported).
+    """
+    sha256 = _file_sha256(csv_path)
+
+    conn = connect(db_path)
+    try:
+        if conn.execute("SELECT 1 FROM csv_imports WHERE sha256 = ?", (sha256,)).fetchone():
+            return 0, 0, True
+
+        imported = 0
+        skipped = 0
+        with transaction(conn):
+            with open(csv_path, newline="", encoding="utf-8", errors="replace") as f:
+                reader = csv.reader(f)
+                header = next(reader, None)
+                if not header:
+                    header = []
+                header = [h.strip() for h in header]
+
+                batch = []
+                for record in reader:
+                    # Skip blank lines and repeated header lines from concurrent appends
+                    if not record or [r.strip() for r in record] == header:
+                        continue
+                    if len(record) != len(header):
+                        skipped += 1
+                        continue
+                    try:
+                        values = _row_values(dict(zip(header, record)))
+                    except ValueError:
+                        skipped += 1
+                        continue
+                    if not values[0] or not values[-1]:
+                        skipped += 1
+                        continue
+
+                    batch.append(values)
+                    if len(batch) >= batch_size:
+                        _insert_result_rows(conn, batch)
+                        imported += len(batch)
+                        batch = []
+
+                if batch:
+                    _insert_result_rows(conn, batch)
+                    imported += len(batch)
+
+            conn.execute(
+                "INSERT INTO csv_imports (sha256, source_path, imported_rows, skipped_rows, imported_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (sha256, os.path.abspath(csv_path), imported, skipped,
+                 datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
+            )
+
+        return imported, skipped, False
+    finally:
+        conn.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Speaking test results store")
+    parser.add_argument("--db", default=DEFAULT_DB_PATH, help="Path to the results database")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    import_parser = subparsers.add_parser("import-csv", help="Import legacy CSV results files")
+    import_parser.add_argument("csv_paths", nargs="+")
+
+    subparsers.add_parser("rebuild-rollups", help="Recompute the dashboard rollups from all results")
+
+    args = parser.parse_args(argv)
+
+    if args.command == "import-csv":
+        for csv_path in args.csv_paths:
+            imported, skipped, already = import_csv(csv_path, db_path=args.db)
+            if already:
+                print(f"{csv_path}: already imported, skipping")
+            else:
+                print(f"{csv_path}: imported {imported} rows, skipped {skipped} malformed rows")
+    elif args.command == "rebuild-rollups":
+        rebuild_rollups(db_path=args.db)
+        print("Rollups rebuilt")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,520 @@
+"""
+Scoring rubric for the Speaking Proficiency Test.
+
+Scores are computed from the AssemblyAI transcript (and audio duration where
+available) on a 5-point scale per component. ``score_recording`` scores one
+recorded item for its part, and ``summarize_submission`` turns a session's
+scored recordings into the overall totals, proficiency level and feedback areas
+used by the results page, the email reports and the results store.
+"""
+
+import re
+
+from .telemetry import traced
+
+# Version of the scoring rubric, stored with every per-recording result row
+RUBRIC_VERSION = "2.0"
+
+# === LEXICONS ===
+# Built once at import; frozensets give O(1) membership tests in the scorers
+
+FILLER_WORDS = frozenset(['um', 'uh', 'like', 'you know', 'so', 'actually', 'basically', 
+                          'er', 'hmm', 'well', 'kind of', 'sort of', 'i mean'])
+_FILLER_PATTERNS = tuple(' ' + filler + ' ' for filler in FILLER_WORDS)
+
+ACADEMIC_WORDS = frozenset(['assessment', 'evaluation', 'analyze', 'demonstrate', 
+                            'implement', 'objective', 'criteria', 'performance',
+                            'develop', 'instruction', 'comprehension', 'formative',
+                            'summative', 'differentiate', 'pedagogy'])
+
+COMMON_VERBS = frozenset(['is', 'are', 'am', 'was', 'were', 'be', 'been', 'being',
+                          'have', 'has', 'had', 'do', 'does', 'did',
+                          'will', 'would', 'can', 'could', 'should', 'shall', 'may', 'might', 'must'])
+
+ARTICLES = frozenset(['a', 'an', 'the'])
+PREPOSITIONS = frozenset(['in', 'on', 'at', 'to', 'for', 'with', 'by', 'from', 'of', 'about'])
+CONJUNCTIONS = frozenset(['and', 'but', 'or', 'so', 'because', 'if', 'when', 'while', 'although'])
+SUBORDINATE_MARKERS = frozenset(['because', 'since', 'although', 'while', 'if', 'when', 'that', 'which', 'who'])
+
+def count_filler_words(transcript):
+    """Count filler word occurrences in a transcript"""
+    text_lower = transcript.lower()
+    return sum(text_lower.count(pattern) for pattern in _FILLER_PATTERNS)
+
+@traced("score.accuracy")
+def calculate_accuracy_score(transcript, reference):
+    """Calculate word accuracy score based on reference text"""
+    if not transcript or not reference:
+        return 0.5
+    
+    # Normalize text
+    transcript_lower = transcript.lower()
+    reference_lower = reference.lower()
+    
+    # Remove punctuation for comparison
+    transcript_clean = re.sub(r'[^\w\s]', '', transcript_lower)
+    reference_clean = re.sub(r'[^\w\s]', '', reference_lower)
+    
+    transcript_words = set(transcript_clean.split())
+    reference_words = set(reference_clean.split())
+    
+    if not reference_words:
+        return 0.5
+    
+    # Calculate matches
+    matches = len(transcript_words & reference_words)
+    total_ref_words = len(reference_words)
+    
+    # Score based on percentage of reference words found
+    accuracy_ratio = matches / total_ref_words
+    
+    # Convert to 5-point scale with better distribution
+    if accuracy_ratio >= 0.95:
+        score = 5.0
+    elif accuracy_ratio >= 0.85:
+        score = 4.5
+    elif accuracy_ratio >= 0.75:
+        score = 4.0
+    elif accuracy_ratio >= 0.65:
+        score = 3.5
+    elif accuracy_ratio >= 0.55:
+        score = 3.0
+    elif accuracy_ratio >= 0.45:
+        score = 2.5
+    elif accuracy_ratio >= 0.35:
+        score = 2.0
+    elif accuracy_ratio >= 0.25:
+        score = 1.5
+    elif accuracy_ratio >= 0.15:
+        score = 1.0
+    else:
+        score = 0.5
+    
+    return round(score, 1)
+
+@traced("score.fluency")
+def calculate_fluency_score(transcript, audio_duration=None):
+    """
+    Calculate fluency based on:
+    1. Speaking rate (words per minute)
+    2. Pronunciation quality (approximated via word completeness)
+    3. Verbal pauses (filler words and hesitations)
+    """
+    if not transcript or len(transcript.strip()) < 3:
+        return 0.5
+    
+    words = transcript.split()
+    word_count = len(words)
+    
+    if word_count == 0:
+        return 0.5
+    
+    # === 1. SPEAKING RATE (Speed) ===
+    # Ideal rate: 120-160 words per minute
+    if audio_duration and audio_duration > 0:
+        wpm = (word_count / audio_duration) * 60
+    else:
+        # Estimate: assume 2 seconds per word for short clips
+        estimated_duration = max(word_count * 2, 10)
+        wpm = (word_count / estimated_duration) * 60
+    
+    # Score speaking rate
+    if 120 <= wpm <= 160:
+        rate_score = 2.0  # Optimal rate
+    elif 100 <= wpm < 120 or 160 < wpm <= 180:
+        rate_score = 1.5  # Acceptable
+    elif 80 <= wpm < 100 or 180 < wpm <= 200:
+        rate_score = 1.0  # Needs improvement
+    else:
+        rate_score = 0.5  # Too slow or too fast
+    
+    # === 2. PRONUNCIATION QUALITY ===
+    # Approximate pronunciation by checking for complete, recognizable words
+    well_formed_words = [w for w in words if len(w) > 2 and w.isalpha()]
+    pronunciation_ratio = len(well_formed_words) / word_count if word_count > 0 else 0
+    
+    if pronunciation_ratio >= 0.85:
+        pronunciation_score = 2.0
+    elif pronunciation_ratio >= 0.70:
+        pronunciation_score = 1.5
+    elif pronunciation_ratio >= 0.55:
+        pronunciation_score = 1.0
+    else:
+        pronunciation_score = 0.5
+    
+    # === 3. VERBAL PAUSES (Fillers and Hesitations) ===
+    filler_count = count_filler_words(transcript)
+    
+    # Calculate filler ratio
+    filler_ratio = filler_count / word_count if word_count > 0 else 0
+    
+    # Score verbal pauses (lower filler ratio = better score)
+    if filler_ratio <= 0.05:  # Less than 5% fillers
+        pause_score = 1.0
+    elif filler_ratio <= 0.10:  # 5-10% fillers
+        pause_score = 0.75
+    elif filler_ratio <= 0.15:  # 10-15% fillers
+        pause_score = 0.5
+    else:  # More than 15% fillers
+        pause_score = 0.25
+    
+    # === TOTAL FLUENCY SCORE ===
+    total_score = rate_score + pronunciation_score + pause_score
+    
+    # Ensure score is between 0.5 and 5.0
+    final_score = max(0.5, min(5.0, total_score))
+    
+    return round(final_score, 1)
+
+@traced("score.intonation")
+def calculate_intonation_score(result):
+    """
+    Calculate intonation based on:
+    1. Pitch variation (estimated from punctuation and sentence structure)
+    2. Stress patterns (emphasized words, varied sentence types)
+    3. Volume dynamics (approximated from text features)
+    """
+    text = result.get("text", "")
+    
+    if not text or len(text.strip()) < 10:
+        return 1.0
+    
+    # === 1. PITCH VARIATION ===
+    # Indicated by questions, exclamations, and varied sentence types
+    has_question = "?" in text
+    has_exclamation = "!" in text
+    
+    question_count = text.count("?")
+    exclamation_count = text.count("!")
+    
+    # Score pitch variation
+    pitch_score = 1.0  # Base
+    if has_question:
+        pitch_score += 0.5
+    if has_exclamation:
+        pitch_score += 0.4
+    if question_count + exclamation_count >= 2:
+        pitch_score += 0.3  # Multiple varied sentences
+    
+    pitch_score = min(pitch_score, 2.0)
+    
+    # === 2. STRESS PATTERNS ===
+    # Estimated from sentence length variety and comma usage
+    sentences = re.split(r'[.!?]+', text)
+    sentence_lengths = [len(s.split()) for s in sentences if s.strip()]
+    
+    has_comma = "," in text
+    comma_count = text.count(",")
+    
+    # Check for length variation
+    if len(sentence_lengths) >= 2:
+        length_variance = len(set(sentence_lengths)) > 1
+    else:
+        length_variance = False
+    
+    stress_score = 1.0  # Base
+    
+    if has_comma:
+        stress_score += 0.3
+    if comma_count >= 2:
+        stress_score += 0.2
+    if length_variance:
+        stress_score += 0.5
+    
+    # Check for capitalized words (potential emphasis)
+    words = text.split()
+    mid_sentence_caps = sum(1 for w in words[1:] if w and w[0].isupper() and w not in ['I'])
+    if mid_sentence_caps > 0:
+        stress_score += 0.3
+    
+    stress_score = min(stress_score, 2.0)
+    
+    # === 3. VOLUME DYNAMICS ===
+    # Approximated by exclamations and emphasis markers
+    all_caps_words = sum(1 for w in words if w.isupper() and len(w) > 1)
+    has_repetition = len(words) != len(set(words))
+    
+    volume_score = 0.5  # Base
+    
+    if has_exclamation:
+        volume_score += 0.3
+    if all_caps_words > 0:
+        volume_score += 0.2
+    if has_repetition:
+        volume_score += 0.2
+    
+    volume_score = min(volume_score, 1.0)
+    
+    # === TOTAL INTONATION SCORE ===
+    total_score = pitch_score + stress_score + volume_score
+    
+    # Ensure variation between 1.0 and 5.0
+    final_score = max(1.0, min(5.0, total_score))
+    
+    return round(final_score, 1)
+
+@traced("score.vocabulary")
+def calculate_vocabulary_score(transcript):
+    """Calculate vocabulary richness and variety"""
+    if not transcript or len(transcript.strip()) < 5:
+        return 0.5
+    
+    words = transcript.lower().split()
+    unique_words = set(words)
+    
+    if len(words) == 0:
+        return 0.5
+    
+    # Vocabulary diversity ratio
+    diversity = len(unique_words) / len(words)
+    
+    # Advanced word count (words longer than 6 letters)
+    advanced_words = [w for w in words if len(w) > 6 and w.isalpha()]
+    advanced_ratio = len(advanced_words) / len(words) if words else 0
+    
+    # Academic/professional vocabulary
+    academic_count = sum(1 for word in words if word in ACADEMIC_WORDS)
+    academic_ratio = academic_count / len(words) if words else 0
+    
+    # Base score on diversity (0-3 points)
+    base_score = min(diversity * 3, 3.0)
+    
+    # Bonus for advanced vocabulary (0-1.5 points)
+    advanced_bonus = min(advanced_ratio * 1.5, 1.5)
+    
+    # Bonus for academic vocabulary (0-0.5 points)
+    academic_bonus = min(academic_ratio * 20, 0.5)
+    
+    final_score = min(base_score + advanced_bonus + academic_bonus, 5.0)
+    
+    return max(0.5, round(final_score, 1))
+
+@traced("score.grammar")
+def calculate_grammar_score(transcript):
+    """
+    Comprehensive grammar assessment based on:
+    1. Sentence structure and completeness
+    2. Subject-verb agreement patterns
+    3. Proper use of articles, prepositions, and conjunctions
+    4. Sentence variety and complexity
+    """
+    if not transcript or len(transcript.strip()) < 5:
+        return 0.5
+    
+    text_lower = transcript.lower()
+    
+    # Split into sentences
+    sentences = re.split(r'[.!?]+', transcript)
+    complete_sentences = [s.strip() for s in sentences if s.strip() and len(s.split()) >= 3]
+    
+    if len(complete_sentences) == 0:
+        return 1.0
+    
+    # === 1. SENTENCE STRUCTURE (2.0 points) ===
+    structure_score = 0.5  # Base
+    
+    # Check for proper capitalization
+    proper_caps = sum(1 for s in complete_sentences if s and s[0].isupper())
+    if proper_caps > 0:
+        structure_score += 0.5
+    
+    # Check for complete sentences
+    sentence_count = len(complete_sentences)
+    if sentence_count >= 2:
+        structure_score += 0.5
+    if sentence_count >= 3:
+        structure_score += 0.5
+    
+    structure_score = min(structure_score, 2.0)
+    
+    # === 2. VERB USAGE (1.5 points) ===
+    verb_score = 0
+    
+    lower_words = text_lower.split()
+    lower_word_set = set(lower_words)
+    
+    verb_count = sum(1 for word in lower_words if word in COMMON_VERBS)
+    
+    if verb_count >= 1:
+        verb_score += 0.5
+    if verb_count >= 2:
+        verb_score += 0.5
+    if verb_count >= 3:
+        verb_score += 0.5
+    
+    verb_score = min(verb_score, 1.5)
+    
+    # === 3. ARTICLES, PREPOSITIONS, CONJUNCTIONS (1.0 point) ===
+    function_score = 0
+    
+    has_articles = not ARTICLES.isdisjoint(lower_word_set)
+    has_prepositions = not PREPOSITIONS.isdisjoint(lower_word_set)
+    has_conjunctions = not CONJUNCTIONS.isdisjoint(lower_word_set)
+    
+    if has_articles:
+        function_score += 0.3
+    if has_prepositions:
+        function_score += 0.4
+    if has_conjunctions:
+        function_score += 0.3
+    
+    function_score = min(function_score, 1.0)
+    
+    # === 4. SENTENCE VARIETY & COMPLEXITY (0.5 points) ===
+    variety_score = 0
+    
+    # Check sentence length variety
+    sentence_lengths = [len(s.split()) for s in complete_sentences]
+    if len(set(sentence_lengths)) > 1:
+        variety_score += 0.25
+    
+    # Check for complex sentences
+    has_complexity = not SUBORDINATE_MARKERS.isdisjoint(lower_word_set)
+    if has_complexity:
+        variety_score += 0.25
+    
+    variety_score = min(variety_score, 0.5)
+    
+    # === TOTAL GRAMMAR SCORE ===
+    total_score = structure_score + verb_score + function_score + variety_score
+    
+    # Ensure variation between 0.5 and 5.0
+    final_score = max(0.5, min(5.0, total_score))
+    
+    return round(final_score, 1)
+
+@traced("score.features")
+def compute_speech_features(transcript, audio_duration=None):
+    """Compute the raw features behind the scores, stored for analytics and re-scoring"""
+    words = transcript.split()
+    word_count = len(words)
+    sentences = [s for s in re.split(r'[.!?]+', transcript) if s.strip()]
+    filler_count = count_filler_words(transcript)
+    
+    return {
+        "word_count": word_count,
+        "unique_word_ratio": round(len(set(w.lower() for w in words)) / word_count, 3) if word_count else 0,
+        "advanced_word_ratio": round(sum(1 for w in words if len(w) > 6 and w.isalpha()) / word_count, 3) if word_count else 0,
+        "sentence_count": len(sentences),
+        "filler_count": filler_count,
+        "filler_ratio": round(filler_count / word_count, 3) if word_count else 0,
+        "audio_duration": audio_duration,
+        "wpm": round(word_count / audio_duration * 60, 1) if audio_duration else None,
+        "question_count": transcript.count("?"),
+        "comma_count": transcript.count(","),
+    }
+
+
+# === TEST ITEMS ===
+
+PART1_SENTENCES = [
+    "Please open your books to page ten.",
+    "Work in pairs and discuss the question.",
+    "You have five minutes to complete this task.",
+    "Did everyone understand the instructions?",
+    "First, read the passage carefully, then answer the questions."
+]
+
+PART2_PROMPTS = [
+    "When will attendance be uploaded?",
+    "Can we submit the assignment late?",
+    "How do you differentiate between formative and summative assessment?"
+]
+
+PART3_PROMPT = "Explain how to write a good paragraph"
+
+# Components scored for each part, in display order
+PART_COMPONENTS = {
+    1: ["accuracy", "fluency", "intonation"],
+    2: ["vocabulary", "grammar", "fluency", "intonation"],
+    3: ["vocabulary", "grammar", "fluency", "intonation"],
+}
+
+def score_recording(part, result, reference=None):
+    """
+    Score one transcribed recording for its part.
+
+    result is the AssemblyAI transcript dict; reference is the sentence to repeat (Part 1).
+    Returns {component: score} in PART_COMPONENTS order.
+    """
+    transcript = result.get("text", "")
+    audio_duration = result.get("audio_duration", None)
+    
+    if part == 1:
+        return {
+            "accuracy": calculate_accuracy_score(transcript, reference),
+            "fluency": calculate_fluency_score(transcript, audio_duration),
+            "intonation": calculate_intonation_score(result),
+        }
+    
+    return {
+        "vocabulary": calculate_vocabulary_score(transcript),
+        "grammar": calculate_grammar_score(transcript),
+        "fluency": calculate_fluency_score(transcript, audio_duration),
+        "intonation": calculate_intonation_score(result),
+    }
+
+def item_average(part, rec):
+    """Average of a scored recording's components"""
+    components = PART_COMPONENTS[part]
+    return sum(getattr(rec, component) for component in components) / len(components)
+
+def proficiency_level(percentage):
+    """Proficiency level for an overall percentage"""
+    if percentage >= 90:
+        return "Expert"
+    elif percentage >= 75:
+        return "Advanced"
+    elif percentage >= 60:
+        return "Intermediate"
+    elif percentage >= 45:
+        return "Developing"
+    return "Emerging"
+
+def summarize_submission(part1_recordings, part2_recordings, part3_recording):
+    """
+    Overall results for a session's scored recordings (session_state.ItemRecord tuples).
+
+    Returns a dict with the per-part averages, totals, percentage, proficiency
+    level, per-component scores and averages, strengths and improvement areas.
+    """
+    part1_scores = [item_average(1, rec) for rec in part1_recordings.values()]
+    part2_scores = [item_average(2, rec) for rec in part2_recordings.values()]
+    part3_score = item_average(3, part3_recording) if part3_recording else 0
+    
+    total_score = sum(part1_scores) + sum(part2_scores) + part3_score
+    max_score = len(part1_scores) * 5 + len(part2_scores) * 5 + (5 if part3_score else 0)
+    percentage = (total_score / max_score * 100) if max_score > 0 else 0
+    
+    component_scores = {
+        "Accuracy": [],
+        "Fluency": [],
+        "Intonation": [],
+        "Vocabulary": [],
+        "Grammar": []
+    }
+    recordings = [(1, rec) for rec in part1_recordings.values()] + \
+                 [(2, rec) for rec in part2_recordings.values()] + \
+                 ([(3, part3_recording)] if part3_recording else [])
+    for part, rec in recordings:
+        for component in PART_COMPONENTS[part]:
+            component_scores[component.capitalize()].append(getattr(rec, component))
+    
+    avg_scores = {
+        component: sum(scores) / len(scores)
+        for component, scores in component_scores.items() if scores
+    }
+    
+    return {
+        "part1_scores": part1_scores,
+        "part2_scores": part2_scores,
+        "part3_score": part3_score,
+        "total_score": total_score,
+        "max_score": max_score,
+        "percentage": percentage,
+        "proficiency_level": proficiency_level(percentage),
+        "component_scores": component_scores,
+        "avg_scores": avg_scores,
+        "strengths": [component for component, avg in avg_scores.items() if avg >= 4.0],
+        "improvements": [component for component, avg in avg_scores.items() if avg < 3.0],
+    }
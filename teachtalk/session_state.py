@@ -0,0 +1,460 @@
+"""
+Compact, memory-bounded test session state.
+
+``st.session_state`` only holds a session token. Each teacher's progress is a
+``TestSession`` of compact ``ItemRecord`` tuples (scores, transcript, feature
+values and the audio hash; never the audio itself) kept in a process-wide
+``SessionStore``. The store tracks an estimate of every session's size and,
+when the total passes the server-wide budget, spills the least recently used
+sessions to disk; they are loaded back transparently on their next run.
+
+Recorded audio goes to the content-addressed ``audio_archive`` on disk, so the
+app can drop the ``UploadedFile`` buffer from widget state as soon as a
+recording is scored.
+
+``RedisSessionStore`` is the drop-in alternative for running several app
+replicas without sticky sessions: every run reads and writes the session
+(``TestSession.to_bytes()``) in a shared Redis, so any replica can serve any
+teacher and progress survives restarts. The token is kept in the page URL so a
+reconnect to another replica resumes the same test. ``redis`` is imported
+only when this backend is used (install requirements-redis.txt); see
+``devtools/redis_standin.py`` for a local stand-in server.
+"""
+
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from collections import OrderedDict, namedtuple
+
+DEFAULT_SPILL_DIR = os.path.join(tempfile.gettempdir(), "teachtalk_spill")
+
+# Order of the speech feature values stored in ItemRecord.features
+FEATURE_KEYS = (
+    "word_count", "unique_word_ratio", "advanced_word_ratio", "sentence_count", "filler_count",
+    "filler_ratio", "audio_duration", "wpm", "question_count", "comma_count",
+    "silence_trimmed", "long_pauses",
+)
+
+# Bump when ITEM_FIELDS or FEATURE_KEYS change so stored sessions are not misread
+SESSION_FORMAT = 2
+
+# Formats from_bytes still reads: format 1 records lack silence_trimmed and
+# long_pauses, which are padded with None, so sessions survive a deploy
+READABLE_FORMATS = (1, SESSION_FORMAT)
+
+ITEM_FIELDS = (
+    "audio_hash", "transcript", "accuracy", "vocabulary", "grammar", "fluency", "intonation",
+    "features", "timestamp",
+)
+
+
+class ItemRecord(namedtuple("ItemRecord", ITEM_FIELDS, defaults=(None,) * len(ITEM_FIELDS))):
+    """One scored recording; components a part does not score are None"""
+
+    __slots__ = ()
+
+    @classmethod
+    def create(cls, audio_hash, transcript, scores, features, timestamp):
+        """Build a record from score and feature dicts"""
+        return cls(
+            audio_hash=audio_hash,
+            transcript=transcript,
+            features=tuple(features.get(key) for key in FEATURE_KEYS) if features else None,
+            timestamp=timestamp,
+            **scores
+        )
+
+    def feature_dict(self):
+        return dict(zip(FEATURE_KEYS, self.features)) if self.features else None
+
+
+class TestSession:
+    """A teacher's progress through the test"""
+
+    __slots__ = ("part1", "part2", "part3", "submitted")
+
+    def __init__(self, part1=None, part2=None, part3=None, submitted=False):
+        self.part1 = part1 if part1 is not None else {}
+        self.part2 = part2 if part2 is not None else {}
+        self.part3 = part3
+        self.submitted = submitted
+
+    def has_recordings(self):
+        return bool(self.part1 or self.part2 or self.part3)
+
+    def claim_submission(self):
+        """Mark as submitted; False if it already was (pass to a store's update() so only one submit wins)"""
+        if self.submitted:
+            return False
+        self.submitted = True
+        return True
+
+    def release_submission(self):
+        """Undo claim_submission when saving the results failed"""
+        self.submitted = False
+
+    def get_item(self, part, item_key):
+        return self.part3 if part == 3 else (self.part1 if part == 1 else self.part2).get(item_key)
+
+    def set_item(self, part, item_key, rec):
+        if part == 3:
+            self.part3 = rec
+        else:
+            (self.part1 if part == 1 else self.part2)[item_key] = rec
+
+    def to_dict(self):
+        return {
+            "part1": {key: list(rec) for key, rec in self.part1.items()},
+            "part2": {key: list(rec) for key, rec in self.part2.items()},
+            "part3": list(self.part3) if self.part3 else None,
+            "submitted": self.submitted,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        def record(values):
+            values = list(values)
+            if values[7] is not None:
+                # Feature values added since the record was stored are unknown
+                values[7] = tuple(values[7]) + (None,) * (len(FEATURE_KEYS) - len(values[7]))
+            return ItemRecord(*values)
+
+        return cls(
+            part1={key: record(values) for key, values in data["part1"].items()},
+            part2={key: record(values) for key, values in data["part2"].items()},
+            part3=record(data["part3"]) if data["part3"] else None,
+            submitted=data["submitted"],
+        )
+
+    def to_bytes(self):
+        """Compact serialized form: positional JSON arrays, no field names"""
+        data = self.to_dict()
+        return json.dumps(
+            [SESSION_FORMAT, data["part1"], data["part2"], data["part3"], data["submitted"]],
+            separators=(",", ":")
+        ).encode("utf-8")
+
+    @classmethod
+    def from_bytes(cls, raw):
+        version, part1, part2, part3, submitted = json.loads(raw)
+        if version not in READABLE_FORMATS:
+            raise ValueError(f"Unsupported session format {version}")
+        return cls.from_dict({"part1": part1, "part2": part2, "part3": part3, "submitted": submitted})
+
+    def recording_rows(self, sentences, prompts, part3_prompt, rubric_version):
+        """Per-recording rows for results_store.save_submission"""
+        rows = []
+        items = [(1, f"sentence_{i}", sentence, self.part1.get(f"sentence_{i}")) for i, sentence in enumerate(sentences)]
+        items += [(2, f"prompt_{i}", prompt, self.part2.get(f"prompt_{i}")) for i, prompt in enumerate(prompts)]
+        items.append((3, "explanation", part3_prompt, self.part3))
+
+        for part, item_key, prompt, rec in items:
+            if rec is None:
+                continue
+            row = {
+                "part": part, "item_key": item_key, "prompt": prompt,
+                "transcript": rec.transcript, "audio_hash": rec.audio_hash,
+                "features": rec.feature_dict(), "rubric_version": rubric_version,
+                "recorded_at": rec.timestamp,
+            }
+            for component in ("accuracy", "vocabulary", "grammar", "fluency", "intonation"):
+                if getattr(rec, component) is not None:
+                    row[component] = getattr(rec, component)
+            rows.append(row)
+        return rows
+
+
+def new_token():
+    return uuid.uuid4().hex
+
+
+def is_valid_token(token):
+    """Whether a string (e.g. from the URL) looks like a token from new_token()"""
+    return isinstance(token, str) and len(token) == 32 and all(c in "0123456789abcdef" for c in token)
+
+
+def deep_size(obj):
+    """Approximate memory held by a TestSession (or any nested tuples/lists/dicts of scalars)"""
+    if isinstance(obj, TestSession):
+        return sys.getsizeof(obj) + deep_size(obj.part1) + deep_size(obj.part2) + deep_size(obj.part3)
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(deep_size(key) + deep_size(value) for key, value in obj.items())
+    elif isinstance(obj, (tuple, list)):
+        size += sum(deep_size(value) for value in obj)
+    return size
+
+
+def _write_atomic(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+class SpillStore:
+    """
+    Spilled sessions (and partial uploads, see teachtalk.uploads) under one directory.
+
+    Sessions spilled more than max_age_seconds ago (abandoned tests) are
+    deleted by remove_expired(), which writing a session runs at most every
+    sweep_interval seconds.
+    """
+
+    def __init__(self, root=None, max_age_seconds=24 * 3600, sweep_interval=300):
+        self.root = root or DEFAULT_SPILL_DIR
+        self.max_age_seconds = max_age_seconds
+        self.sweep_interval = sweep_interval
+        self._last_sweep = 0.0
+
+    def _session_path(self, token):
+        return os.path.join(self.root, "sessions", f"{token}.json")
+
+    def write_session(self, token, session):
+        _write_atomic(self._session_path(token), session.to_bytes())
+        if time.time() - self._last_sweep > self.sweep_interval:
+            self.remove_expired()
+
+    def remove_expired(self):
+        """Delete sessions spilled more than max_age_seconds ago; returns how many"""
+        self._last_sweep = time.time()
+        directory = os.path.join(self.root, "sessions")
+        cutoff = self._last_sweep - self.max_age_seconds
+        removed = 0
+        try:
+            names = os.listdir(directory)
+        except FileNotFoundError:
+            return 0
+        for name in names:
+            if not name.endswith(".json"):
+                continue
+            path = os.path.join(directory, name)
+            try:
+                if os.path.getmtime(path) < cutoff:
+                    os.unlink(path)
+                    removed += 1
+            except FileNotFoundError:
+                pass
+        return removed
+
+    def read_session(self, token):
+        try:
+            with open(self._session_path(token), "rb") as f:
+                return TestSession.from_bytes(f.read())
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def delete_session(self, token):
+        try:
+            os.unlink(self._session_path(token))
+        except FileNotFoundError:
+            pass
+
+
+class SessionStore:
+    """
+    Process-wide TestSession store with a memory budget.
+
+    Sessions are kept in LRU order; saving a session that takes the total over
+    budget_bytes spills the least recently used other sessions to the SpillStore.
+    """
+
+    def __init__(self, spill_store=None, budget_bytes=256 * 1024 * 1024):
+        self.spill_store = spill_store or SpillStore()
+        self.budget_bytes = budget_bytes
+
+        self._lock = threading.Lock()
+        self._sessions = OrderedDict()
+        self._sizes = {}
+        self._last_seen = {}
+        self._total = 0
+        self.evictions = 0
+        self.restores = 0
+
+    new_token = staticmethod(new_token)
+
+    def load(self, token):
+        """The session for a token: from memory, restored from disk, or new"""
+        with self._lock:
+            return self._load(token)
+
+    def _load(self, token):
+        session = self._sessions.get(token)
+        if session is not None:
+            self._sessions.move_to_end(token)
+            self._last_seen[token] = time.time()
+            return session
+
+        session = self.spill_store.read_session(token)
+        if session is not None:
+            self.spill_store.delete_session(token)
+            self.restores += 1
+        else:
+            session = TestSession()
+        self._save(token, session)
+        return session
+
+    def save(self, token, session):
+        """Record a session's current contents and enforce the memory budget"""
+        with self._lock:
+            self._save(token, session)
+
+    def update(self, token, change):
+        """
+        Load, ``change(session)`` and save as one step, so concurrent writers
+        (e.g. API workers scoring items of the same test) never lose each
+        other's changes. Returns what ``change`` returns.
+        """
+        with self._lock:
+            session = self._load(token)
+            result = change(session)
+            self._save(token, session)
+            return result
+
+    def _save(self, token, session):
+        size = deep_size(session)
+        self._total += size - self._sizes.get(token, 0)
+        self._sessions[token] = session
+        self._sessions.move_to_end(token)
+        self._sizes[token] = size
+        self._last_seen[token] = time.time()
+
+        # Spill while still holding the lock so a concurrent load never misses a session
+        while self._total > self.budget_bytes and len(self._sessions) > 1:
+            old_token, old_session = next(iter(self._sessions.items()))
+            self.spill_store.write_session(old_token, old_session)
+            self._drop(old_token)
+            self.evictions += 1
+
+    def discard(self, token):
+        """Forget a session entirely (e.g. after a retake)"""
+        with self._lock:
+            if token in self._sessions:
+                self._drop(token)
+        self.spill_store.delete_session(token)
+
+    def _drop(self, token):
+        del self._sessions[token]
+        self._total -= self._sizes.pop(token)
+        self._last_seen.pop(token, None)
+
+    def session_bytes(self, token):
+        with self._lock:
+            return self._sizes.get(token, 0)
+
+    def stats(self, top=10):
+        """Memory use: totals plus the largest sessions"""
+        with self._lock:
+            largest = sorted(self._sizes.items(), key=lambda item: item[1], reverse=True)[:top]
+            return {
+                "sessions": len(self._sessions),
+                "bytes": self._total,
+                "budget_bytes": self.budget_bytes,
+                "evictions": self.evictions,
+                "restores": self.restores,
+                "largest": [
+                    {"token": token[:8], "bytes": size, "last_seen": self._last_seen.get(token)}
+                    for token, size in largest
+                ],
+            }
+
+
+class RedisSessionStore:
+    """
+    TestSession store shared by every replica through Redis.
+
+    Same interface as SessionStore. Sessions expire ttl_seconds after their
+    last save; partial uploads still go to the (ideally shared) SpillStore directory.
+    """
+
+    KEY_PREFIX = "teachtalk:session:"
+
+    def __init__(self, url, spill_store=None, ttl_seconds=24 * 3600):
+        import redis
+
+        self.client = redis.Redis.from_url(url, protocol=2, socket_timeout=5, health_check_interval=30)
+        self._watch_error = redis.WatchError
+        self.spill_store = spill_store or SpillStore()
+        self.ttl_seconds = ttl_seconds
+        self.budget_bytes = None
+
+        self._lock = threading.Lock()
+        self.evictions = 0
+        self.restores = 0
+
+    new_token = staticmethod(new_token)
+
+    def _key(self, token):
+        return f"{self.KEY_PREFIX}{token}"
+
+    @staticmethod
+    def _decode(raw):
+        if raw is None:
+            return TestSession()
+        try:
+            return TestSession.from_bytes(raw)
+        except ValueError:
+            return TestSession()
+
+    def load(self, token):
+        """The session for a token, or a new one (not stored until it is saved)"""
+        raw = self.client.get(self._key(token))
+        if raw is not None:
+            with self._lock:
+                self.restores += 1
+        return self._decode(raw)
+
+    def save(self, token, session):
+        self.client.set(self._key(token), session.to_bytes(), ex=self.ttl_seconds)
+
+    def update(self, token, change):
+        """
+        Load, ``change(session)`` and save as one step (WATCH/MULTI): if another
+        replica saves the session in between, the change is applied again to
+        its version. Returns what ``change`` returns.
+        """
+        key = self._key(token)
+        with self.client.pipeline() as pipe:
+            while True:
+                try:
+                    pipe.watch(key)
+                    session = self._decode(pipe.get(key))
+                    result = change(session)
+                    pipe.multi()
+                    pipe.set(key, session.to_bytes(), ex=self.ttl_seconds)
+                    pipe.execute()
+                    return result
+                except self._watch_error:
+                    continue
+
+    def discard(self, token):
+        self.client.delete(self._key(token))
+
+    def session_bytes(self, token):
+        return self.client.strlen(self._key(token))
+
+    def stats(self, top=10):
+        """Stored sessions and their serialized sizes (scans the key space; for the admin page)"""
+        keys = list(self.client.scan_iter(match=f"{self.KEY_PREFIX}*", count=500))
+        pipe = self.client.pipeline(transaction=False)
+        for key in keys:
+            pipe.strlen(key)
+        sizes = dict(zip(keys, pipe.execute())) if keys else {}
+        largest = sorted(sizes.items(), key=lambda item: item[1], reverse=True)[:top]
+        with self._lock:
+            return {
+                "sessions": len(sizes),
+                "bytes": sum(sizes.values()),
+                "budget_bytes": None,
+                "evictions": self.evictions,
+                "restores": self.restores,
+                "largest": [
+                    {"token": key.decode("utf-8")[len(self.KEY_PREFIX):][:8], "bytes": size, "last_seen": None}
+                    for key, size in largest
+                ],
+            }
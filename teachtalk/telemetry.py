@@ -0,0 +1,233 @@
+"""
+Per-stage timing spans, exported as Prometheus metrics and a JSON trace file.
+
+Spans wrap each stage of the assessment flow: the AssemblyAI upload, the
+transcript request and polling, every scorer, the results save, queueing the
+report emails and the SMTP send. Every finished span feeds a per-stage
+duration histogram. With a trace file configured it is also appended there as
+one JSON object per line, shaped like an OpenTelemetry span (traceId, spanId,
+parentSpanId, name, start/end in Unix nanoseconds, attributes, status).
+Nested spans in the same thread share a trace.
+
+Telemetry is off unless ``TEACHTALK_TELEMETRY=1`` or ``TEACHTALK_TRACE_FILE`` is
+set when the process starts. While it is off, ``span()`` returns a shared no-op
+context manager and ``traced`` returns the function unchanged, so the
+instrumentation costs one flag check per stage.
+
+Metrics are served at ``/metrics`` by the API (``teachtalk.api``), and by a
+small HTTP server for the Streamlit app when ``TEACHTALK_METRICS_PORT`` is set.
+
+Usage:
+    TEACHTALK_TELEMETRY=1 TEACHTALK_METRICS_PORT=9108 streamlit run app.py
+    TEACHTALK_TRACE_FILE=/tmp/trace.jsonl uvicorn teachtalk.api:app
+    python -m teachtalk.telemetry /tmp/trace.jsonl
+"""
+
+import argparse
+import contextvars
+import functools
+import json
+import os
+import statistics
+import threading
+import time
+from contextlib import nullcontext
+
+TRACE_FILE = os.environ.get("TEACHTALK_TRACE_FILE")
+ENABLED = bool(TRACE_FILE) or os.environ.get("TEACHTALK_TELEMETRY", "") not in ("", "0", "false")
+METRICS_PORT = int(os.environ.get("TEACHTALK_METRICS_PORT") or 0)
+
+# Histogram bucket upper bounds in seconds
+BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+_current_span = contextvars.ContextVar("teachtalk_span", default=None)
+
+_lock = threading.Lock()
+_histograms = {}
+_errors = {}
+_trace_lock = threading.Lock()
+
+
+def _observe(stage, seconds, error=False):
+    with _lock:
+        histogram = _histograms.get(stage)
+        if histogram is None:
+            histogram = _histograms[stage] = [[0] * len(BUCKETS), 0.0, 0]
+        counts = histogram[0]
+        for i, bound in enumerate(BUCKETS):
+            if seconds <= bound:
+                counts[i] += 1
+                break
+        histogram[1] += seconds
+        histogram[2] += 1
+        if error:
+            _errors[stage] = _errors.get(stage, 0) + 1
+
+
+def observe(stage, seconds):
+    """Record a duration measured elsewhere (e.g. time a message waited in the outbox)"""
+    if ENABLED:
+        _observe(stage, seconds)
+
+
+class _Span:
+    __slots__ = ("name", "attributes", "trace_id", "span_id", "parent_id", "start_ns", "_start", "_token")
+
+    def __init__(self, name, attributes):
+        self.name = name
+        self.attributes = attributes
+
+    def set(self, key, value):
+        """Add an attribute to the span"""
+        self.attributes[key] = value
+
+    def __enter__(self):
+        parent = _current_span.get()
+        self.trace_id = parent.trace_id if parent else os.urandom(16).hex()
+        self.parent_id = parent.span_id if parent else None
+        self.span_id = os.urandom(8).hex()
+        self.start_ns = time.time_ns()
+        self._start = time.perf_counter()
+        self._token = _current_span.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        elapsed = time.perf_counter() - self._start
+        _current_span.reset(self._token)
+        _observe(self.name, elapsed, error=exc_type is not None)
+        if TRACE_FILE:
+            record = {
+                "traceId": self.trace_id,
+                "spanId": self.span_id,
+                "parentSpanId": self.parent_id,
+                "name": self.name,
+                "startTimeUnixNano": self.start_ns,
+                "endTimeUnixNano": self.start_ns + int(elapsed * 1e9),
+                "attributes": self.attributes,
+                "status": {"code": "ERROR", "message": repr(exc)} if exc_type else {"code": "OK"},
+            }
+            line = json.dumps(record, default=str) + "\n"
+            with _trace_lock:
+                with open(TRACE_FILE, "a", encoding="utf-8") as f:
+                    f.write(line)
+        return False
+
+
+class _NoopSpan:
+    def set(self, key, value):
+        pass
+
+
+_NOOP_SPAN = nullcontext(_NoopSpan())
+
+
+def span(name, **attributes):
+    """Context manager timing one stage; ``with span(...) as s: s.set(key, value)``"""
+    if not ENABLED:
+        return _NOOP_SPAN
+    return _Span(name, attributes)
+
+
+def traced(name):
+    """Decorator form of span(); a no-op (returns the function itself) when telemetry is off"""
+    def decorate(func):
+        if not ENABLED:
+            return func
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with _Span(name, {}):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def render_prometheus():
+    """All stage histograms in the Prometheus text exposition format"""
+    with _lock:
+        histograms = {stage: (list(counts), total, count) for stage, (counts, total, count) in _histograms.items()}
+        errors = dict(_errors)
+
+    lines = [
+        "# HELP teachtalk_stage_duration_seconds Time spent in each stage of the assessment flow",
+        "# TYPE teachtalk_stage_duration_seconds histogram",
+    ]
+    for stage in sorted(histograms):
+        counts, total, count = histograms[stage]
+        cumulative = 0
+        for bound, bucket_count in zip(BUCKETS, counts):
+            cumulative += bucket_count
+            lines.append(f'teachtalk_stage_duration_seconds_bucket{{stage="{stage}",le="{bound}"}} {cumulative}')
+        lines.append(f'teachtalk_stage_duration_seconds_bucket{{stage="{stage}",le="+Inf"}} {count}')
+        lines.append(f'teachtalk_stage_duration_seconds_sum{{stage="{stage}"}} {total:.6f}')
+        lines.append(f'teachtalk_stage_duration_seconds_count{{stage="{stage}"}} {count}')
+    lines += [
+        "# HELP teachtalk_stage_errors_total Stages that ended with an exception",
+        "# TYPE teachtalk_stage_errors_total counter",
+    ]
+    for stage in sorted(errors):
+        lines.append(f'teachtalk_stage_errors_total{{stage="{stage}"}} {errors[stage]}')
+    return "\n".join(lines) + "\n"
+
+
+def serve_metrics(port, host="0.0.0.0"):
+    """Serve render_prometheus() at /metrics from a background thread; returns the server"""
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, format, *args):
+            pass
+
+        def do_GET(self):
+            if self.path.split("?", 1)[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = render_prometheus().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics-server", daemon=True).start()
+    return server
+
+
+def summarize(path):
+    """Per-span-name count and duration percentiles from a trace file"""
+    durations = {}
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                record = json.loads(line)
+                ms = (record["endTimeUnixNano"] - record["startTimeUnixNano"]) / 1e6
+                durations.setdefault(record["name"], []).append(ms)
+
+    summary = []
+    for name, values in sorted(durations.items()):
+        values.sort()
+        summary.append({
+            "name": name,
+            "count": len(values),
+            "median_ms": statistics.median(values),
+            "p90_ms": values[int(len(values) * 0.9)],
+            "max_ms": values[-1],
+        })
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Summarize a telemetry trace file")
+    parser.add_argument("trace", help="File written via TEACHTALK_TRACE_FILE")
+    args = parser.parse_args(argv)
+
+    print(f"{'span':<28} {'count':>6} {'p50':>10} {'p90':>10} {'max':>10}")
+    for row in summarize(args.trace):
+        print(f"{row['name']:<28} {row['count']:>6} {row['median_ms']:>8.2f}ms "
+              f"{row['p90_ms']:>8.2f}ms {row['max_ms']:>8.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,210 @@
+"""
+Speech-to-text through the AssemblyAI REST API.
+
+``requests`` is imported on first use so that loading this module (on every
+app start) stays cheap.
+
+Recordings are identified by a blake2b hash of their bytes. ``TranscriptIndex``
+maps those hashes to transcription jobs for the whole process, so an identical
+upload (a rerun, a second tab, another teacher submitting the same file) waits
+for or reuses the first job's result instead of transcribing again.
+"""
+
+import hashlib
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+
+from .telemetry import span, traced
+
+DEFAULT_BASE_URL = "https://api.assemblyai.com"
+
+HASH_CHUNK_SIZE = 64 * 1024
+
+
+def get_audio_hash(audio, chunk_size=HASH_CHUNK_SIZE):
+    """
+    Hex blake2b digest of an uploaded recording.
+
+    Reads the upload's buffer (``getbuffer()``, or any bytes-like object) through
+    memoryview slices, so the audio is never copied.
+    """
+    buffer = audio.getbuffer() if hasattr(audio, "getbuffer") else audio
+    digest = hashlib.blake2b(digest_size=16)
+    with memoryview(buffer) as view:
+        view = view.cast("B")
+        for offset in range(0, len(view), chunk_size):
+            digest.update(view[offset:offset + chunk_size])
+    return digest.hexdigest()
+
+
+class TranscriptIndex:
+    """
+    Process-wide audio hash -> transcription job (a Future of ``(result, error)``).
+
+    The first caller for a hash runs the job itself, in the calling thread, and
+    always resolves the Future when it returns or raises; concurrent callers
+    with the same hash wait on that Future. Completed transcripts
+    are kept for the most recent ``max_entries`` hashes; failed jobs are
+    forgotten so the next attempt retries.
+    """
+
+    def __init__(self, max_entries=512):
+        self.max_entries = max_entries
+
+        self._lock = threading.Lock()
+        self._jobs = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def transcribe(self, audio_hash, job, timeout=None):
+        """``(result, error)`` for a hash, running ``job()`` only if no other call has"""
+        with self._lock:
+            future = self._jobs.get(audio_hash)
+            owner = future is None
+            if owner:
+                future = self._jobs[audio_hash] = Future()
+                self.misses += 1
+                while len(self._jobs) > self.max_entries:
+                    self._jobs.popitem(last=False)
+            else:
+                self._jobs.move_to_end(audio_hash)
+                self.hits += 1
+        if not owner:
+            return future.result(timeout=timeout)
+
+        result, error = None, "Error: transcription interrupted"
+        try:
+            result, error = job()
+        except Exception as e:
+            result, error = None, f"Error: {str(e)}"
+        finally:
+            # Always resolve the Future (even on KeyboardInterrupt/SystemExit) so waiters never hang
+            if error:
+                self.forget(audio_hash)
+            future.set_result((result, error))
+        return result, error
+
+    def forget(self, audio_hash):
+        with self._lock:
+            self._jobs.pop(audio_hash, None)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._jobs),
+                "in_flight": sum(1 for future in self._jobs.values() if not future.done()),
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+@traced("transcribe")
+def transcribe_audio_assemblyai(audio_bytes, api_key, session=None, base_url=DEFAULT_BASE_URL,
+                                poll_seconds=2.0):
+    """
+    Transcribe audio using AssemblyAI API with improved error handling
+
+    Pass a shared requests.Session to reuse keep-alive connections across calls.
+    ``base_url`` can point at a mock server (see devtools/assemblyai_mock.py).
+    """
+    if not api_key:
+        return None, "Error: AssemblyAI API key not configured in Streamlit secrets."
+    
+    import requests
+    
+    http = session if session is not None else requests
+    
+    # Create temporary file
+    with tempfile.NamedTemporaryFile(delete=False, suffix='.webm', mode='wb') as tmp:
+        tmp.write(audio_bytes.getbuffer())
+        tmp_path = tmp.name
+    
+    try:
+        headers = {"authorization": api_key}
+        
+        # Upload audio
+        with span("transcribe.upload") as s, open(tmp_path, "rb") as f:
+            s.set("bytes", os.fstat(f.fileno()).st_size)
+            upload_response = http.post(
+                f"{base_url}/v2/upload",
+                headers=headers,
+                data=f,
+                timeout=30
+            )
+            s.set("http.status_code", upload_response.status_code)
+        
+        if upload_response.status_code != 200:
+            return None, f"Upload error: {upload_response.text}"
+        
+        upload_url = upload_response.json().get("upload_url")
+        if not upload_url:
+            return None, "Error: Failed to get upload URL"
+        
+        # Request transcription
+        with span("transcribe.request") as s:
+            transcript_response = http.post(
+                f"{base_url}/v2/transcript",
+                json={
+                    "audio_url": upload_url,
+                    "speech_models": ["best"],
+                    "punctuate": True,
+                    "format_text": True
+                },
+                headers=headers,
+                timeout=30
+            )
+            s.set("http.status_code", transcript_response.status_code)
+        
+        if transcript_response.status_code != 200:
+            return None, f"Transcription request error: {transcript_response.text}"
+        
+        transcript_data = transcript_response.json()
+        transcript_id = transcript_data.get("id")
+        
+        if not transcript_id:
+            return None, "Error: No transcript ID received"
+        
+        # Poll for completion with timeout
+        max_attempts = max(1, int(180 / poll_seconds))
+        with span("transcribe.poll") as s:
+            for attempt in range(max_attempts):
+                s.set("attempts", attempt + 1)
+                status_response = http.get(
+                    f"{base_url}/v2/transcript/{transcript_id}",
+                    headers=headers,
+                    timeout=30
+                )
+                
+                if status_response.status_code != 200:
+                    return None, f"Status check error: {status_response.text}"
+                
+                result = status_response.json()
+                status = result.get("status")
+                
+                if status == "completed":
+                    return result, None
+                elif status == "error":
+                    error_msg = result.get("error", "Unknown error")
+                    return None, f"Transcription failed: {error_msg}"
+                
+                time.sleep(poll_seconds)
+        
+        return None, "Error: Transcription timeout (exceeded 3 minutes)"
+    
+    except requests.exceptions.Timeout:
+        return None, "Error: Request timeout. Please check your internet connection."
+    except requests.exceptions.RequestException as e:
+        return None, f"Error: Network error - {str(e)}"
+    except Exception as e:
+        return None, f"Error: {str(e)}"
+    finally:
+        # Clean up temporary file
+        if os.path.exists(tmp_path):
+            try:
+                os.unlink(tmp_path)
+            except:
+                pass
@@ -0,0 +1,43 @@
+"""Small Streamlit display helpers shared by the app pages"""
+
+import streamlit as st
+
+from .scoring import PART1_SENTENCES, PART2_PROMPTS
+
+PROFICIENCY_EMOJI = {
+    "Expert": "🌟",
+    "Advanced": "🎯",
+    "Intermediate": "📈",
+    "Developing": "🌱",
+    "Emerging": "🔰",
+}
+
+
+def display_star_rating(score, label):
+    """Display score as stars (out of 5)"""
+    filled_stars = int(round(score))
+    empty_stars = 5 - filled_stars
+    stars = "⭐" * filled_stars + "☆" * empty_stars
+    st.write(f"**{label}:** {stars} ({score:.1f}/5)")
+
+
+def calculate_progress(test_session):
+    """Calculate overall test completion progress"""
+    total = len(PART1_SENTENCES) + len(PART2_PROMPTS) + 1
+
+    completed = len(test_session.part1) + \
+                len(test_session.part2) + \
+                (1 if test_session.part3 else 0)
+
+    return completed, total
+
+
+def render_progress(placeholder, test_session):
+    """Draw the progress counter into an st.empty placeholder (redrawn in place by fragments)"""
+    completed, total = calculate_progress(test_session)
+    progress_percentage = completed / total
+
+    with placeholder.container():
+        st.markdown("### 📊 Test Progress")
+        st.progress(progress_percentage)
+        st.write(f"**{completed}/{total} recordings completed** ({int(progress_percentage * 100)}%)")
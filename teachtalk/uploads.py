@@ -0,0 +1,123 @@
+"""
+Resumable uploads: a recording sent in chunks that survives dropped connections.
+
+The client declares the recording's size, then sends it in chunks of at most
+``chunk_size`` bytes, each tagged with the offset it starts at. Every chunk is
+appended to a ``.part`` file on disk as soon as it has fully arrived, so
+memory use per upload is one chunk however long the recording is. After a
+dropped connection the client asks for the current offset (the bytes acknowledged
+so far) and resends from there; nothing before it is sent twice.
+
+Uploads live under ``<root>/<upload_id>.part`` with a small ``.json`` sidecar
+naming the session and item they belong to. Put ``root`` on a shared volume
+to let several API replicas continue each other's uploads. Unfinished uploads
+older than ``max_age_seconds`` are removed when new ones are created.
+"""
+
+import json
+import os
+import threading
+import time
+import uuid
+
+DEFAULT_CHUNK_SIZE = 256 * 1024
+
+
+class UploadStore:
+    """Partial uploads on disk, appended chunk by chunk"""
+
+    def __init__(self, root, chunk_size=DEFAULT_CHUNK_SIZE, max_age_seconds=24 * 3600):
+        self.root = root
+        self.chunk_size = chunk_size
+        self.max_age_seconds = max_age_seconds
+        self._lock = threading.Lock()
+        self._upload_locks = {}
+
+    def _path(self, upload_id, suffix):
+        # upload_id comes from a URL: only accept IDs this store could have made
+        if len(upload_id) != 32 or not all(c in "0123456789abcdef" for c in upload_id):
+            raise KeyError(upload_id)
+        return os.path.join(self.root, upload_id + suffix)
+
+    def _upload_lock(self, upload_id):
+        with self._lock:
+            return self._upload_locks.setdefault(upload_id, threading.Lock())
+
+    def create(self, owner, size):
+        """Start an upload of ``size`` bytes for ``owner`` (any JSON value); returns its ID"""
+        if size <= 0:
+            raise ValueError("Upload size must be positive")
+        os.makedirs(self.root, exist_ok=True)
+        self.remove_expired()
+
+        upload_id = uuid.uuid4().hex
+        with open(self._path(upload_id, ".json"), "w", encoding="utf-8") as f:
+            json.dump({"owner": owner, "size": size, "created": time.time()}, f)
+        open(self._path(upload_id, ".part"), "wb").close()
+        return upload_id
+
+    def status(self, upload_id):
+        """``(owner, offset, size)``; raises KeyError for an unknown upload"""
+        try:
+            with open(self._path(upload_id, ".json"), encoding="utf-8") as f:
+                meta = json.load(f)
+            offset = os.path.getsize(self._path(upload_id, ".part"))
+        except FileNotFoundError:
+            raise KeyError(upload_id) from None
+        return meta["owner"], offset, meta["size"]
+
+    def append(self, upload_id, offset, chunk):
+        """
+        Append a chunk sent for ``offset``; returns ``(new_offset, size)``.
+
+        Raises KeyError for an unknown upload and ValueError when the offset is
+        not the current one (the client must ask for the status and resume
+        from there) or the chunk is too large.
+        """
+        with self._upload_lock(upload_id):
+            _, current, size = self.status(upload_id)
+            if offset != current:
+                raise ValueError(f"Offset mismatch: upload is at {current}")
+            if len(chunk) > self.chunk_size:
+                raise ValueError(f"Chunks are at most {self.chunk_size} bytes")
+            if current + len(chunk) > size:
+                raise ValueError("Chunk runs past the declared size")
+            with open(self._path(upload_id, ".part"), "ab") as f:
+                f.write(chunk)
+            return current + len(chunk), size
+
+    def take(self, upload_id):
+        """The complete upload's bytes; the upload is removed. Raises ValueError if incomplete."""
+        with self._upload_lock(upload_id):
+            _, offset, size = self.status(upload_id)
+            if offset != size:
+                raise ValueError(f"Upload incomplete: {offset} of {size} bytes")
+            with open(self._path(upload_id, ".part"), "rb") as f:
+                data = f.read()
+            self.remove(upload_id)
+        return data
+
+    def remove(self, upload_id):
+        for suffix in (".part", ".json"):
+            try:
+                os.unlink(self._path(upload_id, suffix))
+            except (FileNotFoundError, KeyError):
+                pass
+        with self._lock:
+            self._upload_locks.pop(upload_id, None)
+
+    def remove_expired(self):
+        """Delete unfinished uploads older than max_age_seconds; returns how many"""
+        cutoff = time.time() - self.max_age_seconds
+        removed = 0
+        for name in os.listdir(self.root):
+            if not name.endswith(".json"):
+                continue
+            path = os.path.join(self.root, name)
+            try:
+                if os.path.getmtime(path) < cutoff:
+                    self.remove(name[:-len(".json")])
+                    removed += 1
+            except FileNotFoundError:
+                pass
+        return removed